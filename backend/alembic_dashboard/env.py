@@ -0,0 +1,36 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+# this is the Alembic Config object, which provides
+# access to the values within the .ini file in use.
+config = context.config
+
+# Interpret the config file for Python logging, keeping the loggers of the
+# API when it runs the migrations at startup
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+from app.dashboard.database import Base, engine
+from app.dashboard import models  # noqa: F401 (fills Base.metadata)
+target_metadata = Base.metadata
+
+# Kept apart from the auth migrations' table, in case both schemas share a database
+VERSION_TABLE = "alembic_version_dashboard"
+
+
+def run_migrations_online() -> None:
+    """Run migrations in 'online' mode, on the dashboard's engine."""
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection, target_metadata=target_metadata, version_table=VERSION_TABLE
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    # The migrations look at the tables they upgrade (see versions/), which needs a connection
+    raise RuntimeError("The dashboard migrations cannot run in offline mode")
+run_migrations_online()
@@ -0,0 +1,40 @@
+"""
+Checks the dashboard migrations make before each step.
+
+The dashboard schema used to be created by Base.metadata.create_all alone,
+which never alters a table that exists already, so a database may hold any
+part of what a migration adds. Every step checks what is there first, and
+the migrations upgrade such databases too. A database without a files
+table is new: create_all builds it as the models are, and the migrations
+do nothing (see is_new_database).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+def table_names() -> set:
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def is_new_database() -> bool:
+    return "files" not in table_names()
+
+
+def column_names(table: str) -> set:
+    return {column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def add_missing_columns(table: str, *columns: sa.Column) -> None:
+    existing = column_names(table)
+    for column in columns:
+        if column.name not in existing:
+            op.add_column(table, column)
+
+
+def create_missing_index(name: str, table: str, columns: list) -> None:
+    if name not in {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}:
+        op.create_index(name, table, columns)
+
+
+def has_unique_constraint(table: str, name: str) -> bool:
+    return name in {constraint["name"] for constraint in sa.inspect(op.get_bind()).get_unique_constraints(table)}
@@ -0,0 +1,54 @@
+"""Queue parses in parse_jobs
+
+Revision ID: 1c2685405db7
+Revises: 76b617c8eba4
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from alembic_dashboard.schema_checks import column_names, create_missing_index, is_new_database, table_names
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c2685405db7'
+down_revision: Union[str, Sequence[str], None] = '76b617c8eba4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if is_new_database():
+        return
+
+    if "parse_jobs" not in table_names():
+        op.create_table(
+            "parse_jobs",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("file_id", sa.Integer, sa.ForeignKey("files.id"), nullable=False),
+            sa.Column("status", sa.String, nullable=False),
+            sa.Column("priority", sa.Integer, nullable=False),
+            sa.Column("attempts", sa.Integer, nullable=False),
+            sa.Column("max_attempts", sa.Integer, nullable=False),
+            sa.Column("available_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+            sa.Column("locked_by", sa.String, nullable=True),
+            sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("last_error", sa.String, nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        )
+    # Held the uploader's token before the parser pulled reports with a service token
+    elif "auth_token" in column_names("parse_jobs"):
+        op.drop_column("parse_jobs", "auth_token")
+    create_missing_index("ix_parse_jobs_id", "parse_jobs", ["id"])
+    create_missing_index("ix_parse_jobs_file_id", "parse_jobs", ["file_id"])
+    create_missing_index("ix_parse_jobs_queue", "parse_jobs", ["status", "priority", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("parse_jobs")
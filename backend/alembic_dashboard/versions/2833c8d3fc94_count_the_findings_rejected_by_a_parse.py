@@ -0,0 +1,33 @@
+"""Count the findings rejected by a parse
+
+Revision ID: 2833c8d3fc94
+Revises: 8e545102e90c
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from alembic_dashboard.schema_checks import add_missing_columns, is_new_database
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2833c8d3fc94'
+down_revision: Union[str, Sequence[str], None] = '8e545102e90c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if is_new_database():
+        return
+
+    add_missing_columns("files", sa.Column("findings_rejected", sa.Integer, nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("files", "findings_rejected")
@@ -0,0 +1,38 @@
+"""Record the progress of a parse
+
+Revision ID: 76b617c8eba4
+Revises: 2833c8d3fc94
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from alembic_dashboard.schema_checks import add_missing_columns, is_new_database
+
+
+# revision identifiers, used by Alembic.
+revision: str = '76b617c8eba4'
+down_revision: Union[str, Sequence[str], None] = '2833c8d3fc94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if is_new_database():
+        return
+
+    add_missing_columns(
+        "files",
+        sa.Column("hosts_processed", sa.Integer, nullable=True),
+        sa.Column("findings_processed", sa.Integer, nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in ("findings_processed", "hosts_processed"):
+        op.drop_column("files", column)
@@ -0,0 +1,67 @@
+"""Add the plugin catalog
+
+The plugins table, with the (tool_id, plugin_id) unique constraint the
+parser upserts on, and the plugin_id of each log.
+
+Revision ID: 887e4bfec519
+Revises:
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from alembic_dashboard.schema_checks import (
+    add_missing_columns, create_missing_index, has_unique_constraint, is_new_database, table_names,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = '887e4bfec519'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if is_new_database():
+        return
+
+    if "plugins" not in table_names():
+        op.create_table(
+            "plugins",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("tool_id", sa.Integer, sa.ForeignKey("tools.id"), nullable=False),
+            sa.Column("plugin_id", sa.String, nullable=False),
+            sa.Column("name", sa.String, nullable=True),
+            sa.Column("family", sa.String, nullable=True),
+            sa.Column("description", sa.String, nullable=True),
+            sa.Column("solution", sa.String, nullable=True),
+            sa.Column("cvss_base_score", sa.Float, nullable=True),
+            sa.Column("exploitable", sa.Boolean, nullable=False),
+            sa.Column("metasploit_available", sa.Boolean, nullable=False),
+            sa.Column("metasploit_name", sa.String, nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.UniqueConstraint("tool_id", "plugin_id", name="uq_plugins_tool_plugin"),
+        )
+    elif not has_unique_constraint("plugins", "uq_plugins_tool_plugin"):
+        # Only the latest copy of a plugin is kept
+        op.execute("""
+            DELETE FROM plugins WHERE id NOT IN (SELECT max(id) FROM plugins GROUP BY tool_id, plugin_id)
+        """)
+        op.create_unique_constraint("uq_plugins_tool_plugin", "plugins", ["tool_id", "plugin_id"])
+    create_missing_index("ix_plugins_id", "plugins", ["id"])
+
+    add_missing_columns("logs", sa.Column("plugin_id", sa.String, nullable=True))
+    create_missing_index("ix_logs_plugin_id", "logs", ["plugin_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_logs_plugin_id", table_name="logs")
+    op.drop_column("logs", "plugin_id")
+    op.drop_table("plugins")
@@ -0,0 +1,42 @@
+"""Record where each finding is in its report
+
+The byte ranges of a log's finding and of its host in the source report.
+
+Revision ID: 8a684f050137
+Revises: b99aa1a16f78
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from alembic_dashboard.schema_checks import add_missing_columns, is_new_database
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a684f050137'
+down_revision: Union[str, Sequence[str], None] = 'b99aa1a16f78'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if is_new_database():
+        return
+
+    add_missing_columns(
+        "logs",
+        sa.Column("source_offset", sa.BigInteger, nullable=True),
+        sa.Column("source_length", sa.Integer, nullable=True),
+        sa.Column("host_offset", sa.BigInteger, nullable=True),
+        sa.Column("host_length", sa.Integer, nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in ("host_length", "host_offset", "source_length", "source_offset"):
+        op.drop_column("logs", column)
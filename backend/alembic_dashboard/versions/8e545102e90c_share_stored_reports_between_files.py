@@ -0,0 +1,70 @@
+"""Share stored reports between files
+
+The tool a file was parsed with, the file it was copied from, the uploader's
+idempotency key, and the stored_blobs table counting the files that share
+one stored report.
+
+Revision ID: 8e545102e90c
+Revises: 8a684f050137
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from alembic_dashboard.schema_checks import (
+    add_missing_columns, create_missing_index, has_unique_constraint, is_new_database, table_names,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e545102e90c'
+down_revision: Union[str, Sequence[str], None] = '8a684f050137'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if is_new_database():
+        return
+
+    add_missing_columns(
+        "files",
+        sa.Column("tool_id", sa.Integer, sa.ForeignKey("tools.id"), nullable=True),
+        sa.Column("source_file_id", sa.Integer, sa.ForeignKey("files.id"), nullable=True),
+        sa.Column("idempotency_key", sa.String, nullable=True),
+    )
+    create_missing_index("ix_files_source_file_id", "files", ["source_file_id"])
+    create_missing_index("ix_files_md5_tool", "files", ["md5_hash", "tool_id"])
+    if not has_unique_constraint("files", "uq_files_user_idempotency_key"):
+        # A key reused by the same user only stays on its first file
+        op.execute("""
+            UPDATE files SET idempotency_key = NULL
+            WHERE idempotency_key IS NOT NULL AND id NOT IN (
+                SELECT min(id) FROM files WHERE idempotency_key IS NOT NULL GROUP BY uploaded_by, idempotency_key
+            )
+        """)
+        op.create_unique_constraint("uq_files_user_idempotency_key", "files", ["uploaded_by", "idempotency_key"])
+
+    # Reports stored before have no row and are never deleted (see release_blob)
+    if "stored_blobs" not in table_names():
+        op.create_table(
+            "stored_blobs",
+            sa.Column("file_path", sa.String, primary_key=True),
+            sa.Column("md5_hash", sa.String, nullable=False),
+            sa.Column("ref_count", sa.Integer, nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("stored_blobs")
+    op.drop_constraint("uq_files_user_idempotency_key", "files", type_="unique")
+    op.drop_index("ix_files_md5_tool", table_name="files")
+    op.drop_index("ix_files_source_file_id", table_name="files")
+    for column in ("idempotency_key", "source_file_id", "tool_id"):
+        op.drop_column("files", column)
@@ -0,0 +1,63 @@
+"""Upload reports in parts
+
+The upload_sessions and upload_parts tables of chunked uploads, and
+files.size as BIGINT for reports of 2 GiB and more.
+
+Revision ID: 940e9823fb98
+Revises: 1c2685405db7
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from alembic_dashboard.schema_checks import is_new_database, table_names
+
+
+# revision identifiers, used by Alembic.
+revision: str = '940e9823fb98'
+down_revision: Union[str, Sequence[str], None] = '1c2685405db7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if is_new_database():
+        return
+
+    size_type = next(column["type"] for column in sa.inspect(op.get_bind()).get_columns("files") if column["name"] == "size")
+    if not isinstance(size_type, sa.BigInteger):
+        op.alter_column("files", "size", type_=sa.BigInteger, existing_type=size_type, existing_nullable=False)
+
+    tables = table_names()
+    if "upload_sessions" not in tables:
+        op.create_table(
+            "upload_sessions",
+            sa.Column("id", sa.String, primary_key=True),
+            sa.Column("filename", sa.String, nullable=False),
+            sa.Column("file_type", sa.String, nullable=False),
+            sa.Column("size", sa.BigInteger, nullable=False),
+            sa.Column("part_size", sa.Integer, nullable=False),
+            sa.Column("tool_id", sa.Integer, sa.ForeignKey("tools.id"), nullable=False),
+            sa.Column("uploaded_by", sa.Integer, nullable=False),
+            sa.Column("idempotency_key", sa.String, nullable=True),
+            sa.Column("status", sa.String, nullable=False),
+            sa.Column("file_id", sa.Integer, sa.ForeignKey("files.id"), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_upload_sessions_file_id", "upload_sessions", ["file_id"])
+    if "upload_parts" not in tables:
+        op.create_table(
+            "upload_parts",
+            sa.Column("upload_id", sa.String, sa.ForeignKey("upload_sessions.id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("part_index", sa.Integer, primary_key=True),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema (files.size stays BIGINT: reports of 2 GiB and more would not fit back)."""
+    op.drop_table("upload_parts")
+    op.drop_table("upload_sessions")
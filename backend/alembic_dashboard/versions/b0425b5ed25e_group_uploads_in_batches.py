@@ -0,0 +1,52 @@
+"""Group uploads in batches
+
+The upload_batches table, and the batch of each file and parse job.
+
+Revision ID: b0425b5ed25e
+Revises: 940e9823fb98
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from alembic_dashboard.schema_checks import add_missing_columns, create_missing_index, is_new_database, table_names
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b0425b5ed25e'
+down_revision: Union[str, Sequence[str], None] = '940e9823fb98'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if is_new_database():
+        return
+
+    if "upload_batches" not in table_names():
+        op.create_table(
+            "upload_batches",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("tool_id", sa.Integer, sa.ForeignKey("tools.id"), nullable=False),
+            sa.Column("uploaded_by", sa.Integer, nullable=False),
+            sa.Column("max_parallel", sa.Integer, nullable=False),
+            sa.Column("rejected", sa.String, nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_upload_batches_id", "upload_batches", ["id"])
+
+    for table in ("files", "parse_jobs"):
+        add_missing_columns(table, sa.Column("batch_id", sa.Integer, sa.ForeignKey("upload_batches.id"), nullable=True))
+        create_missing_index(f"ix_{table}_batch_id", table, ["batch_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ("parse_jobs", "files"):
+        op.drop_index(f"ix_{table}_batch_id", table_name=table)
+        op.drop_column(table, "batch_id")
+    op.drop_table("upload_batches")
@@ -0,0 +1,33 @@
+"""Count the findings dropped by a parse
+
+Revision ID: b99aa1a16f78
+Revises: 887e4bfec519
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from alembic_dashboard.schema_checks import add_missing_columns, is_new_database
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b99aa1a16f78'
+down_revision: Union[str, Sequence[str], None] = '887e4bfec519'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if is_new_database():
+        return
+
+    add_missing_columns("files", sa.Column("findings_dropped", sa.Integer, nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("files", "findings_dropped")
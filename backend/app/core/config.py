@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -32,6 +34,8 @@ class Settings(BaseSettings):
     # Security
     CORS_ORIGINS: list
     PASSWORD_SALT: str
+    # Shared with the parser workers, which pull stored reports with it (see /internal endpoints)
+    INTERNAL_SERVICE_TOKEN: Optional[str] = None
     
     class Config:
         env_file = ".env"
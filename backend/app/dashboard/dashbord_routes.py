@@ -1,16 +1,23 @@
 # backend/app/dashboard/admin_routes.py - NEW FILE
 from fastapi import APIRouter, HTTPException, Depends, status, Query, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+import hmac
 import httpx
-import hashlib
-import os
 import json
-from typing import List, Optional
-from datetime import datetime
+import os
+import uuid
+from collections import Counter
+from typing import BinaryIO, List, Optional
+from datetime import datetime, timedelta
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
-from . import models, schemas
+from . import models, schemas, storage
 from .database import get_db
+from ..core.config import settings
 from ..auth.admin_routes import get_current_user, get_admin_user
 from ..auth import models as auth_models
 
@@ -250,6 +257,24 @@ async def delete_tool(
     db.commit()
     return {"message": f"Tool '{tool.name}' deleted successfully"}
 
+# ==================== PLUGIN CATALOG ====================
+
+@router.get("/tools/{tool_id}/plugins/{plugin_id}", response_model=schemas.PluginResponse)
+async def get_plugin(
+    tool_id: int,
+    plugin_id: str,
+    db: Session = Depends(get_db),
+    current_user: auth_models.User = Depends(get_current_user)
+):
+    """Get the catalog entry (description, solution, scores) referenced by findings"""
+    plugin = db.query(models.Plugin).filter(
+        models.Plugin.tool_id == tool_id,
+        models.Plugin.plugin_id == plugin_id
+    ).first()
+    if not plugin:
+        raise HTTPException(status_code=404, detail="Plugin not found")
+    return plugin
+
 # ==================== STATISTICS ====================
 
 @router.get("/stats")
@@ -301,169 +326,578 @@ async def get_dashboard_stats(
         raise HTTPException(status_code=500, detail=f"Error fetching dashboard stats: {str(e)}")
 
 # ==================== FILE MANAGEMENT ====================
-from fastapi import Request, Header
+from fastapi import Request, Header, Response
 
-UPLOAD_DIR = "uploads"
 PARSER_SERVICE_URL = "http://parser_backend:8001"  # Update with your parser service URL
 import logging
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Updated upload_file function in dashboard_routes.py
-@router.post("/files/upload", response_model=schemas.FileResponse)
+# Parse jobs of a batch run at the same time, unless the upload sets max_parallel
+BATCH_MAX_PARALLEL = int(os.getenv("BATCH_MAX_PARALLEL", 4))
+# Batch files are parsed after single uploads, which someone is usually waiting for
+BATCH_PRIORITY = -1
+
+def enqueue_parse(db: Session, db_file: models.File, priority: int = 0, batch_id: Optional[int] = None):
+    """Queue the parse of a file for the parser workers, in the caller's transaction"""
+    db.add(models.ParseJob(file_id=db_file.id, priority=priority, batch_id=batch_id))
+
+def acquire_blob(db: Session, stored: storage.StoredReport):
+    """Count one more file record using a stored report"""
+    statement = pg_insert(models.StoredBlob).values(
+        file_path=stored.file_path, md5_hash=stored.md5_hash, ref_count=1
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=["file_path"], set_={"ref_count": models.StoredBlob.ref_count + 1}
+    )
+    db.execute(statement)
+    db.commit()
+
+def release_blob(db: Session, file_path: str) -> bool:
+    """
+    Count one file record less using a stored report, in the caller's transaction.
+    
+    Returns True when it was the last one: the caller deletes the report
+    before committing, while the blob row is still locked.
+    """
+    blob = db.query(models.StoredBlob).filter(models.StoredBlob.file_path == file_path).with_for_update().first()
+    if blob is None:
+        # Stored before references were counted: other files may still use it
+        return False
+    blob.ref_count -= 1
+    if blob.ref_count > 0:
+        return False
+    db.delete(blob)
+    return True
+
+async def store_upload(db: Session, source: BinaryIO, filename: str) -> storage.StoredReport:
+    """
+    Store an upload (streamed and hashed in chunks on a worker thread) and take a reference on it.
+    
+    The upload is hashed first, so a report that is stored already is not
+    written (and compressed) again.
+    """
+    file_hash, size = await run_in_threadpool(storage.hash_upload, source)
+    file_path = await run_in_threadpool(storage.stored_copy, file_hash, filename)
+    if file_path is not None:
+        stored = storage.StoredReport(file_path=file_path, md5_hash=file_hash, size=size)
+    else:
+        stored = await run_in_threadpool(storage.save_report, source, filename)
+    acquire_blob(db, stored)
+    if not os.path.exists(stored.file_path):
+        # The last other file using the report was deleted while this copy was stored
+        await run_in_threadpool(source.seek, 0)
+        stored = await run_in_threadpool(storage.save_report, source, filename)
+    return stored
+
+def find_processed_upload(db: Session, md5_hash: str, tool: models.Tool) -> Optional[models.File]:
+    """An earlier upload of the same report, processed with the tool as it is configured now"""
+    query = db.query(models.File).filter(
+        models.File.md5_hash == md5_hash,
+        models.File.tool_id == tool.id,
+        models.File.status == "processed",
+        models.File.source_file_id.is_(None)
+    )
+    if tool.updated_at is not None:
+        # Ingest filters and field mappings may have changed since
+        query = query.filter(models.File.created_at >= tool.updated_at)
+    return query.order_by(models.File.id.desc()).first()
+
+def find_idempotent_upload(db: Session, user_id: int, idempotency_key: Optional[str]) -> Optional[models.File]:
+    """The file created by an earlier attempt of an upload with the same key"""
+    if not idempotency_key:
+        return None
+    return db.query(models.File).filter(
+        models.File.uploaded_by == user_id, models.File.idempotency_key == idempotency_key
+    ).first()
+
+def register_upload(
+    db: Session,
+    response: Optional[Response],
+    stored: storage.StoredReport,
+    filename: str,
+    file_type: str,
+    tool: models.Tool,
+    user_id: int,
+    idempotency_key: Optional[str],
+    upload_session: Optional[models.UploadSession] = None,
+    batch: Optional[models.UploadBatch] = None
+) -> models.File:
+    """
+    Create the file record of a stored upload (holding a reference on the report) and queue its parse.
+    
+    A report already processed with the same tool is not parsed again: the
+    file reuses the findings of the earlier upload and is returned processed,
+    with a 200 status. A completed chunked upload (upload_session) is marked
+    so in the same transaction. Files of a batch are queued behind single
+    uploads, under the batch's parallelism limit.
+    """
+    original = find_processed_upload(db, stored.md5_hash, tool)
+    
+    # Create file record
+    db_file = models.File(
+        filename=filename,
+        file_path=stored.file_path,
+        file_type=file_type,
+        uploaded_by=user_id,
+        size=stored.size,
+        status="processed" if original else "pending",
+        md5_hash=stored.md5_hash,
+        tool_id=tool.id,
+        source_file_id=original.id if original else None,
+        findings_dropped=original.findings_dropped if original else None,
+        findings_rejected=original.findings_rejected if original else None,
+        hosts_processed=original.hosts_processed if original else 0,
+        findings_processed=original.findings_processed if original else 0,
+        idempotency_key=idempotency_key,
+        batch_id=batch.id if batch else None
+    )
+    db.add(db_file)
+    try:
+        db.flush()
+        if not original:
+            # Queued with the file record, so no pending file is left without a job
+            enqueue_parse(
+                db, db_file, priority=BATCH_PRIORITY if batch else 0, batch_id=batch.id if batch else None
+            )
+        if upload_session is not None:
+            upload_session.status = "completed"
+            upload_session.file_id = db_file.id
+        db.commit()
+    except IntegrityError:
+        # A concurrent retry with the same idempotency key got there first
+        db.rollback()
+        if release_blob(db, stored.file_path):
+            storage.delete_report(stored.file_path)
+        db.commit()
+        existing = find_idempotent_upload(db, user_id, idempotency_key)
+        if existing is None:
+            raise
+        if response is not None:
+            response.status_code = status.HTTP_200_OK
+        return existing
+    db.refresh(db_file)
+    
+    if original:
+        logger.info(f"{filename} was already processed as file {original.id}, reusing its findings")
+        if response is not None:
+            response.status_code = status.HTTP_200_OK
+    return db_file
+
+@router.post("/files/upload", response_model=schemas.FileResponse, status_code=status.HTTP_202_ACCEPTED)
 async def upload_file(
+    response: Response,
     file: UploadFile = File(...),
     tool_id: int = Query(..., description="ID of the tool to use for parsing"),
     db: Session = Depends(get_db),
     current_user: auth_models.User = Depends(get_current_user),
-    authorization: str = Header(None)
+    idempotency_key: Optional[str] = Header(None, description="Retries with the same key return the file of the first attempt")
 ):
-    """Upload and parse a security report file"""
-    # Create uploads directory if it doesn't exist
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    """
+    Upload a security report file (optionally .gz, .zst or .zip compressed) to be parsed.
     
-    # Read and save file
-    contents = await file.read()
-    file_hash = hashlib.md5(contents).hexdigest()
+    The report is stored, its parse queued for the parser workers, and the
+    file returned right away with status pending (202). It ends processed or
+    failed, with hosts_processed and findings_processed updated meanwhile.
+    A report already processed with the same tool is not parsed again: the
+    new file record reuses the findings of the earlier upload (source_file_id)
+    and is returned processed (200).
     
-    # Create file path
-    file_ext = os.path.splitext(file.filename)[1]
-    file_path = os.path.join(UPLOAD_DIR, f"{file_hash}{file_ext}")
+    Large reports are better sent as chunked uploads (see create_upload).
+    """
+    tool = db.query(models.Tool).filter(models.Tool.id == tool_id).first()
+    if not tool:
+        raise HTTPException(status_code=404, detail="Tool not found")
     
-    # Save file
-    with open(file_path, "wb") as f:
-        f.write(contents)
+    existing = find_idempotent_upload(db, current_user.id, idempotency_key)
+    if existing:
+        response.status_code = status.HTTP_200_OK
+        return existing
     
-    # Create file record
-    db_file = models.File(
-        filename=file.filename,
-        file_path=file_path,
-        file_type=file.content_type,
+    # Save file, compressed at rest
+    stored = await store_upload(db, file.file, file.filename)
+    return register_upload(
+        db, response, stored, file.filename, file.content_type, tool, current_user.id, idempotency_key
+    )
+
+# Chunked uploads not completed within this time are discarded
+UPLOAD_SESSION_HOURS = 24
+
+def upload_part_count(upload: models.UploadSession) -> int:
+    return (upload.size + upload.part_size - 1) // upload.part_size
+
+def upload_session_response(db: Session, upload: models.UploadSession) -> schemas.UploadSessionResponse:
+    received_parts = [
+        part_index for (part_index,) in db.query(models.UploadPart.part_index)
+        .filter(models.UploadPart.upload_id == upload.id)
+        .order_by(models.UploadPart.part_index)
+    ]
+    return schemas.UploadSessionResponse(
+        id=upload.id,
+        filename=upload.filename,
+        size=upload.size,
+        part_size=upload.part_size,
+        part_count=upload_part_count(upload),
+        received_parts=received_parts,
+        status=upload.status,
+        file_id=upload.file_id
+    )
+
+def get_upload_session(db: Session, upload_id: str, user_id: int, lock: bool = False) -> models.UploadSession:
+    query = db.query(models.UploadSession).filter(
+        models.UploadSession.id == upload_id, models.UploadSession.uploaded_by == user_id
+    )
+    upload = (query.with_for_update() if lock else query).first()
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return upload
+
+async def expire_upload_sessions(db: Session):
+    """Discard the chunked uploads older than UPLOAD_SESSION_HOURS (files of completed ones stay)"""
+    cutoff = datetime.utcnow() - timedelta(hours=UPLOAD_SESSION_HOURS)
+    expired = db.query(models.UploadSession).filter(models.UploadSession.created_at < cutoff).all()
+    for upload in expired:
+        db.delete(upload)
+        await run_in_threadpool(storage.discard_upload, upload.id)
+    db.commit()
+
+@router.post("/files/uploads", response_model=schemas.UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    upload_request: schemas.UploadSessionCreate,
+    db: Session = Depends(get_db),
+    current_user: auth_models.User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, description="Completing with the same key as an earlier upload returns its file")
+):
+    """
+    Start a chunked upload, for reports too large to send reliably in one request.
+    
+    The upload is then sent in parts of part_size bytes, each PUT to
+    /files/uploads/{id}/parts/{n}, in any order and in parallel. After a
+    dropped connection only the parts missing from received_parts (GET
+    /files/uploads/{id}) are sent again. The server hashes and compresses
+    the parts as they arrive, and completing the upload (POST
+    /files/uploads/{id}/complete) creates the file as upload_file does.
+    """
+    tool = db.query(models.Tool).filter(models.Tool.id == upload_request.tool_id).first()
+    if not tool:
+        raise HTTPException(status_code=404, detail="Tool not found")
+    
+    await expire_upload_sessions(db)
+    upload = models.UploadSession(
+        id=uuid.uuid4().hex,
+        filename=upload_request.filename,
+        file_type=upload_request.file_type,
+        size=upload_request.size,
+        part_size=storage.UPLOAD_PART_BYTES,
+        tool_id=tool.id,
         uploaded_by=current_user.id,
-        size=len(contents),
-        status="pending",
-        md5_hash=file_hash
+        idempotency_key=idempotency_key,
+        status="receiving"
     )
-    db.add(db_file)
+    await run_in_threadpool(storage.create_part_file, upload.id, upload.size)
+    db.add(upload)
     db.commit()
-    db.refresh(db_file)
+    return upload_session_response(db, upload)
+
+@router.get("/files/uploads/{upload_id}", response_model=schemas.UploadSessionResponse)
+async def get_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: auth_models.User = Depends(get_current_user)
+):
+    """Get a chunked upload, with the parts received so far"""
+    return upload_session_response(db, get_upload_session(db, upload_id, current_user.id))
+
+@router.put("/files/uploads/{upload_id}/parts/{part_index}", response_model=schemas.UploadSessionResponse)
+async def upload_part(
+    upload_id: str,
+    part_index: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: auth_models.User = Depends(get_current_user)
+):
+    """
+    Receive part part_index of a chunked upload, as the raw request body.
+    
+    Sending a part again (after a dropped connection) replaces it until
+    the server has hashed it. A part hashed already may only be sent again
+    with the same bytes, which leaves the upload as it is; other bytes are
+    refused (409).
+    """
+    # Read before any database access, so that no connection is held while the part arrives
+    chunks = []
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > storage.UPLOAD_PART_BYTES:
+            raise HTTPException(status_code=413, detail=f"Parts are at most {storage.UPLOAD_PART_BYTES} bytes")
+        chunks.append(chunk)
+    data = b"".join(chunks)
+    
+    upload = get_upload_session(db, upload_id, current_user.id)
+    if upload.status != "receiving":
+        raise HTTPException(status_code=409, detail="Upload is already completed")
+    if not 0 <= part_index < upload_part_count(upload):
+        raise HTTPException(status_code=404, detail="Part not found")
+    expected = min(upload.part_size, upload.size - part_index * upload.part_size)
+    if len(data) != expected:
+        raise HTTPException(status_code=400, detail=f"Part {part_index} must be {expected} bytes, received {len(data)}")
+    
+    assembler = storage.upload_assembler(upload.id, upload.filename, upload.part_size)
+    if await run_in_threadpool(assembler.taken_in, part_index, data):
+        return upload_session_response(db, upload)
+    
+    # On disk before it is counted as received
+    await run_in_threadpool(storage.write_part, upload.id, part_index * upload.part_size, data)
+    db.execute(pg_insert(models.UploadPart).values(upload_id=upload.id, part_index=part_index).on_conflict_do_nothing())
+    db.commit()
+    
+    session_response = upload_session_response(db, upload)
+    # Hash (and compress) the parts received in order so far, starting from this one while it is in memory
+    await run_in_threadpool(assembler.advance, set(session_response.received_parts), part_index, data)
+    return session_response
+
+@router.post("/files/uploads/{upload_id}/complete", response_model=schemas.FileResponse, status_code=status.HTTP_202_ACCEPTED)
+async def complete_upload(
+    upload_id: str,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: auth_models.User = Depends(get_current_user)
+):
+    """
+    Store the report of a chunked upload once all its parts are received, and create its file.
+    
+    Answers like upload_file: the pending file (202), or a processed one
+    reusing the findings of the same report (200). Completing an upload
+    again returns its file.
+    """
+    upload = get_upload_session(db, upload_id, current_user.id)
+    if upload.status == "completed":
+        response.status_code = status.HTTP_200_OK
+        return db.query(models.File).filter(models.File.id == upload.file_id).first()
+    existing = find_idempotent_upload(db, current_user.id, upload.idempotency_key)
+    if existing:
+        response.status_code = status.HTTP_200_OK
+        return existing
+    
+    part_count = upload_part_count(upload)
+    missing = sorted(set(range(part_count)) - set(upload_session_response(db, upload).received_parts))
+    if missing:
+        raise HTTPException(
+            status_code=409,
+            detail=f"{len(missing)} of {part_count} parts are missing, starting with {missing[:10]}"
+        )
+    tool = db.query(models.Tool).filter(models.Tool.id == upload.tool_id).first()
+    if not tool:
+        raise HTTPException(status_code=404, detail="Tool not found")
+    
+    # Normally just the last parts to hash: the others were taken in as they arrived
+    assembler = storage.upload_assembler(upload.id, upload.filename, upload.part_size)
+    stored = await run_in_threadpool(assembler.finish, part_count)
+    # Referenced before it is moved into place, so that deleting the last other file using it cannot remove it
+    acquire_blob(db, stored)
+    await run_in_threadpool(assembler.publish)
+    
+    upload = get_upload_session(db, upload_id, current_user.id, lock=True)
+    if upload.status == "completed":
+        # Completed by a concurrent request meanwhile
+        release_blob(db, stored.file_path)
+        db.commit()
+        response.status_code = status.HTTP_200_OK
+        return db.query(models.File).filter(models.File.id == upload.file_id).first()
+    db_file = register_upload(
+        db, response, stored, upload.filename, upload.file_type, tool, current_user.id,
+        upload.idempotency_key, upload_session=upload
+    )
+    await run_in_threadpool(storage.discard_upload, upload_id)
+    return db_file
+
+@router.delete("/files/uploads/{upload_id}")
+async def cancel_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: auth_models.User = Depends(get_current_user)
+):
+    """Cancel a chunked upload, dropping the parts received (the file of a completed one stays)"""
+    upload = get_upload_session(db, upload_id, current_user.id, lock=True)
+    db.delete(upload)
+    db.commit()
+    await run_in_threadpool(storage.discard_upload, upload_id)
+    return {"message": "Upload cancelled"}
+
+def upload_batch_response(db: Session, batch: models.UploadBatch) -> schemas.UploadBatchResponse:
+    files = db.query(models.File).filter(models.File.batch_id == batch.id).order_by(models.File.id).all()
+    return schemas.UploadBatchResponse(
+        id=batch.id,
+        tool_id=batch.tool_id,
+        created_at=batch.created_at,
+        max_parallel=batch.max_parallel,
+        status_counts=Counter(db_file.status for db_file in files),
+        files=[schemas.FileResponse.model_validate(db_file) for db_file in files],
+        rejected=json.loads(batch.rejected) if batch.rejected else []
+    )
+
+@router.post("/files/batches", response_model=schemas.UploadBatchResponse, status_code=status.HTTP_202_ACCEPTED)
+async def upload_batch(
+    files: List[UploadFile] = File(...),
+    tool_id: int = Query(..., description="ID of the tool to use for parsing"),
+    max_parallel: Optional[int] = Query(None, ge=1, description="Files of the batch parsed at the same time"),
+    db: Session = Depends(get_db),
+    current_user: auth_models.User = Depends(get_current_user)
+):
+    """
+    Upload many reports for a tool at once: several files, or zip archives holding several reports.
+    
+    Each report is stored and queued as with upload_file. The parser workers
+    run up to max_parallel parses of the batch at the same time, each
+    writing its findings with COPY in committed chunks, so the batch takes
+    about as long as its largest reports rather than the sum of them all.
+    Reports that cannot be stored are listed in rejected; the others are
+    still queued. Returns the batch (202); GET /files/batches/{id} follows
+    its files' progress.
+    """
+    tool = db.query(models.Tool).filter(models.Tool.id == tool_id).first()
+    if not tool:
+        raise HTTPException(status_code=404, detail="Tool not found")
+    
+    batch = models.UploadBatch(
+        tool_id=tool.id, uploaded_by=current_user.id, max_parallel=max_parallel or BATCH_MAX_PARALLEL
+    )
+    db.add(batch)
+    db.commit()
+    
+    rejected = []
+    for upload in files:
+        names = await run_in_threadpool(storage.archive_reports, upload.file, upload.filename)
+        # An archive of several reports adds each of them to the batch
+        reports = [(upload.filename, None)] if names is None else [(name, name) for name in names]
+        for filename, archive_name in reports:
+            try:
+                if archive_name is None:
+                    stored = await store_upload(db, upload.file, filename)
+                else:
+                    report = await run_in_threadpool(storage.extract_report, upload.file, archive_name)
+                    try:
+                        stored = await store_upload(db, report, os.path.basename(archive_name))
+                    finally:
+                        report.close()
+            except HTTPException as e:
+                rejected.append({"filename": filename, "detail": str(e.detail)})
+                continue
+            register_upload(
+                db, None, stored, os.path.basename(filename),
+                upload.content_type if archive_name is None else "application/octet-stream",
+                tool, current_user.id, None, batch=batch
+            )
+    
+    if rejected:
+        logger.warning(f"Batch {batch.id}: {len(rejected)} uploads rejected")
+        batch.rejected = json.dumps(rejected)
+        db.commit()
+    return upload_batch_response(db, batch)
+
+@router.get("/files/batches/{batch_id}", response_model=schemas.UploadBatchResponse)
+async def get_batch(
+    batch_id: int,
+    db: Session = Depends(get_db),
+    current_user: auth_models.User = Depends(get_current_user)
+):
+    """Get a batch upload, with the status of each of its files"""
+    batch = db.query(models.UploadBatch).filter(models.UploadBatch.id == batch_id).first()
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return upload_batch_response(db, batch)
+
+@router.post("/files/preview", response_model=schemas.FilePreviewResponse)
+async def preview_file(
+    file: UploadFile = File(...),
+    tool_id: int = Query(..., description="ID of the tool to preview the report with"),
+    db: Session = Depends(get_db),
+    current_user: auth_models.User = Depends(get_current_user),
+    authorization: str = Header(None)
+):
+    """
+    Preview what uploading a report would ingest, without ingesting it.
+    
+    Only the start of the upload (storage.PREVIEW_PREFIX_BYTES) is sent to
+    the parser, from a temporary file deleted afterwards: nothing is stored.
+    The response holds a severity histogram of the findings read, a few
+    normalized samples and a total estimated from the size of the upload.
+    """
+    tool = db.query(models.Tool).filter(models.Tool.id == tool_id).first()
+    if not tool:
+        raise HTTPException(status_code=404, detail="Tool not found")
+    
+    prefix = await run_in_threadpool(storage.report_prefix, file.file, file.filename)
     
-    # Send to parser service asynchronously
     token = authorization.split(" ")[1] if authorization else None
+    form = {
+        "tool_id": tool_id,
+        "auth_token": token,
+        "filename": prefix.filename,
+        "report_size": prefix.size,
+        "tool_name": tool.name,
+        "tool_type": tool.type,
+        "tool_configuration": tool.configuration
+    }
     try:
         async with httpx.AsyncClient() as client:
             response = await client.post(
-                f"{PARSER_SERVICE_URL}/parse",
-                json={
-                    "file_id": db_file.id,
-                    "tool_id": tool_id,
-                    "user_id": current_user.id,
-                    "auth_token": token
-                },
-                timeout=300.0  # 5 minutes timeout for parsing
+                f"{PARSER_SERVICE_URL}/preview",
+                data={key: str(value) for key, value in form.items() if value is not None},
+                files={"report": (prefix.filename, prefix.file, "application/octet-stream")},
+                timeout=30.0
             )
-            
-            if response.status_code != 200:
-                try:
-                    # Try to extract the parser's error detail
-                    error_detail = response.json().get("detail", "Unknown parser error")
-                except:
-                    error_detail = response.text  # Fallback to raw response
-                logger.error(error_detail)
-                db_file.status = "failed"
-                db.commit()
-                
-                # Create error log
-                error_log = models.Log(
-                    file_id=db_file.id,
-                    tool_id=tool_id,
-                    status="failed",
-                    message=error_detail,
-                    raw_data=response.text
-                )
-                db.add(error_log)
-                db.commit()
-                
-                raise HTTPException(
-                    status_code=response.status_code,  # Preserve original status code
-                    detail=error_detail  # Forward the parser's error message
-                )
-            
-            # Parse response - expecting list of normalized findings
-            findings = response.json()["findings"]
-            if not isinstance(findings, list):
-                error_msg = "Invalid response format from parser service"
-                logger.error(error_msg)
-                db_file.status = "failed"
-                db.commit()
-                raise HTTPException(status_code=500, detail=error_msg)
-            
-            # Store findings in database
-            for parsed_finding in findings:  # findings is now a list of {raw_finding, normalized_finding}
-                try:
-                    raw_data = parsed_finding["raw_finding"]
-                    normalized_data = parsed_finding["normalized_finding"]
-
-                    # Convert datetime if present (from normalized data)
-                    event_time = None
-                    if normalized_data.get("event_time"):
-                        try:
-                            event_time = datetime.fromisoformat(normalized_data["event_time"])
-                        except ValueError:
-                            logger.warning(f"Invalid event_time format: {normalized_data['event_time']}")
-
-                    # Create log entry
-                    db_log = models.Log(
-                        file_id=db_file.id,
-                        tool_id=tool_id,
-                        status="success",
-                        message=f"Parsed {file.filename} with tool ID {tool_id}",
-                        raw_data=json.dumps(raw_data),          # Store original finding
-                        parsed_data=json.dumps(normalized_data), # Store normalized data
-                        event_time=event_time,
-                        # Map normalized fields to database columns
-                        action=normalized_data.get("action"),
-                        attack_type=normalized_data.get("attack_type"),
-                        policy=normalized_data.get("policy"),
-                        bandwidth=normalized_data.get("bandwidth"),
-                        ip_source=normalized_data.get("ip_source"),
-                        ip_destination=normalized_data.get("ip_destination"),
-                        severity=normalized_data.get("severity"),
-                        cvss_base_score=normalized_data.get("cvss_base_score"),
-                        vulnerability_name=normalized_data.get("vulnerability_name"),
-                        malware_type=normalized_data.get("malware_type"),
-                        quarantine_status=normalized_data.get("quarantine_status"),
-                        log_type=normalized_data.get("log_type"),
-                        app_name=normalized_data.get("app_name"),
-                        country_code=normalized_data.get("country_code")
-                    )
-                    db.add(db_log)
-                    
-                except Exception as e:
-                    logger.error(f"Error storing finding: {str(e)}")
-                    continue
-            
-            # Update file status to processed
-            db_file.status = "processed"
-            db.commit()
-            
-            logger.info(f"Successfully processed {len(findings)} findings from {file.filename}")
-            
     except httpx.TimeoutException:
-        error_msg = "Parser service timeout"
-        logger.error(error_msg)
-        db_file.status = "failed"
-        db.commit()
-        raise HTTPException(status_code=504, detail=error_msg)
-    except Exception as e:
-        error_msg = f"Error processing file: {str(e)}"
-        logger.error(error_msg)
-        db_file.status = "failed"
-        db.commit()
-        raise HTTPException(status_code=500, detail=error_msg)
+        logger.error("Parser service timeout during preview")
+        raise HTTPException(status_code=504, detail="Parser service timeout")
+    except httpx.HTTPError as e:
+        logger.error(f"Preview request failed: {str(e)}")
+        raise HTTPException(status_code=502, detail="Parser service unavailable")
+    finally:
+        prefix.file.close()
     
-    return db_file
+    if response.status_code != 200:
+        try:
+            error_detail = response.json().get("detail", "Unknown parser error")
+        except ValueError:
+            error_detail = response.text
+        logger.error(error_detail)
+        raise HTTPException(status_code=response.status_code, detail=error_detail)
+    
+    return {"filename": file.filename, **response.json()}
+
+@router.get("/reports/{name}")
+async def get_stored_report(
+    name: str,
+    current_user: auth_models.User = Depends(get_current_user)
+):
+    """
+    Serve a stored report as it is on disk (possibly compressed), or its block index (.idx).
+    
+    Lets parser replicas that do not mount the uploads volume pull reports.
+    The file is sent from disk in chunks, never read into memory, with Range
+    support for random access (and zero-copy sends where the server offers them).
+    """
+    return FileResponse(storage.stored_report_path(name), media_type="application/octet-stream")
+
+def verify_service_token(x_service_token: Optional[str] = Header(None)):
+    """Internal endpoints are called by the other services, with the token they share with the dashboard"""
+    if not settings.INTERNAL_SERVICE_TOKEN:
+        raise HTTPException(status_code=503, detail="INTERNAL_SERVICE_TOKEN is not configured")
+    if x_service_token is None or not hmac.compare_digest(x_service_token, settings.INTERNAL_SERVICE_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid service token")
+
+@router.get("/internal/reports/{name}", dependencies=[Depends(verify_service_token)])
+async def get_stored_report_internal(name: str):
+    """
+    Serve a stored report to the parser workers, as get_stored_report does.
+    
+    Workers parse queued uploads long after their request ended, so they
+    authenticate with the service token rather than the uploader's.
+    """
+    return FileResponse(storage.stored_report_path(name), media_type="application/octet-stream")
 
 @router.get("/files", response_model=List[schemas.FileResponse])
 async def list_files(
@@ -493,9 +927,109 @@ async def get_file_logs(
     db: Session = Depends(get_db),
     current_user: auth_models.User = Depends(get_current_user)
 ):
-    logs = db.query(models.Log).filter(models.Log.file_id == file_id).all()
+    # Re-uploads of a processed report share the logs of the first upload
+    source_file_id = db.query(models.File.source_file_id).filter(models.File.id == file_id).scalar()
+    logs = db.query(models.Log).filter(models.Log.file_id == (source_file_id or file_id)).all()
     return logs
 
+@router.delete("/files/{file_id}")
+async def delete_file(
+    file_id: int,
+    db: Session = Depends(get_db),
+    current_user: auth_models.User = Depends(get_current_user)
+):
+    """
+    Delete an uploaded file and its findings; the stored report goes with the last file using it.
+    
+    A file still being parsed can be deleted: its job goes with it, and the
+    row lock taken here makes the worker stop at its next chunk of findings.
+    """
+    db_file = db.query(models.File).filter(models.File.id == file_id).with_for_update().first()
+    if not db_file:
+        raise HTTPException(status_code=404, detail="File not found")
+    if db_file.uploaded_by != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Only the uploader or an admin can delete this file")
+    
+    reuses = db.query(models.File).filter(models.File.source_file_id == file_id).count()
+    if reuses > 0:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot delete file. {reuses} later uploads of the same report reuse its findings. Delete them first."
+        )
+    
+    db.query(models.Log).filter(models.Log.file_id == file_id).delete(synchronize_session=False)
+    db.query(models.ParseJob).filter(models.ParseJob.file_id == file_id).delete(synchronize_session=False)
+    db.query(models.UploadSession).filter(models.UploadSession.file_id == file_id).delete(synchronize_session=False)
+    db.delete(db_file)
+    if release_blob(db, db_file.file_path):
+        storage.delete_report(db_file.file_path)
+    db.commit()
+    return {"message": f"File '{db_file.filename}' deleted successfully"}
+
+@router.get("/logs/{log_id}/raw", response_model=schemas.LogRawResponse)
+async def get_log_raw(
+    log_id: int,
+    db: Session = Depends(get_db),
+    current_user: auth_models.User = Depends(get_current_user),
+    authorization: str = Header(None)
+):
+    """
+    Raw and normalized finding behind a log.
+    
+    Logs of located findings only keep byte ranges into the stored report;
+    the parser service re-reads and re-parses that slice. Other logs still
+    carry their JSON copies.
+    """
+    log = db.query(models.Log).filter(models.Log.id == log_id).first()
+    if not log:
+        raise HTTPException(status_code=404, detail="Log not found")
+    
+    if log.source_offset is None:
+        if log.raw_data is None:
+            raise HTTPException(status_code=404, detail="No raw data stored for this log")
+        try:
+            return {
+                "log_id": log.id,
+                "raw_finding": json.loads(log.raw_data),
+                "normalized_finding": json.loads(log.parsed_data) if log.parsed_data else {}
+            }
+        except ValueError:
+            # Failure logs keep the parser's response as it was
+            raise HTTPException(status_code=404, detail="No parsed finding stored for this log")
+    
+    token = authorization.split(" ")[1] if authorization else None
+    try:
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                f"{PARSER_SERVICE_URL}/finding",
+                json={
+                    "tool_id": log.tool_id,
+                    "auth_token": token,
+                    "file_path": log.file.file_path,
+                    "filename": log.file.filename,
+                    "tool_name": log.tool.name,
+                    "tool_type": log.tool.type,
+                    "tool_configuration": log.tool.configuration,
+                    "source_offset": log.source_offset,
+                    "host_offset": log.host_offset,
+                    "host_length": log.host_length
+                },
+                timeout=30.0
+            )
+    except httpx.HTTPError as e:
+        logger.error(f"Reading finding of log {log_id} failed: {str(e)}")
+        raise HTTPException(status_code=502, detail="Parser service unavailable")
+    
+    if response.status_code != 200:
+        try:
+            error_detail = response.json().get("detail", "Unknown parser error")
+        except ValueError:
+            error_detail = response.text
+        logger.error(error_detail)
+        raise HTTPException(status_code=response.status_code, detail=error_detail)
+    
+    return {"log_id": log.id, **response.json()}
+
 # ==================== KPI VALUES ====================
 
 @router.get("/kpi-values")
@@ -3,12 +3,16 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from ..core.config import settings
 import logging
+import os
 import time
 from sqlalchemy.exc import OperationalError
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Holds the [dashboard] section, which points at the migrations of this database (alembic_dashboard/)
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "..", "..", "alembic.ini")
+
 SQLALCHEMY_DATABASE_URL = f"postgresql://{settings.DASHBOARD_POSTGRES_USER}:{settings.DASHBOARD_POSTGRES_PASSWORD}@{settings.DASHBOARD_POSTGRES_HOST}:{settings.DASHBOARD_POSTGRES_PORT}/{settings.DASHBOARD_POSTGRES_DB}"
 
 def wait_for_db(max_retries=30, retry_interval=2):
@@ -32,6 +36,17 @@ engine = wait_for_db()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+def upgrade_schema():
+    """
+    Run the dashboard migrations up to the latest one.
+
+    create_all only creates missing tables; the columns, types and
+    constraints added to existing tables come from the migrations.
+    """
+    from alembic import command
+    from alembic.config import Config
+    command.upgrade(Config(ALEMBIC_INI, ini_section="dashboard"), "head")
+
 def get_db():
     db = SessionLocal()
     try:
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Float, Integer, String, ForeignKey, DateTime
+from sqlalchemy import BigInteger, Column, Float, Integer, String, ForeignKey, DateTime, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -52,6 +52,11 @@ class Tool(Base):
     
 class File(Base):
     __tablename__ = "files"
+    __table_args__ = (
+        # Finds an already processed upload of the same report with the same tool
+        Index("ix_files_md5_tool", "md5_hash", "tool_id"),
+        UniqueConstraint("uploaded_by", "idempotency_key", name="uq_files_user_idempotency_key"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, nullable=False)
@@ -59,13 +64,128 @@ class File(Base):
     file_type = Column(String, nullable=False)
     uploaded_by = Column(Integer, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    size = Column(Integer, nullable=False)
+    size = Column(BigInteger, nullable=False)
     status = Column(String, nullable=False, default="pending")  # pending, processed, failed
     md5_hash = Column(String, nullable=False)
+    # Report items left out by the tool's ingest filters
+    findings_dropped = Column(Integer, nullable=True)
+    # Parsed findings the database refused to store (skipped, the rest of the file is kept)
+    findings_rejected = Column(Integer, nullable=True)
+    # Progress of the parse, committed with each chunk of findings while the file is pending
+    hosts_processed = Column(Integer, nullable=True)
+    findings_processed = Column(Integer, nullable=True)
+    # Tool the report was parsed with (unknown for files uploaded before it was recorded)
+    tool_id = Column(Integer, ForeignKey("tools.id"), nullable=True)
+    # Set on re-uploads of a processed report: its findings are the logs of that file
+    source_file_id = Column(Integer, ForeignKey("files.id"), nullable=True, index=True)
+    # Client-chosen key; retrying an upload with the same key returns the same file
+    idempotency_key = Column(String, nullable=True)
+    # Set on files uploaded together through the batch endpoint
+    batch_id = Column(Integer, ForeignKey("upload_batches.id"), nullable=True, index=True)
 
     # Relationships
     logs = relationship("Log", back_populates="file")
 
+class UploadBatch(Base):
+    """Reports uploaded together (e.g. a night of per-segment scans), parsed at most max_parallel at a time"""
+    __tablename__ = "upload_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tool_id = Column(Integer, ForeignKey("tools.id"), nullable=False)
+    uploaded_by = Column(Integer, nullable=False)
+    # Jobs of the batch the parser workers run at the same time
+    max_parallel = Column(Integer, nullable=False)
+    # JSON list of {"filename", "detail"} for the uploads that could not be stored
+    rejected = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ParseJob(Base):
+    """
+    A report waiting to be parsed, or being parsed, by a parser worker.
+
+    Workers claim queued jobs with SELECT ... FOR UPDATE SKIP LOCKED and keep
+    heartbeat_at fresh while they run; a running job whose heartbeats stop
+    is requeued (see parser_backend/jobs.py).
+    """
+    __tablename__ = "parse_jobs"
+    __table_args__ = (Index("ix_parse_jobs_queue", "status", "priority", "id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    file_id = Column(Integer, ForeignKey("files.id"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="queued")  # queued, running, done, failed, cancelled
+    # Higher first, then oldest first
+    priority = Column(Integer, nullable=False, default=0)
+    # Jobs of a batch are only claimed while fewer than its max_parallel are running
+    batch_id = Column(Integer, ForeignKey("upload_batches.id"), nullable=True, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    # Not claimed before this time (retry backoff)
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Worker running the job, as host:pid
+    locked_by = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+class UploadSession(Base):
+    """
+    A chunked upload: created by the client, which then PUTs its parts (in any
+    order, in parallel, again after a dropped connection) and completes it
+    into a file once all are received (see storage.ReportAssembler).
+    """
+    __tablename__ = "upload_sessions"
+
+    id = Column(String, primary_key=True)  # Random, the upload's URL
+    filename = Column(String, nullable=False)
+    file_type = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    part_size = Column(Integer, nullable=False)
+    tool_id = Column(Integer, ForeignKey("tools.id"), nullable=False)
+    uploaded_by = Column(Integer, nullable=False)
+    idempotency_key = Column(String, nullable=True)
+    status = Column(String, nullable=False, default="receiving")  # receiving, completed
+    # File created by completing the upload, returned again if completing is retried
+    file_id = Column(Integer, ForeignKey("files.id"), nullable=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    parts = relationship("UploadPart", cascade="all, delete-orphan", passive_deletes=True)
+
+class UploadPart(Base):
+    """A part received for a chunked upload"""
+    __tablename__ = "upload_parts"
+
+    upload_id = Column(String, ForeignKey("upload_sessions.id", ondelete="CASCADE"), primary_key=True)
+    part_index = Column(Integer, primary_key=True)
+
+class StoredBlob(Base):
+    """A stored report, shared by every file record with the same content"""
+    __tablename__ = "stored_blobs"
+
+    file_path = Column(String, primary_key=True)
+    md5_hash = Column(String, nullable=False)
+    # File records pointing at it; the report is deleted from storage when the last one goes
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class Plugin(Base):
+    __tablename__ = "plugins"
+    __table_args__ = (UniqueConstraint("tool_id", "plugin_id", name="uq_plugins_tool_plugin"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    tool_id = Column(Integer, ForeignKey("tools.id"), nullable=False)
+    plugin_id = Column(String, nullable=False)  # Tool-specific plugin/check identifier
+    name = Column(String, nullable=True)
+    family = Column(String, nullable=True)
+    description = Column(String, nullable=True)
+    solution = Column(String, nullable=True)
+    cvss_base_score = Column(Float, nullable=True)
+    exploitable = Column(Boolean, nullable=False, default=False)
+    metasploit_available = Column(Boolean, nullable=False, default=False)
+    metasploit_name = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
 class Log(Base):
     __tablename__ = "logs"
 
@@ -75,8 +195,15 @@ class Log(Base):
     status = Column(String, nullable=False)  # success, failed
     message = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    raw_data = Column(String, nullable=True)  # Store raw data from the tool
-    parsed_data = Column(String, nullable=True)  # Store JSON results
+    raw_data = Column(String, nullable=True)  # Store host-specific raw data from the tool (only when source_offset is unknown)
+    # Byte ranges of the finding and of its host in the decompressed report of the file;
+    # the raw finding is re-parsed from there instead of being copied into raw_data
+    source_offset = Column(BigInteger, nullable=True)
+    source_length = Column(Integer, nullable=True)
+    host_offset = Column(BigInteger, nullable=True)
+    host_length = Column(Integer, nullable=True)
+    plugin_id = Column(String, nullable=True, index=True)  # References Plugin.plugin_id for the same tool
+    parsed_data = Column(String, nullable=True)  # Store JSON results (only when source_offset is unknown)
     event_time = Column(DateTime(timezone=True), nullable=True)
     action = Column(String, nullable=True)
     attack_type = Column(String, nullable=True)
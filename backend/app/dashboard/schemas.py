@@ -1,6 +1,7 @@
 from pydantic import BaseModel, field_validator
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
+import json
 
 # ==================== KPI SCHEMAS ====================
 
@@ -74,7 +75,28 @@ class ToolBase(BaseModel):
         return v
 
 class ToolCreate(ToolBase):
-    pass
+    # Only checked when a tool is saved: tools stored before may hold free text,
+    # which the parser service rejects when a report is parsed
+    @field_validator('configuration')
+    def validate_configuration(cls, v):
+        if v:
+            try:
+                configuration = json.loads(v)  # Ensure it's valid JSON
+            except json.JSONDecodeError:
+                raise ValueError('Configuration must be valid JSON')
+            # Ingest filters and the field mapping are applied by the parser service, which validates them in full
+            ingest_filters = configuration.get('ingest_filters') if isinstance(configuration, dict) else None
+            if ingest_filters is not None:
+                allowed_filters = {'min_severity', 'plugin_allow', 'plugin_deny', 'exclude_families'}
+                if not isinstance(ingest_filters, dict) or set(ingest_filters) - allowed_filters:
+                    raise ValueError(f'ingest_filters must be an object with keys: {", ".join(sorted(allowed_filters))}')
+            field_mapping = configuration.get('field_mapping') if isinstance(configuration, dict) else None
+            if field_mapping is not None:
+                if not isinstance(field_mapping, dict) or not all(
+                    rule is None or isinstance(rule, (str, dict)) for rule in field_mapping.values()
+                ):
+                    raise ValueError('field_mapping must map normalized fields to a raw key, an object or null')
+        return v
 
 class Tool(ToolBase):
     id: int
@@ -102,10 +124,74 @@ class FileResponse(FileBase):
     size: int
     status: str
     md5_hash: str
+    findings_dropped: Optional[int] = None
+    findings_rejected: Optional[int] = None
+    hosts_processed: Optional[int] = None
+    findings_processed: Optional[int] = None
+    tool_id: Optional[int] = None
+    # Set when the report was already processed and its findings are reused
+    source_file_id: Optional[int] = None
 
     class Config:
         from_attributes = True
 
+class UploadSessionCreate(BaseModel):
+    filename: str
+    # Of the whole upload, in bytes
+    size: int
+    tool_id: int
+    file_type: str = "application/octet-stream"
+
+    @field_validator('size')
+    def validate_size(cls, v):
+        if v <= 0:
+            raise ValueError('size must be positive')
+        return v
+
+class UploadSessionResponse(BaseModel):
+    id: str
+    filename: str
+    size: int
+    # Part n covers bytes [n * part_size, (n + 1) * part_size) of the upload
+    part_size: int
+    part_count: int
+    received_parts: List[int] = []
+    status: str
+    file_id: Optional[int] = None
+
+class UploadBatchRejectedFile(BaseModel):
+    filename: str
+    detail: str
+
+class UploadBatchResponse(BaseModel):
+    id: int
+    tool_id: int
+    created_at: datetime
+    max_parallel: int
+    # Number of files by status (pending, processed, failed)
+    status_counts: Dict[str, int] = {}
+    files: List[FileResponse] = []
+    # Uploads (or archive members) that were not stored, with the reason
+    rejected: List[UploadBatchRejectedFile] = []
+
+class ParsedFindingPreview(BaseModel):
+    raw_finding: Dict[str, Any]
+    normalized_finding: Dict[str, Any]
+
+class FilePreviewResponse(BaseModel):
+    filename: str
+    # False when only the start of the report was parsed
+    complete: bool
+    estimated_total_findings: Optional[int] = None
+    sampled_findings: int
+    sampled_hosts: int
+    bytes_read: int
+    total_bytes: Optional[int] = None
+    severity_histogram: Dict[str, int] = {}
+    dropped: int = 0
+    samples: List[ParsedFindingPreview] = []
+    plugins: Dict[str, Dict[str, Any]] = {}
+
 # ==================== LOG SCHEMAS ====================
 
 class LogBase(BaseModel):
@@ -122,6 +208,34 @@ class LogResponse(LogBase):
     id: int
     created_at: datetime
     parsed_data: Optional[str] = None
+    plugin_id: Optional[str] = None
+    source_offset: Optional[int] = None
+    source_length: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+class LogRawResponse(BaseModel):
+    log_id: int
+    # The finding as it appears in the report, when it was located there
+    raw_xml: Optional[str] = None
+    raw_finding: Dict[str, Any]
+    normalized_finding: Dict[str, Any]
+
+# ==================== PLUGIN SCHEMAS ====================
+
+class PluginResponse(BaseModel):
+    id: int
+    tool_id: int
+    plugin_id: str
+    name: Optional[str] = None
+    family: Optional[str] = None
+    description: Optional[str] = None
+    solution: Optional[str] = None
+    cvss_base_score: Optional[float] = None
+    exploitable: bool = False
+    metasploit_available: bool = False
+    metasploit_name: Optional[str] = None
 
     class Config:
         from_attributes = True
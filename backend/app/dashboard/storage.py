@@ -0,0 +1,610 @@
+# backend/app/dashboard/storage.py
+"""Content-addressed, compressed-at-rest storage of uploaded reports"""
+import glob
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from typing import BinaryIO, Container, Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException
+
+UPLOAD_DIR = "uploads"
+
+# Upload formats kept as they are, with the magic bytes they must start with
+STREAM_COMPRESSIONS = {
+    ".gz": b"\x1f\x8b",
+    ".zst": b"\x28\xb5\x2f\xfd",
+}
+ZIP_MAGIC = b"PK\x03\x04"
+
+GZIP_LEVEL = 6
+# Reports are gzip-compressed in independent blocks of this size, so that a
+# byte range can be read back without decompressing everything before it
+GZIP_BLOCK_BYTES = 1024 * 1024
+# Sidecar holding the block index (read by the parser service's ReportSource)
+GZIP_INDEX_SUFFIX = ".idx"
+
+# Uploads are read, hashed and written in chunks of this size
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Parts of a chunked upload (the last one may be shorter). A multiple of GZIP_BLOCK_BYTES,
+# so that compressing the parts one after the other gives the blocks save_report would
+UPLOAD_PART_BYTES = 8 * GZIP_BLOCK_BYTES
+
+STORED_FILE_MODE = 0o644
+
+# Zip archives are decompressed here. A report in one may not decompress past
+# MAX_REPORT_BYTES, nor to more than MAX_COMPRESSION_RATIO times its compressed
+# size (zip bombs); reports up to ZIP_RATIO_FLOOR_BYTES are not held to the ratio
+MAX_REPORT_BYTES = int(os.getenv("MAX_REPORT_BYTES", 16 * 1024 ** 3))
+MAX_COMPRESSION_RATIO = int(os.getenv("MAX_COMPRESSION_RATIO", 200))
+ZIP_RATIO_FLOOR_BYTES = UPLOAD_CHUNK_BYTES
+
+# At most this much of an upload is sent to the parser for a preview (which stops
+# after PREVIEW_MAX_BYTES of decompressed report on its own)
+PREVIEW_PREFIX_BYTES = 16 * 1024 * 1024
+
+
+class StoredReport(NamedTuple):
+    file_path: str
+    # Of the upload as it was received
+    md5_hash: str
+    size: int
+
+
+class ReportPrefix(NamedTuple):
+    # Temporary file holding the start of the report, deleted when it is closed
+    file: BinaryIO
+    filename: str
+    # Of the whole report the prefix was cut from
+    size: int
+
+
+def split_compression(filename: str) -> Tuple[str, str]:
+    """Split 'scan.nessus.gz' into ('.nessus', '.gz'); uncompressed names give ('.nessus', '')"""
+    name = filename.lower()
+    for compression in (*STREAM_COMPRESSIONS, ".zip"):
+        if name.endswith(compression):
+            return os.path.splitext(filename[:-len(compression)])[1], compression
+    return os.path.splitext(filename)[1], ""
+
+
+class _GzipBlockWriter:
+    """
+    Writes gzip-compressed blocks of up to GZIP_BLOCK_BYTES, each as its own gzip member.
+
+    Concatenated members are still one valid gzip file; index() tells where
+    each block starts, in the report and in the compressed file.
+    """
+
+    def __init__(self, destination: BinaryIO):
+        self._destination = destination
+        self.size = 0
+        self.blocks = []
+
+    def write_block(self, block: bytes) -> None:
+        self.blocks.append([self.size, self._destination.tell()])
+        with gzip.GzipFile(fileobj=self._destination, mode="wb", compresslevel=GZIP_LEVEL, mtime=0) as compressed:
+            compressed.write(block)
+        self.size += len(block)
+
+    def index(self) -> dict:
+        """The block index: {"size": decompressed size, "blocks": [[offset, compressed offset], ...]}"""
+        return {"size": self.size, "blocks": self.blocks}
+
+
+def _gzip_stream(source: BinaryIO, destination: BinaryIO) -> dict:
+    """
+    Compress a binary stream into block gzip (see _GzipBlockWriter) without holding it in memory.
+
+    Returns:
+        The block index
+    """
+    writer = _GzipBlockWriter(destination)
+    while True:
+        block = source.read(GZIP_BLOCK_BYTES)
+        if not block and writer.blocks:
+            break
+        writer.write_block(block)
+        if not block:
+            break
+    return writer.index()
+
+
+class _HashingReader:
+    """Binary stream wrapper hashing (md5) and counting the bytes read through it"""
+
+    def __init__(self, source: BinaryIO):
+        self._source = source
+        self.md5 = hashlib.md5()
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._source.read(size)
+        self.md5.update(data)
+        self.size += len(data)
+        return data
+
+    def drain(self) -> None:
+        """Read (and hash) the rest of the stream"""
+        while self.read(UPLOAD_CHUNK_BYTES):
+            pass
+
+
+def _copy_stream(source: BinaryIO, destination: BinaryIO) -> None:
+    while True:
+        chunk = source.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        destination.write(chunk)
+
+
+def _copy_prefix(source: BinaryIO, destination: BinaryIO, max_bytes: int) -> None:
+    while max_bytes > 0:
+        chunk = source.read(min(max_bytes, UPLOAD_CHUNK_BYTES))
+        if not chunk:
+            break
+        destination.write(chunk)
+        max_bytes -= len(chunk)
+
+
+def _temporary_file(suffix: str = "", prefix: str = ".upload-") -> BinaryIO:
+    """
+    Temporary file in the upload directory, so that it can be renamed into place atomically.
+
+    Dot-prefixed names are never served (see stored_report_path).
+    """
+    return tempfile.NamedTemporaryFile(dir=UPLOAD_DIR, prefix=prefix, suffix=suffix, delete=False)
+
+
+def _publish(temporary_path: str, file_path: str) -> None:
+    """Atomically move a finished temporary file to its final name"""
+    # Temporary files are private to their owner; stored reports are read by the parser service
+    os.chmod(temporary_path, STORED_FILE_MODE)
+    os.replace(temporary_path, file_path)
+
+
+def _publish_report(report_path: str, index_path: Optional[str], file_path: str) -> None:
+    """Move a finished report, and its block index if it has one, to its content address"""
+    # The index goes first: a report without its index is still readable
+    if index_path is not None:
+        _publish(index_path, file_path + GZIP_INDEX_SUFFIX)
+    _publish(report_path, file_path)
+
+
+def _single_zip_member(archive: zipfile.ZipFile, filename: str) -> zipfile.ZipInfo:
+    members = [member for member in archive.infolist() if not member.is_dir()]
+    if len(members) != 1:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Archive '{filename}' must contain exactly one report, found {len(members)} files"
+        )
+    return members[0]
+
+
+class _ZipMemberReader:
+    """
+    Decompressed stream of a zip member, rejecting it once it grows past its limits.
+
+    The sizes the archive declares are checked up front, and the bytes
+    actually decompressed as they are read, since the declared ones can lie.
+    """
+
+    def __init__(self, archive: zipfile.ZipFile, member: zipfile.ZipInfo, filename: str):
+        self._filename = filename
+        self._limit = min(MAX_REPORT_BYTES, max(member.compress_size * MAX_COMPRESSION_RATIO, ZIP_RATIO_FLOOR_BYTES))
+        self._check(member.file_size)
+        self._member = archive.open(member)
+        self.size = 0
+
+    def _check(self, size: int) -> None:
+        if size > self._limit:
+            raise HTTPException(
+                status_code=400,
+                detail=f"The report in '{self._filename}' decompresses past the allowed size "
+                       f"({MAX_REPORT_BYTES} bytes, or {MAX_COMPRESSION_RATIO} times its compressed size)"
+            )
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._member.read(size)
+        self.size += len(data)
+        self._check(self.size)
+        return data
+
+    def __enter__(self) -> "_ZipMemberReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._member.close()
+
+
+def _gzip_zip_member(source: BinaryIO, filename: str, destination: BinaryIO) -> Tuple[dict, str]:
+    """
+    Compress the single report of a zip archive into block gzip.
+
+    Returns:
+        The block index, and the extension the report is stored with
+    """
+    try:
+        with zipfile.ZipFile(source) as archive:
+            member = _single_zip_member(archive, filename)
+            with _ZipMemberReader(archive, member, filename) as report:
+                index = _gzip_stream(report, destination)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail=f"File '{filename}' is not a valid zip archive")
+    return index, f"{os.path.splitext(member.filename)[1]}.gz"
+
+
+def _write_index(index: dict, prefix: str = ".upload-") -> str:
+    """Write a block index to a temporary file, returning its path"""
+    with _temporary_file(GZIP_INDEX_SUFFIX, prefix) as index_file:
+        index_file.write(json.dumps(index).encode("utf-8"))
+    return index_file.name
+
+
+def save_report(source: BinaryIO, filename: str) -> StoredReport:
+    """
+    Store an uploaded report under its content hash, compressed at rest.
+
+    The upload is read in chunks of UPLOAD_CHUNK_BYTES and hashed as it is
+    written to a temporary file, which is then renamed to its content
+    address, so memory use does not depend on the size of the report and a
+    report is never visible half-written. Blocking: run it in a worker thread.
+
+    gzip and zstd uploads are stored as they are. Zip archives are stream
+    formats only on the outside, so their single report is re-compressed as
+    gzip. Uncompressed reports are gzip-compressed while they are written.
+    Reports compressed here are block-compressed with an index (see
+    _gzip_stream), so single findings can be re-read cheaply.
+
+    Returns:
+        The stored report: its path, and the md5 hash and size of the upload
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    report_ext, compression = split_compression(filename)
+    upload = _HashingReader(source)
+    report_file = _temporary_file()
+    index_path = None
+    try:
+        with report_file:
+            if compression in STREAM_COMPRESSIONS:
+                head = upload.read(UPLOAD_CHUNK_BYTES)
+                if not head.startswith(STREAM_COMPRESSIONS[compression]):
+                    raise HTTPException(status_code=400, detail=f"File '{filename}' is not a valid {compression} archive")
+                report_file.write(head)
+                _copy_stream(upload, report_file)
+                stored_ext = f"{report_ext}{compression}"
+            elif compression == ".zip":
+                # zipfile seeks around the archive, so the upload is hashed in a first pass
+                if not upload.read(len(ZIP_MAGIC)).startswith(ZIP_MAGIC):
+                    raise HTTPException(status_code=400, detail=f"File '{filename}' is not a valid zip archive")
+                upload.drain()
+                source.seek(0)
+                index, stored_ext = _gzip_zip_member(source, filename, report_file)
+            else:
+                index = _gzip_stream(upload, report_file)
+                stored_ext = f"{report_ext}.gz"
+
+        if compression not in STREAM_COMPRESSIONS:
+            index_path = _write_index(index)
+
+        file_hash = upload.md5.hexdigest()
+        file_path = os.path.join(UPLOAD_DIR, f"{file_hash}{stored_ext}")
+        _publish_report(report_file.name, index_path, file_path)
+    except BaseException:
+        for leftover in (report_file.name, index_path):
+            if leftover is not None and os.path.exists(leftover):
+                os.unlink(leftover)
+        raise
+    return StoredReport(file_path=file_path, md5_hash=file_hash, size=upload.size)
+
+
+def hash_upload(source: BinaryIO) -> Tuple[str, int]:
+    """md5 hash and size of an upload, read in chunks; the stream is left at its start"""
+    upload = _HashingReader(source)
+    upload.drain()
+    source.seek(0)
+    return upload.md5.hexdigest(), upload.size
+
+
+def stored_copy(file_hash: str, filename: str) -> Optional[str]:
+    """Path of the report stored for an upload with this hash and name, if it is stored already"""
+    report_ext, compression = split_compression(filename)
+    if compression == ".zip":
+        # Named after the archive's member, which is only known once the archive is read
+        candidates = glob.glob(os.path.join(UPLOAD_DIR, glob.escape(file_hash) + "*.gz"))
+        return candidates[0] if candidates else None
+    stored_compression = compression if compression in STREAM_COMPRESSIONS else ".gz"
+    file_path = os.path.join(UPLOAD_DIR, f"{file_hash}{report_ext}{stored_compression}")
+    return file_path if os.path.isfile(file_path) else None
+
+
+def archive_reports(source: BinaryIO, filename: str) -> Optional[List[str]]:
+    """
+    Names of the reports in a zip archive holding several of them (a batch).
+
+    Returns None for any other upload, which is stored as one report (an
+    invalid archive is then rejected by save_report). The stream is left at its start.
+    """
+    if split_compression(filename)[1] != ".zip":
+        return None
+    try:
+        with zipfile.ZipFile(source) as archive:
+            names = [
+                member.filename for member in archive.infolist()
+                if not member.is_dir() and not member.filename.startswith("__MACOSX/")
+                and not os.path.basename(member.filename).startswith(".")
+            ]
+    except zipfile.BadZipFile:
+        return None
+    finally:
+        source.seek(0)
+    return names if len(names) > 1 else None
+
+
+def extract_report(source: BinaryIO, name: str) -> BinaryIO:
+    """A report of a zip archive, copied to a temporary file (in memory while it is small)"""
+    report = tempfile.SpooledTemporaryFile(max_size=UPLOAD_PART_BYTES)
+    try:
+        with zipfile.ZipFile(source) as archive, \
+                _ZipMemberReader(archive, archive.getinfo(name), os.path.basename(name)) as member:
+            _copy_stream(member, report)
+    except zipfile.BadZipFile as e:
+        report.close()
+        raise HTTPException(status_code=400, detail=f"Report '{name}' of the archive cannot be read: {str(e)}")
+    except BaseException:
+        report.close()
+        raise
+    finally:
+        source.seek(0)
+    report.seek(0)
+    return report
+
+
+def report_prefix(source: BinaryIO, filename: str, max_bytes: int = PREVIEW_PREFIX_BYTES) -> ReportPrefix:
+    """
+    Copy the start of an upload to a temporary file, for a preview; nothing is stored.
+
+    gzip, zstd and uncompressed uploads are cut as they are, and the parser
+    decompresses what the prefix holds. Zip archives list their members at
+    their end, so the prefix is cut from their single report, decompressed.
+    Blocking: run it in a worker thread. The caller closes the prefix file.
+    """
+    compression = split_compression(filename)[1]
+    prefix = tempfile.SpooledTemporaryFile(max_size=UPLOAD_PART_BYTES)
+    try:
+        if compression == ".zip":
+            try:
+                with zipfile.ZipFile(source) as archive:
+                    member = _single_zip_member(archive, filename)
+                    with _ZipMemberReader(archive, member, filename) as report:
+                        _copy_prefix(report, prefix, max_bytes)
+            except zipfile.BadZipFile:
+                raise HTTPException(status_code=400, detail=f"File '{filename}' is not a valid zip archive")
+            prefix_name, size = os.path.basename(member.filename), member.file_size
+        else:
+            source.seek(0, os.SEEK_END)
+            size = source.tell()
+            source.seek(0)
+            _copy_prefix(source, prefix, max_bytes)
+            prefix_name = filename
+        prefix.seek(0)
+        if compression in STREAM_COMPRESSIONS and not prefix.read(4).startswith(STREAM_COMPRESSIONS[compression]):
+            raise HTTPException(status_code=400, detail=f"File '{filename}' is not a valid {compression} archive")
+    except BaseException:
+        prefix.close()
+        raise
+    finally:
+        source.seek(0)
+    prefix.seek(0)
+    return ReportPrefix(file=prefix, filename=prefix_name, size=size)
+
+
+def delete_report(file_path: str) -> None:
+    """Remove a stored report and its block index, if they are still there"""
+    for path in (file_path, file_path + GZIP_INDEX_SUFFIX):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def stored_report_path(name: str) -> str:
+    """Path of a stored report (or of its block index) from its file name, for serving it"""
+    file_path = os.path.join(UPLOAD_DIR, name)
+    if os.path.basename(name) != name or name.startswith(".") or not os.path.isfile(file_path):
+        raise HTTPException(status_code=404, detail="Report not found")
+    return file_path
+
+
+def _part_file_path(upload_id: str) -> str:
+    """File receiving the parts of a chunked upload, each written at its offset in the upload"""
+    return os.path.join(UPLOAD_DIR, f".upload-{upload_id}.parts")
+
+
+def create_part_file(upload_id: str, size: int) -> None:
+    """Create the (sparse) part file of a chunked upload of size bytes"""
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    with open(_part_file_path(upload_id), "wb") as part_file:
+        part_file.truncate(size)
+
+
+def write_part(upload_id: str, offset: int, data: bytes) -> None:
+    """Write a part of a chunked upload at its offset; other parts may be written at the same time"""
+    # Each writer has its own handle, hence its own position in the file
+    with open(_part_file_path(upload_id), "r+b") as part_file:
+        part_file.seek(offset)
+        part_file.write(data)
+
+
+class ReportAssembler:
+    """
+    Hashes and stores a chunked upload while its parts arrive.
+
+    Parts are received in any order and written at their offset in the part
+    file. The assembler moves forward over the parts received from the start
+    of the upload: each is hashed and, for reports compressed at rest here,
+    compressed into the stored report. A part received in order is taken
+    from memory; parts that came early are read back when their turn comes.
+    Once the last part is in, the report only has to be renamed to its
+    content address (finish, then publish). Zip archives are only hashed on
+    the way: their report is extracted at finish.
+    """
+
+    def __init__(self, upload_id: str, filename: str, part_size: int):
+        self.upload_id = upload_id
+        self.filename = filename
+        self.part_size = part_size
+        # First part not taken in yet
+        self.next_part = 0
+        self._md5 = hashlib.md5()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._report_ext, self._compression = split_compression(filename)
+        self._prefix = f".upload-{upload_id}-"
+        self._report_file = None
+        self._writer = None
+        if self._compression not in STREAM_COMPRESSIONS and self._compression != ".zip":
+            self._report_file = _temporary_file(prefix=self._prefix)
+            self._writer = _GzipBlockWriter(self._report_file)
+        # Set by finish: the stored report, and the temporary files publish moves into place
+        self._stored: Optional[StoredReport] = None
+        self._finished_files: Optional[Tuple[str, Optional[str]]] = None
+
+    def advance(self, received: Container[int], part_index: Optional[int] = None, data: Optional[bytes] = None) -> None:
+        """
+        Take in the received parts from next_part on. Blocking.
+
+        data is the content of part part_index, when the caller has it at hand.
+
+        Raises:
+            HTTPException: If the upload does not start like its compression format says
+        """
+        with self._lock:
+            while self.next_part in received:
+                part = data if self.next_part == part_index else self._read_part(self.next_part)
+                self._take(part)
+                self.next_part += 1
+
+    def taken_in(self, part_index: int, data: bytes) -> bool:
+        """
+        Whether a part sent again was taken in already. Blocking.
+
+        A part taken in is in the hash (and the stored report) for good, so
+        it may only be sent again with the same bytes, which changes nothing.
+
+        Raises:
+            HTTPException: If the part was taken in with other bytes
+        """
+        with self._lock:
+            if part_index >= self.next_part:
+                return False
+            if self._read_part(part_index) != data:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Part {part_index} was received already with other content; start a new upload to change it"
+                )
+            return True
+
+    def _read_part(self, index: int) -> bytes:
+        with open(_part_file_path(self.upload_id), "rb") as part_file:
+            part_file.seek(index * self.part_size)
+            return part_file.read(self.part_size)
+
+    def _take(self, part: bytes) -> None:
+        if self.next_part == 0 and self._compression:
+            magic = STREAM_COMPRESSIONS.get(self._compression, ZIP_MAGIC)
+            if not part.startswith(magic):
+                archive = "zip" if self._compression == ".zip" else self._compression
+                raise HTTPException(status_code=400, detail=f"File '{self.filename}' is not a valid {archive} archive")
+        self._md5.update(part)
+        self._size += len(part)
+        if self._writer is not None:
+            view = memoryview(part)
+            for start in range(0, len(view), GZIP_BLOCK_BYTES):
+                self._writer.write_block(view[start:start + GZIP_BLOCK_BYTES])
+
+    def finish(self, part_count: int) -> StoredReport:
+        """
+        Complete the stored report once all part_count parts are received. Blocking.
+
+        Parts not taken in yet (after a restart of the service, all of them)
+        are read back first. The report is not visible until publish.
+        """
+        self.advance(range(part_count))
+        with self._lock:
+            if self._stored is not None:
+                return self._stored
+            file_hash = self._md5.hexdigest()
+            if self._writer is not None:
+                self._report_file.close()
+                report_path = self._report_file.name
+                index_path = _write_index(self._writer.index(), self._prefix)
+                stored_ext = f"{self._report_ext}.gz"
+            elif self._compression == ".zip":
+                with open(_part_file_path(self.upload_id), "rb") as archive_source, \
+                        _temporary_file(prefix=self._prefix) as report_file:
+                    try:
+                        index, stored_ext = _gzip_zip_member(archive_source, self.filename, report_file)
+                    except BaseException:
+                        os.unlink(report_file.name)
+                        raise
+                report_path = report_file.name
+                index_path = _write_index(index, self._prefix)
+            else:
+                # Stored as it was uploaded: the part file is the report
+                report_path = _part_file_path(self.upload_id)
+                index_path = None
+                stored_ext = f"{self._report_ext}{self._compression}"
+            self._finished_files = (report_path, index_path)
+            self._stored = StoredReport(
+                file_path=os.path.join(UPLOAD_DIR, f"{file_hash}{stored_ext}"), md5_hash=file_hash, size=self._size
+            )
+            return self._stored
+
+    def publish(self) -> None:
+        """Move the finished report to its content address (once)"""
+        with self._lock:
+            if self._finished_files is not None:
+                _publish_report(*self._finished_files, self._stored.file_path)
+                self._finished_files = None
+
+    def close(self) -> None:
+        if self._report_file is not None:
+            self._report_file.close()
+
+
+# Assemblers of the chunked uploads in progress, by upload ID. An upload whose assembler
+# is gone (the service restarted) gets a new one, which reads back the parts received so far.
+# This assumes the dashboard runs as a single process (one uvicorn worker, as in the
+# Dockerfile): with several, each would hash the parts it sees on its own, and a part
+# re-sent to another worker than the one that took it in would not be checked (see
+# ReportAssembler.taken_in). Running more workers needs the hash progress kept with
+# the upload session instead.
+_assemblers: Dict[str, ReportAssembler] = {}
+_assemblers_lock = threading.Lock()
+
+
+def upload_assembler(upload_id: str, filename: str, part_size: int) -> ReportAssembler:
+    with _assemblers_lock:
+        assembler = _assemblers.get(upload_id)
+        if assembler is None:
+            assembler = _assemblers[upload_id] = ReportAssembler(upload_id, filename, part_size)
+        return assembler
+
+
+def discard_upload(upload_id: str) -> None:
+    """Forget a chunked upload and remove its temporary files (published reports stay)"""
+    with _assemblers_lock:
+        assembler = _assemblers.pop(upload_id, None)
+    if assembler is not None:
+        assembler.close()
+    for path in glob.glob(os.path.join(UPLOAD_DIR, glob.escape(f".upload-{upload_id}") + "*")):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
@@ -12,7 +12,7 @@ from .auth import security
 from .core.config import settings
 from .core.security_headers import add_security_headers
 
-from app.dashboard.database import engine as dashboard_engine
+from app.dashboard.database import engine as dashboard_engine, upgrade_schema as upgrade_dashboard_schema
 from app.dashboard import models as dashboard_models
 from app.auth.database import engine as auth_engine
 from app.auth import models as auth_models
@@ -28,6 +28,8 @@ async def lifespan(_: FastAPI):
     
     print("Creating database tables...")
     auth_models.Base.metadata.create_all(bind=auth_engine)
+    # Existing dashboard tables are migrated first; create_all does not alter them
+    upgrade_dashboard_schema()
     dashboard_models.Base.metadata.create_all(bind=dashboard_engine)
     
     print("Seeding initial data...")
@@ -23,6 +23,14 @@ class KPI(Base):
     formula = Column(String, nullable=True)
     data_source = Column(String, nullable=True)
 
+class Tool(Base):
+    __tablename__ = "tools"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, index=True)
+    type = Column(String, nullable=False)
+    category = Column(String, nullable=False)
+
 class KPIValue(Base):
     __tablename__ = "kpi_values"
     
@@ -42,6 +50,7 @@ class Log(Base):
     cvss_base_score = Column(Float, nullable=True)
     vulnerability_name = Column(String, nullable=True)
     ip_source = Column(String, nullable=True)
+    policy = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 def get_db():
@@ -1,12 +1,15 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, status
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
+import asyncio
 import logging
+import os
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 from sqlalchemy.orm import Session
 from core.logging import setup_logger
-from core.database import get_db
-from core.database import KPI, KPIValue, Log
+from core.database import get_db, SessionLocal
+from core.database import KPI, KPIValue, Log, Tool
 
 # Set up logging
 logger = setup_logger(__name__, level=logging.INFO)
@@ -16,6 +19,11 @@ app = FastAPI(title="KPI Calculator Service", version="1.0.0")
 # Dashboard service URL
 DASHBOARD_SERVICE_URL = "http://backend:8000"
 
+# Recalculations triggered for a tool within this delay of each other run once
+RECALCULATION_DEBOUNCE_SECONDS = float(os.getenv("RECALCULATION_DEBOUNCE_SECONDS", 30))
+# A tool whose files keep arriving is still recalculated at least this often
+RECALCULATION_MAX_DELAY_SECONDS = float(os.getenv("RECALCULATION_MAX_DELAY_SECONDS", 300))
+
 # Pydantic models
 class CalculationRequest(BaseModel):
     file_id: int
@@ -30,6 +38,29 @@ class CalculationResponse(BaseModel):
     calculated_kpis: List[Dict[str, Any]]
     message: str
 
+class RecalculationRequest(BaseModel):
+    # The file that finished processing, and its tool
+    file_id: int
+    tool_id: int
+
+def kpi_matches_tool(kpi: KPI, tool: Tool) -> bool:
+    """
+    Whether a KPI is calculated from the data of a tool.
+    
+    One of the KPI's data sources (comma-separated) must name the tool's
+    type or category: 'Vulnerability Scanner' KPIs for Nessus, 'Firewall logs'
+    ones for a firewall. A KPI without data_source matches when its type is
+    a word of the tool's type ('Vulnerability' for a vulnerability scanner).
+    """
+    tool_names = [name.strip().lower() for name in (tool.type, tool.category) if name]
+    if kpi.data_source:
+        sources = [source.strip().lower() for source in kpi.data_source.split(",")]
+        return any(
+            source == name or source.startswith(name + " ")
+            for source in sources for name in tool_names
+        )
+    return bool(kpi.type) and any(kpi.type.strip().lower() in name.split() for name in tool_names)
+
 class KPICalculator:
     """KPI Calculator that processes findings and calculates KPI values"""
     
@@ -49,14 +80,24 @@ class KPICalculator:
         
         return calculated_kpis
     
+    def kpis_for_tool(self, tool_id: int) -> List[KPI]:
+        """The KPIs calculated from a tool's data (see kpi_matches_tool); all of them for an unknown tool"""
+        kpis = self.db.query(KPI).all()
+        tool = self.db.query(Tool).filter(Tool.id == tool_id).first()
+        if tool is None:
+            logger.warning(f"Tool {tool_id} not found, calculating every KPI")
+            return kpis
+        return [kpi for kpi in kpis if kpi_matches_tool(kpi, tool)]
+    
     def calculate_kpis(self, findings: List[Dict[str, Any]], tool_id: int, file_id: int) -> List[Dict[str, Any]]:
-        """Calculate KPI values based on processed findings"""
+        """Calculate the values of the KPIs fed by a tool, based on processed findings"""
         calculated_kpis = []
         
         try:
-            # Get all active KPIs
-            kpis = self.db.query(KPI).all()
+            kpis = self.kpis_for_tool(tool_id)
             logger.info(f"Found {len(kpis)} KPIs to calculate")
+            if not kpis:
+                return calculated_kpis
             
             for kpi in kpis:
                 try:
@@ -95,6 +136,16 @@ class KPICalculator:
             
         return calculated_kpis
     
+    def recalculate(self, tool_id: int, file_ids: List[int]) -> List[Dict[str, Any]]:
+        """Calculate the KPIs fed by a tool from the findings stored for some of its files"""
+        findings = [
+            row._asdict() for row in self.db.query(
+                Log.severity, Log.cvss_base_score, Log.vulnerability_name, Log.ip_source, Log.policy
+            ).filter(Log.file_id.in_(file_ids), Log.status == "success")
+        ]
+        logger.info(f"Recalculating the KPIs of tool {tool_id} from {len(findings)} findings of files {file_ids}")
+        return self.calculate_kpis(findings, tool_id, file_ids[-1])
+    
     def _calculate_kpi_value(self, kpi: KPI, findings: List[Dict[str, Any]], tool_id: int, file_id: int) -> Optional[float]:
         """Calculate individual KPI value based on its type and formula"""
         
@@ -228,6 +279,60 @@ class KPICalculator:
             logger.error(f"Error evaluating formula '{kpi.formula}': {str(e)}")
             return None
 
+def _recalculate(tool_id: int, file_ids: List[int]) -> List[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        return KPICalculator(db).recalculate(tool_id, file_ids)
+    finally:
+        db.close()
+
+class RecalculationScheduler:
+    """
+    Debounces the KPI recalculations triggered by ingestion, per tool.
+    
+    Each trigger restarts the tool's timer; when it runs out (or
+    RECALCULATION_MAX_DELAY_SECONDS after the first trigger), the KPIs fed
+    by the tool are recalculated once, from the findings of every file
+    processed meanwhile. A batch of reports parsed one after the other thus
+    costs one recalculation, not one per file. Pending recalculations are
+    lost if the service stops.
+    """
+    
+    def __init__(self):
+        # tool_id -> files processed since the tool's last recalculation
+        self._file_ids: Dict[int, List[int]] = {}
+        self._first_trigger: Dict[int, float] = {}
+        self._timers: Dict[int, asyncio.Task] = {}
+        # Started recalculations, referenced until they are done
+        self._running: Set[asyncio.Task] = set()
+    
+    def trigger(self, tool_id: int, file_id: int) -> None:
+        now = asyncio.get_running_loop().time()
+        self._file_ids.setdefault(tool_id, []).append(file_id)
+        first_trigger = self._first_trigger.setdefault(tool_id, now)
+        timer = self._timers.get(tool_id)
+        if timer is not None:
+            timer.cancel()
+        delay = min(RECALCULATION_DEBOUNCE_SECONDS, first_trigger + RECALCULATION_MAX_DELAY_SECONDS - now)
+        self._timers[tool_id] = asyncio.create_task(self._wait(tool_id, max(delay, 0)))
+    
+    async def _wait(self, tool_id: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        # Later triggers start a new round from here
+        del self._timers[tool_id], self._first_trigger[tool_id]
+        task = asyncio.create_task(self._run(tool_id, self._file_ids.pop(tool_id)))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+    
+    async def _run(self, tool_id: int, file_ids: List[int]) -> None:
+        try:
+            calculated_kpis = await run_in_threadpool(_recalculate, tool_id, file_ids)
+            logger.info(f"Recalculated {len(calculated_kpis)} KPIs of tool {tool_id}")
+        except Exception as e:
+            logger.error(f"KPI recalculation of tool {tool_id} failed: {str(e)}")
+
+recalculations = RecalculationScheduler()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -273,6 +378,22 @@ async def calculate_kpis(request: CalculationRequest):
             detail=f"Error calculating KPIs: {str(e)}"
         )
 
+@app.post("/recalculate", status_code=status.HTTP_202_ACCEPTED)
+async def recalculate_kpis(request: RecalculationRequest):
+    """
+    Recalculate the KPIs fed by a tool after one of its files was processed (called by the parser workers).
+    
+    Debounced: the recalculation runs once the tool's files stop arriving
+    for RECALCULATION_DEBOUNCE_SECONDS (see RecalculationScheduler).
+    """
+    recalculations.trigger(request.tool_id, request.file_id)
+    return {
+        "message": "KPI recalculation scheduled",
+        "file_id": request.file_id,
+        "tool_id": request.tool_id,
+        "status": "scheduled"
+    }
+
 @app.post("/calculate-batch")
 async def calculate_kpis_batch(background_tasks: BackgroundTasks, request: CalculationRequest):
     """Calculate KPIs in background for large datasets"""
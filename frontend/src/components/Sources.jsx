@@ -427,7 +427,7 @@ function ToolForm({
               id="configuration"
               value={formData.configuration || ""}
               onChange={(e) => handleChange("configuration")(e.target.value)}
-              placeholder="Tool configuration details"
+              placeholder='Tool configuration (JSON), e.g. {"ingest_filters": {"min_severity": "low", "plugin_deny": ["10114"], "exclude_families": ["General"]}, "field_mapping": {"app_name": "service", "cvss_base_score": {"source": "cvss.base", "type": "float"}}}'
               className="bg-white border border-red-200 focus:border-red-500 focus:ring-red-500 text-slate-900"
             />
           </div>
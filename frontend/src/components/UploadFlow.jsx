@@ -21,6 +21,9 @@ import {
 import { dashboardApi } from '../services/dashboardApi';
 import api from '../services/api';
 
+// Reports larger than this are sent as chunked uploads (parallel parts, each retried on its own)
+const CHUNKED_UPLOAD_MIN_BYTES = 64 * 1024 * 1024;
+
 const UploadFlow = ({ isOpen, onClose }) => {
     const [currentStep, setCurrentStep] = useState(1);
     const [selectedTool, setSelectedTool] = useState(null);
@@ -33,6 +36,13 @@ const UploadFlow = ({ isOpen, onClose }) => {
     const [processingStatus, setProcessingStatus] = useState('idle');
     const [uploadResult, setUploadResult] = useState(null);
     const [errorMessage, setErrorMessage] = useState('');
+    const [preview, setPreview] = useState(null);
+    const [isPreviewing, setIsPreviewing] = useState(false);
+    const [previewError, setPreviewError] = useState('');
+    // One key per selected file, so retrying its upload returns the same file instead of uploading twice
+    const [uploadKey, setUploadKey] = useState(null);
+    // Hosts and findings the background parse has stored so far
+    const [parseProgress, setParseProgress] = useState({ hosts: 0, findings: 0 });
 
     // Fetch tools from API
     useEffect(() => {
@@ -126,50 +136,75 @@ const UploadFlow = ({ isOpen, onClose }) => {
         const selectedFile = event.target.files[0];
         if (selectedFile) {
             setFile(selectedFile);
+            setUploadKey(crypto.randomUUID());
+            setPreview(null);
+            setPreviewError('');
         }
     };
 
-    const handleUpload = async () => {
-        setIsLoading(true);
-        setProcessingStatus('uploading');
-        setUploadProgress(0);
-        setErrorMessage('');
+    // Parse only the start of the report to show what an upload would ingest
+    const handlePreview = async () => {
+        setIsPreviewing(true);
+        setPreviewError('');
 
         try {
-            // Create FormData
             const formData = new FormData();
             formData.append('file', file);
 
-            // Simulate upload progress
-            const progressInterval = setInterval(() => {
-                setUploadProgress(prev => {
-                    if (prev >= 90) {
-                        clearInterval(progressInterval);
-                        return 90;
-                    }
-                    return prev + 10;
-                });
-            }, 200);
-
-            console.log('uploading')
-
-            // Upload file
-            const response = await api.post(`api/dashboard/files/upload?tool_id=${selectedTool.id}`, formData, {
+            const response = await api.post(`api/dashboard/files/preview?tool_id=${selectedTool.id}`, formData, {
                 headers: {
                     'Authorization': `Bearer ${localStorage.getItem('accessToken')}`,
                     'Content-Type': 'multipart/form-data',
                 },
-                onUploadProgress: (progressEvent) => {
-                    const percentCompleted = Math.round(
-                        (progressEvent.loaded * 100) / (progressEvent.total || 1)
-                    );
-                    setUploadProgress(Math.min(percentCompleted, 90));
-                }
             });
+            setPreview(response.data);
+        } catch (error) {
+            const detail = error.response?.data?.detail || error.message || 'Preview failed';
+            setPreviewError(typeof detail === 'string' ? detail : JSON.stringify(detail));
+        } finally {
+            setIsPreviewing(false);
+        }
+    };
+
+    const handleUpload = async () => {
+        setIsLoading(true);
+        setProcessingStatus('uploading');
+        setUploadProgress(0);
+        setParseProgress({ hosts: 0, findings: 0 });
+        setErrorMessage('');
+
+        try {
+            console.log('uploading')
+
+            // Upload file: the server stores it and answers right away, the report is parsed in the background
+            let response;
+            if (file.size > CHUNKED_UPLOAD_MIN_BYTES) {
+                response = await dashboardApi.uploadFileInParts(file, selectedTool.id, {
+                    idempotencyKey: uploadKey,
+                    onProgress: setUploadProgress,
+                });
+            } else {
+                // Create FormData
+                const formData = new FormData();
+                formData.append('file', file);
+
+                response = await api.post(`api/dashboard/files/upload?tool_id=${selectedTool.id}`, formData, {
+                    headers: {
+                        'Authorization': `Bearer ${localStorage.getItem('accessToken')}`,
+                        'Content-Type': 'multipart/form-data',
+                        'Idempotency-Key': uploadKey,
+                    },
+                    onUploadProgress: (progressEvent) => {
+                        const percentCompleted = Math.round(
+                            (progressEvent.loaded * 100) / (progressEvent.total || 1)
+                        );
+                        setUploadProgress(percentCompleted);
+                    }
+                });
+            }
 
             console.log(response);
 
-            clearInterval(progressInterval);
             setUploadProgress(100);
 
             if (response.status >= 400) {
@@ -179,38 +214,62 @@ const UploadFlow = ({ isOpen, onClose }) => {
             const result = response.data;
             setUploadResult(result);
 
+            const finishProcessing = () => {
+                setProcessingStatus('calculating');
+
+                // Wait a bit to show calculation phase
+                setTimeout(() => {
+                    setProcessingStatus('complete');
+                    setCurrentStep(4);
+                    setIsLoading(false);
+                }, 2000);
+            };
+
+            // A report already processed with this tool reuses its findings
+            if (result.status === 'processed') {
+                finishProcessing();
+                return;
+            }
+
             // Move to parsing phase
             setProcessingStatus('parsing');
 
-            // Poll for file processing status
-            let attempts = 0;
-            const maxAttempts = 30;
+            // Poll for file processing status; give up only when the parse stops making progress
+            const maxStalledPolls = 150;
+            let stalledPolls = 0;
+            let lastFindings = -1;
             const pollInterval = setInterval(async () => {
-                attempts++;
-
                 try {
                     const statusResponse = await api.get(`/api/dashboard/files/${result.id}`);
-                    if (!statusResponse.statusText === "OK") throw new Error('Failed to check status');
                     const fileStatus = statusResponse.data;
                     console.log('f: ', fileStatus);
+                    setParseProgress({
+                        hosts: fileStatus.hosts_processed || 0,
+                        findings: fileStatus.findings_processed || 0,
+                    });
+
                     if (fileStatus.status === "processed") {
                         clearInterval(pollInterval);
-                        setProcessingStatus('calculating');
-
-                        // Wait a bit to show calculation phase
-                        setTimeout(() => {
-                            setProcessingStatus('complete');
-                            setCurrentStep(4);
-                            setIsLoading(false);
-                        }, 2000);
-                    } else if (fileStatus.status === 'failed' || attempts >= maxAttempts) {
+                        finishProcessing();
+                    } else if (fileStatus.status === 'failed') {
                         clearInterval(pollInterval);
-                        throw new Error('Processing failed');
+                        // The parse error is logged on the file
+                        const logsResponse = await api.get(`/api/dashboard/files/${result.id}/logs`);
+                        const failure = logsResponse.data.find(log => log.status === 'failed');
+                        throw new Error(failure?.message || 'Processing failed');
+                    } else {
+                        stalledPolls = fileStatus.findings_processed === lastFindings ? stalledPolls + 1 : 0;
+                        lastFindings = fileStatus.findings_processed;
+                        if (stalledPolls >= maxStalledPolls) {
+                            clearInterval(pollInterval);
+                            throw new Error('Processing is taking too long, check the file list later');
+                        }
                     }
                 } catch (error) {
                     clearInterval(pollInterval);
                     console.error('Status check error:', error);
                     setProcessingStatus('failed');
+                    setErrorMessage(error.response?.data?.detail || error.message);
                     setIsLoading(false);
                 }
             }, 2000);
@@ -434,7 +493,7 @@ const UploadFlow = ({ isOpen, onClose }) => {
                                     type="file"
                                     id="file-upload"
                                     onChange={handleFileSelect}
-                                    accept=".xml,.txt,.json,.csv,.log"
+                                    accept=".nessus,.xml,.txt,.json,.csv,.log,.gz,.zst,.zip"
                                     className="hidden"
                                 />
                                 <label htmlFor="file-upload" className="cursor-pointer">
@@ -443,7 +502,7 @@ const UploadFlow = ({ isOpen, onClose }) => {
                                         {file ? file.name : 'Drop your file here or click to browse'}
                                     </p>
                                     <p className="text-sm text-gray-500">
-                                        Supported formats: XML, TXT, JSON, CSV, LOG
+                                        Supported formats: NESSUS, XML, TXT, JSON, CSV, LOG (optionally .gz, .zst or .zip compressed)
                                     </p>
                                     {file && (
                                         <div className="mt-4 inline-flex items-center space-x-2 bg-blue-50 px-4 py-2 rounded-lg">
@@ -456,6 +515,46 @@ const UploadFlow = ({ isOpen, onClose }) => {
                                 </label>
                             </div>
 
+                            {/* Preview */}
+                            {previewError && (
+                                <div className="bg-red-50 border border-red-200 rounded-xl p-4 text-sm text-red-700">
+                                    {previewError}
+                                </div>
+                            )}
+                            {preview && (
+                                <div className="bg-gray-50 border border-gray-200 rounded-xl p-4 space-y-3">
+                                    <div className="flex items-center justify-between">
+                                        <h3 className="text-sm font-medium text-gray-900">Preview</h3>
+                                        <span className="text-xs text-gray-500">
+                                            {preview.complete
+                                                ? 'Whole report read'
+                                                : `First ${preview.sampled_hosts} hosts read`}
+                                        </span>
+                                    </div>
+                                    <p className="text-sm text-gray-700">
+                                        {preview.estimated_total_findings == null
+                                            ? `${preview.sampled_findings}+ findings`
+                                            : `${preview.complete ? '' : '~'}${preview.estimated_total_findings.toLocaleString()} findings`}
+                                        {preview.dropped > 0 && ` (${preview.dropped} items filtered out so far)`}
+                                    </p>
+                                    <div className="flex flex-wrap gap-2">
+                                        {Object.entries(preview.severity_histogram).map(([severity, count]) => (
+                                            <span key={severity} className="text-xs bg-white border border-gray-200 rounded-lg px-2 py-1">
+                                                {severity}: {count}
+                                            </span>
+                                        ))}
+                                    </div>
+                                    <ul className="text-xs text-gray-600 space-y-1 max-h-32 overflow-y-auto">
+                                        {preview.samples.map((sample, index) => (
+                                            <li key={index} className="truncate">
+                                                • {sample.normalized_finding.vulnerability_name || sample.raw_finding.plugin_name}
+                                                {sample.normalized_finding.ip_destination && ` — ${sample.normalized_finding.ip_destination}`}
+                                            </li>
+                                        ))}
+                                    </ul>
+                                </div>
+                            )}
+
                             {/* File Requirements */}
                             <div className="bg-blue-50 border border-blue-200 rounded-xl p-4">
                                 <div className="flex items-start space-x-2">
@@ -474,25 +573,38 @@ const UploadFlow = ({ isOpen, onClose }) => {
                             {/* Action Buttons */}
                             <div className="flex justify-between pb-4">
                                 <button
-                                    onClick={() => setCurrentStep(1)}
+                                    onClick={() => { setPreview(null); setCurrentStep(1); }}
                                     className="px-6 py-3 rounded-xl font-medium bg-gray-100 text-gray-700 hover:bg-gray-200 transition-colors"
                                 >
                                     Back
                                 </button>
-                                <button
-                                    onClick={() => {
-                                        setCurrentStep(3);
-                                        handleUpload();
-                                    }}
-                                    disabled={!file}
-                                    className={`px-6 py-3 rounded-xl font-medium transition-all duration-200 flex items-center space-x-2
-                                        ${file
-                                            ? 'bg-blue-600 text-white hover:bg-blue-700 shadow-lg'
-                                            : 'bg-gray-200 text-gray-400 cursor-not-allowed'}`}
-                                >
-                                    <span>Upload & Process</span>
-                                    <ChevronRight className="w-5 h-5" />
-                                </button>
+                                <div className="flex space-x-3">
+                                    <button
+                                        onClick={handlePreview}
+                                        disabled={!file || isPreviewing}
+                                        className={`px-6 py-3 rounded-xl font-medium transition-colors flex items-center space-x-2
+                                            ${file && !isPreviewing
+                                                ? 'bg-gray-100 text-gray-700 hover:bg-gray-200'
+                                                : 'bg-gray-100 text-gray-400 cursor-not-allowed'}`}
+                                    >
+                                        {isPreviewing ? <Loader2 className="w-5 h-5 animate-spin" /> : <FileSearch className="w-5 h-5" />}
+                                        <span>Preview</span>
+                                    </button>
+                                    <button
+                                        onClick={() => {
+                                            setCurrentStep(3);
+                                            handleUpload();
+                                        }}
+                                        disabled={!file}
+                                        className={`px-6 py-3 rounded-xl font-medium transition-all duration-200 flex items-center space-x-2
+                                            ${file
+                                                ? 'bg-blue-600 text-white hover:bg-blue-700 shadow-lg'
+                                                : 'bg-gray-200 text-gray-400 cursor-not-allowed'}`}
+                                    >
+                                        <span>Upload & Process</span>
+                                        <ChevronRight className="w-5 h-5" />
+                                    </button>
+                                </div>
                             </div>
                         </div>
                     )}
@@ -563,6 +675,11 @@ const UploadFlow = ({ isOpen, onClose }) => {
                                             )}
                                             <span className="font-medium text-gray-900">Parsing Security Data</span>
                                         </div>
+                                        {processingStatus === 'parsing' && parseProgress.findings > 0 && (
+                                            <p className="text-sm text-gray-500 mt-1">
+                                                {parseProgress.findings.toLocaleString()} findings from {parseProgress.hosts.toLocaleString()} hosts
+                                            </p>
+                                        )}
                                     </div>
 
                                     {/* KPI Calculation Status */}
@@ -643,6 +760,11 @@ const UploadFlow = ({ isOpen, onClose }) => {
                                 </div>
                                 <h3 className="text-2xl font-bold text-gray-900 mb-2">Processing Complete!</h3>
                                 <p className="text-gray-600">Your security report has been successfully analyzed</p>
+                                {uploadResult?.source_file_id && (
+                                    <p className="text-sm text-gray-500 mt-2">
+                                        This report was already processed with this tool; its findings were reused.
+                                    </p>
+                                )}
                             </div>
 
                             {/* Summary Stats */}
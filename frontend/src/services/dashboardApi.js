@@ -1,5 +1,25 @@
 import api from './api';
 
+// Chunked uploads not completed yet, by file, so that sending the same file again resumes its upload
+const UPLOAD_SESSIONS_KEY = 'chunkedUploads';
+
+const uploadSessionKey = (file, toolId) => `${toolId}:${file.name}:${file.size}:${file.lastModified}`;
+
+const savedUploadSessions = () => {
+  try {
+    return JSON.parse(localStorage.getItem(UPLOAD_SESSIONS_KEY)) || {};
+  } catch (error) {
+    return {};
+  }
+};
+
+const saveUploadSession = (key, uploadId) => {
+  const sessions = savedUploadSessions();
+  if (uploadId) sessions[key] = uploadId;
+  else delete sessions[key];
+  localStorage.setItem(UPLOAD_SESSIONS_KEY, JSON.stringify(sessions));
+};
+
 export const dashboardApi = {
   // ==================== KPI MANAGEMENT ====================
 
@@ -85,6 +105,94 @@ export const dashboardApi = {
     return response.data;
   },
 
+  // Send a report as a chunked upload: its parts are PUT in parallel and retried on their own,
+  // so a dropped connection only costs the parts in flight. Sending the same file again (after a
+  // reload too) resumes its upload from the parts the server has. Resolves with the response of the completion.
+  uploadFileInParts: async (file, toolId, { idempotencyKey, onProgress, concurrency = 4, maxAttempts = 3 } = {}) => {
+    const sessionKey = uploadSessionKey(file, toolId);
+    const savedId = savedUploadSessions()[sessionKey];
+    let upload = null;
+    if (savedId) {
+      try {
+        ({ data: upload } = await api.get(`/api/dashboard/files/uploads/${savedId}`));
+      } catch (error) {
+        // Expired or cancelled meanwhile: start over
+        if (!error.response || error.response.status >= 500) throw error;
+        saveUploadSession(sessionKey, null);
+      }
+    }
+    if (!upload) {
+      ({ data: upload } = await api.post('/api/dashboard/files/uploads', {
+        filename: file.name,
+        size: file.size,
+        tool_id: toolId,
+        file_type: file.type || 'application/octet-stream',
+      }, { headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {} }));
+      saveUploadSession(sessionKey, upload.id);
+    }
+
+    const pending = [];
+    for (let index = 0; index < upload.part_count; index++) {
+      if (!upload.received_parts.includes(index)) pending.push(index);
+    }
+    let sentBytes = file.size - pending.reduce(
+      (size, index) => size + Math.min(upload.part_size, file.size - index * upload.part_size), 0
+    );
+    onProgress?.(file.size ? Math.round((sentBytes * 100) / file.size) : 0);
+    const sendPart = async (index) => {
+      const part = file.slice(index * upload.part_size, (index + 1) * upload.part_size);
+      for (let attempt = 1; ; attempt++) {
+        try {
+          await api.put(`/api/dashboard/files/uploads/${upload.id}/parts/${index}`, part, {
+            headers: { 'Content-Type': 'application/octet-stream' },
+            timeout: 0,
+          });
+          break;
+        } catch (error) {
+          // Parts the server rejected are not sent again
+          if (attempt >= maxAttempts || (error.response && error.response.status < 500)) throw error;
+          await new Promise((resolve) => setTimeout(resolve, 1000 * 2 ** (attempt - 1)));
+        }
+      }
+      sentBytes += part.size;
+      onProgress?.(Math.round((sentBytes * 100) / file.size));
+    };
+    const sendParts = async () => {
+      while (pending.length) await sendPart(pending.shift());
+    };
+    try {
+      await Promise.all(Array.from({ length: Math.min(concurrency, pending.length) }, sendParts));
+      const response = await api.post(`/api/dashboard/files/uploads/${upload.id}/complete`, null, { timeout: 0 });
+      saveUploadSession(sessionKey, null);
+      return response;
+    } catch (error) {
+      // Kept for a resume unless the server gave up on the upload or rejected the report
+      if (error.response && [400, 404, 413].includes(error.response.status)) saveUploadSession(sessionKey, null);
+      throw error;
+    }
+  },
+
+  // Upload many reports (or zip archives of them) as one batch, parsed up to maxParallel at a time
+  uploadBatch: async (files, toolId, { maxParallel, onProgress } = {}) => {
+    const formData = new FormData();
+    files.forEach((file) => formData.append('files', file));
+    const searchParams = new URLSearchParams({ tool_id: toolId });
+    if (maxParallel) searchParams.append('max_parallel', maxParallel);
+
+    const response = await api.post(`/api/dashboard/files/batches?${searchParams}`, formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+      timeout: 0,
+      onUploadProgress: (event) => event.total && onProgress?.(Math.round((event.loaded * 100) / event.total)),
+    });
+    return response.data;
+  },
+
+  // Get a batch, with the status of each of its files
+  getBatch: async (batchId) => {
+    const response = await api.get(`/api/dashboard/files/batches/${batchId}`);
+    return response.data;
+  },
+
   // ==================== DASHBOARD STATISTICS ====================
 
   // Get dashboard statistics
@@ -0,0 +1,92 @@
+import os
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+
+import httpx
+from fastapi import HTTPException
+
+from parsers.remote import RemoteReport
+
+import logging
+from core.logging import setup_logger
+logger = setup_logger(__name__, level=logging.INFO)
+
+DASHBOARD_SERVICE_URL = os.getenv("DASHBOARD_SERVICE_URL", "http://backend:8000")  # service name in Docker Compose
+# Shared with the dashboard: parser workers pull stored reports with it, outside of any user request
+INTERNAL_SERVICE_TOKEN = os.getenv("INTERNAL_SERVICE_TOKEN")
+
+# Tool metadata rarely changes, so lookups are cached for a while
+TOOL_CACHE_TTL_SECONDS = float(os.getenv("TOOL_CACHE_TTL_SECONDS", 300))
+
+_client: Optional[httpx.AsyncClient] = None
+# tool_id -> (expiry time, tool metadata)
+_tool_cache: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+
+
+async def start() -> None:
+    """Open the keep-alive client shared by every request to the dashboard service"""
+    global _client
+    _client = httpx.AsyncClient(
+        base_url=DASHBOARD_SERVICE_URL,
+        timeout=30.0,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+    )
+
+
+async def stop() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _tool_cache.clear()
+
+
+def _get_client() -> httpx.AsyncClient:
+    if _client is None:
+        raise RuntimeError("Dashboard client is not started")
+    return _client
+
+
+async def _get(path: str, auth_token: Optional[str], not_found: str) -> Dict[str, Any]:
+    headers = {"Authorization": f"Bearer {auth_token}"} if auth_token else {}
+    response = await _get_client().get(f"/api/dashboard{path}", headers=headers)
+    if response.status_code != 200:
+        logger.error(f"GET {path} failed: {response.status_code}")
+        raise HTTPException(status_code=404, detail=not_found)
+    return response.json()
+
+
+async def get_file_info(file_id: int, auth_token: Optional[str]) -> Dict[str, Any]:
+    """Fetch a file record from the dashboard service"""
+    return await _get(f"/files/{file_id}", auth_token, "File not found")
+
+
+async def get_tool_info(tool_id: int, auth_token: Optional[str]) -> Dict[str, Any]:
+    """Fetch tool metadata, served from the TTL cache when fresh"""
+    cached = _tool_cache.get(tool_id)
+    now = time.monotonic()
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    tool_info = await _get(f"/tools/{tool_id}", auth_token, "Tool not found")
+    _tool_cache[tool_id] = (now + TOOL_CACHE_TTL_SECONDS, tool_info)
+    return tool_info
+
+
+def report_location(file_path: str, auth_token: Optional[str] = None) -> Union[str, RemoteReport]:
+    """
+    Where to read a stored report from.
+    
+    Replicas that mount the shared uploads volume open the file directly;
+    others pull it from the dashboard's report endpoint, with Range
+    requests for random access: with the user's token while serving their
+    request, else (parser workers) from the internal endpoint with the
+    service token.
+    """
+    if os.path.exists(file_path):
+        return file_path
+    name = os.path.basename(file_path)
+    if auth_token:
+        return RemoteReport(f"{DASHBOARD_SERVICE_URL}/api/dashboard/reports/{name}", {"Authorization": f"Bearer {auth_token}"})
+    headers = {"X-Service-Token": INTERNAL_SERVICE_TOKEN} if INTERNAL_SERVICE_TOKEN else {}
+    return RemoteReport(f"{DASHBOARD_SERVICE_URL}/api/dashboard/internal/reports/{name}", headers)
@@ -0,0 +1,133 @@
+"""
+Rows per second of the ways parsed findings can be written to the logs table.
+
+Compares one ORM object per finding with a single commit at the end (the
+original upload loop), executemany batches in one transaction, and the
+chunked LogWriter, with COPY and with its executemany fallback.
+
+Writes into the configured dashboard database (its tables must exist),
+under a throwaway tool and file that are deleted afterwards. Run from the
+parser_backend directory:
+
+    python -m benchmarks.bench_log_insert --rows 100000
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import insert as sql_insert, text
+
+import store
+from core.database import File, Log, SessionLocal, Tool, engine
+
+SEVERITIES = ["Info", "Low", "Medium", "High", "Critical"]
+
+
+def synthetic_findings(count: int, unlocated_every: int) -> list:
+    """Parser output for count findings; every unlocated_every-th one carries its raw data"""
+    rng = random.Random(0)
+    findings = []
+    offset = 0
+    for index in range(count):
+        length = rng.randint(800, 4000)
+        raw = {"plugin_id": str(rng.randint(10000, 200000)), "port": "443", "protocol": "tcp"}
+        if not unlocated_every or index % unlocated_every:
+            raw.update(source_offset=offset, source_length=length, host_offset=0, host_length=offset + length)
+        findings.append({
+            "raw_finding": raw,
+            "normalized_finding": {
+                "event_time": "2024-03-0%dT11:33:11" % (index % 9 + 1),
+                "ip_source": "10.0.%d.%d" % (index // 250 % 250, index % 250),
+                "ip_destination": "192.168.1.%d" % (index % 250),
+                "severity": rng.choice(SEVERITIES),
+                "cvss_base_score": round(rng.uniform(0, 10), 1),
+                "vulnerability_name": "Synthetic finding %d\twith a tab" % rng.randint(0, 5000),
+                "log_type": "vulnerability",
+                "app_name": "Nessus",
+            },
+        })
+        offset += length
+    return findings
+
+
+def run_orm(db, rows: list, batch: int) -> None:
+    for row in rows:
+        db.add(Log(**row))
+    db.commit()
+
+
+def run_executemany(db, rows: list, batch: int) -> None:
+    for start in range(0, len(rows), batch):
+        db.execute(sql_insert(Log), rows[start:start + batch])
+    db.commit()
+
+
+def run_writer(db, rows: list, batch: int, use_copy: bool) -> None:
+    writer = store.LogWriter(db, use_copy=use_copy)
+    for start in range(0, len(rows), batch):
+        writer.write(rows[start:start + batch])
+    if writer.written != len(rows):
+        raise SystemExit(f"LogWriter wrote {writer.written} of {len(rows)} rows")
+
+
+METHODS = {
+    "orm": (run_orm, 500),
+    "executemany": (run_executemany, 500),
+    "writer-executemany": (lambda db, rows, batch: run_writer(db, rows, batch, False), None),
+    "writer-copy": (lambda db, rows, batch: run_writer(db, rows, batch, True), None),
+}
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--rows", type=int, default=100000)
+    arg_parser.add_argument("--chunk", type=int, default=5000, help="rows per LogWriter chunk")
+    arg_parser.add_argument("--unlocated-every", type=int, default=10,
+                            help="one finding in N keeps its raw and normalized JSON (0: none)")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--methods", nargs="+", choices=METHODS, default=list(METHODS))
+    args = arg_parser.parse_args()
+
+    db = SessionLocal()
+    # Tool and File here only map the columns the parser uses
+    tool_id = db.execute(text(
+        "INSERT INTO tools (name, type, category) VALUES ('bench_log_insert', 'benchmark', 'scanner') RETURNING id"
+    )).scalar_one()
+    file_id = db.execute(text(
+        "INSERT INTO files (filename, file_path, file_type, uploaded_by, size, status, md5_hash, tool_id) "
+        "VALUES ('bench.nessus', 'bench.nessus', 'application/xml', 0, 0, 'pending', '', :tool_id) RETURNING id"
+    ), {"tool_id": tool_id}).scalar_one()
+    db.commit()
+
+    try:
+        rows = [store.log_row(file_id, tool_id, "bench.nessus", finding)
+                for finding in synthetic_findings(args.rows, args.unlocated_every)]
+        print(f"{len(rows)} rows, database {engine.url.render_as_string(hide_password=True)}")
+
+        results = {}
+        for name in args.methods:
+            run, batch = METHODS[name]
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                run(db, rows, batch or args.chunk)
+                timings.append(time.perf_counter() - start)
+                store.delete_file_logs(db, file_id)
+                db.commit()
+            results[name] = min(timings)
+
+        baseline = results.get("orm")
+        for name, elapsed in results.items():
+            speedup = f" (x{baseline / elapsed:.1f})" if baseline else ""
+            print(f"{name:>20}: {len(rows) / elapsed:>10.0f} rows/s{speedup}")
+    finally:
+        db.rollback()
+        store.delete_file_logs(db, file_id)
+        db.query(File).filter(File.id == file_id).delete()
+        db.query(Tool).filter(Tool.id == tool_id).delete()
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Findings per second of Normalizer.normalize (one finding at a time) against Normalizer.normalize_many.
+
+Also times normalize_many through a compiled field mapping, and compares parsing distinct event times with the full format chain against an
+EventTimeParser that learned the format.
+
+Run from the parser_backend directory:
+
+    python -m benchmarks.bench_normalizer --hosts 2000
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.synthetic import write_report_file
+from normalizer import EVENT_TIME_FORMATS, EventTimeParser, Normalizer, _parse_event_time
+from parsers.field_mapping import FieldMapping
+from parsers.nessus import NessusParser
+
+
+def run_single(chunks: list) -> tuple:
+    normalizer = Normalizer()
+    start = time.perf_counter()
+    normalized = [normalizer.normalize(finding) for chunk in chunks for finding in chunk]
+    return normalized, time.perf_counter() - start
+
+
+def run_batched(chunks: list, extract=None) -> tuple:
+    normalizer = Normalizer()
+    start = time.perf_counter()
+    normalized = [finding for chunk in chunks for finding in normalizer.normalize_many(chunk, extract=extract)]
+    return normalized, time.perf_counter() - start
+
+
+def bench_event_times(count: int) -> None:
+    start = datetime(2013, 7, 1, 11, 33, 11)
+    for fmt in EVENT_TIME_FORMATS:
+        values = [(start + timedelta(seconds=i * 7919)).strftime(fmt) for i in range(count)]
+
+        begin = time.perf_counter()
+        chained = [_parse_event_time(value) for value in values]
+        chain_time = time.perf_counter() - begin
+
+        parser = EventTimeParser()
+        begin = time.perf_counter()
+        learned = [parser.parse(value) for value in values]
+        learned_time = time.perf_counter() - begin
+        if learned != chained:
+            raise SystemExit(f"EventTimeParser output differs from the format chain for {fmt}")
+
+        print(f"{fmt:>22}: {count / chain_time:>10.0f} values/s chained, "
+              f"{count / learned_time:>10.0f} values/s learned (x{chain_time / learned_time:.2f})")
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--hosts", type=int, default=2000)
+    arg_parser.add_argument("--items-per-host", type=int, default=20)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--event-times", type=int, default=20000)
+    args = arg_parser.parse_args()
+
+    logging.getLogger("parsers.nessus").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, "bench.nessus")
+        write_report_file(file_path, args.hosts, args.items_per_host)
+        with open(file_path, "rb") as f:
+            # Batches as the pipeline sees them: one per ReportHost
+            chunks = list(NessusParser().parse_report_stream(f, "bench.nessus"))
+    findings = sum(len(chunk) for chunk in chunks)
+    print(f"Report: {args.hosts} hosts, {findings} findings")
+
+    single, single_time = min((run_single(chunks) for _ in range(args.repeat)), key=lambda run: run[1])
+    batched, batched_time = min((run_batched(chunks) for _ in range(args.repeat)), key=lambda run: run[1])
+    if batched != single:
+        raise SystemExit("normalize_many output differs from normalize")
+
+    print(f"{'normalize':>15}: {findings / single_time:>10.0f} findings/s ({single_time:6.2f}s)")
+    print(f"{'normalize_many':>15}: {findings / batched_time:>10.0f} findings/s ({batched_time:6.2f}s, "
+          f"x{single_time / batched_time:.2f})")
+
+    # Every field read from its own key, so the output must not change
+    identity = FieldMapping.from_configuration({"field_mapping": {"action": "action"}}).extractor()
+    mapped, mapped_time = min((run_batched(chunks, identity) for _ in range(args.repeat)), key=lambda run: run[1])
+    if mapped != single:
+        raise SystemExit("normalize_many output through the identity field mapping differs from normalize")
+    print(f"{'field mapping':>15}: {findings / mapped_time:>10.0f} findings/s ({mapped_time:6.2f}s, "
+          f"x{single_time / mapped_time:.2f})")
+
+    bench_event_times(args.event_times)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Throughput of NessusParser.parse_report_parallel for 1, 2, 4 and 8 workers.
+
+The report holds a compliance check (cm: namespace) per host, and every
+parallel run must return the same findings as the streaming parse.
+
+Run from the parser_backend directory:
+
+    python -m benchmarks.bench_parallel --hosts 20000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_report_file
+from parsers.nessus import NessusParser
+
+
+def run(file_path: str, workers: int) -> tuple:
+    parser = NessusParser()
+    start = time.perf_counter()
+    findings = [finding for chunk in parser.parse_report_parallel(file_path, "bench.nessus", workers=workers)
+                for finding in chunk]
+    return findings, time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--hosts", type=int, default=5000)
+    arg_parser.add_argument("--items-per-host", type=int, default=20)
+    arg_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = arg_parser.parse_args()
+
+    logging.getLogger("parsers.nessus").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, "bench.nessus")
+        write_report_file(file_path, args.hosts, args.items_per_host, compliance=True)
+        size_mb = os.path.getsize(file_path) / (1024 * 1024)
+        print(f"Report: {args.hosts} hosts, {size_mb:.1f} MB, {os.cpu_count()} CPUs")
+
+        parser = NessusParser()
+        start = time.perf_counter()
+        with open(file_path, "rb") as f:
+            baseline = [finding for host in parser.parse_report_stream(f, "bench.nessus") for finding in host]
+        baseline_time = time.perf_counter() - start
+        print(f"{'stream':>8}: {len(baseline):>9} findings in {baseline_time:7.2f}s "
+              f"({len(baseline) / baseline_time:>10.0f} findings/s, {size_mb / baseline_time:6.1f} MB/s)")
+
+        for workers in args.workers:
+            findings, elapsed = run(file_path, workers)
+            print(f"{workers:>8}: {len(findings):>9} findings in {elapsed:7.2f}s "
+                  f"({len(findings) / elapsed:>10.0f} findings/s, {size_mb / elapsed:6.1f} MB/s, "
+                  f"x{baseline_time / elapsed:.2f} vs stream)")
+            if findings != baseline:
+                sys.exit(f"{workers} workers returned other findings than the streaming parse")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Compare the streaming XML backends of the Nessus parser on synthetic reports.
+
+Run from the parser_backend directory:
+
+    python -m benchmarks.bench_xml_backends --hosts 100 1000 5000
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import write_report_file
+from parsers import xml_backends
+from parsers.nessus import NessusParser
+
+
+def run(file_path: str, backend: str) -> tuple:
+    parser = NessusParser(xml_backend=backend)
+    start = time.perf_counter()
+    with open(file_path, "rb") as f:
+        findings = sum(len(host) for host in parser.parse_report_stream(f, "bench.nessus"))
+    return findings, time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--hosts", type=int, nargs="+", default=[100, 1000, 5000])
+    arg_parser.add_argument("--items-per-host", type=int, default=20)
+    arg_parser.add_argument("--backends", nargs="+", default=xml_backends.available_backends())
+    args = arg_parser.parse_args()
+
+    logging.getLogger("parsers.nessus").setLevel(logging.WARNING)
+    logging.getLogger("parsers.xml_backends").setLevel(logging.WARNING)
+
+    selected = xml_backends.select_backend()
+    print(f"Startup calibration would select: {selected.name}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for hosts in args.hosts:
+            file_path = os.path.join(tmp, f"bench-{hosts}.nessus")
+            write_report_file(file_path, hosts, args.items_per_host)
+            size_mb = os.path.getsize(file_path) / (1024 * 1024)
+            print(f"\n{hosts} hosts, {size_mb:.1f} MB")
+
+            for backend in args.backends:
+                findings, elapsed = run(file_path, backend)
+                print(f"  {backend:>7}: {findings:>9} findings in {elapsed:7.2f}s "
+                      f"({findings / elapsed:>10.0f} findings/s, {size_mb / elapsed:6.1f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Synthetic Nessus v2 reports for the parser benchmarks"""
+from typing import BinaryIO
+from xml.sax.saxutils import escape
+
+SEVERITIES = ("0", "1", "2", "3", "4")
+
+DESCRIPTION = escape(
+    "The remote host is affected by a vulnerability that allows an attacker to "
+    "execute arbitrary code. Upgrade to the latest version of the software. " * 8
+)
+
+
+def _write_host(out: BinaryIO, host_index: int, items_per_host: int, compliance: bool) -> None:
+    ip = f"10.{host_index // 65536 % 256}.{host_index // 256 % 256}.{host_index % 256}"
+    out.write(
+        f'<ReportHost name="{ip}"><HostProperties>'
+        f'<tag name="HOST_START">Mon Jul  1 11:33:11 2013</tag>'
+        f'<tag name="host-ip">{ip}</tag>'
+        f'<tag name="host-fqdn">host{host_index}.example.local</tag>'
+        f'<tag name="mac-address">00:50:56:81:01:e3</tag>'
+        f'<tag name="operating-system">Microsoft Windows Server 2008 R2 Standard</tag>'
+        f'<tag name="HOST_END">Mon Jul  1 11:40:44 2013</tag>'
+        f'</HostProperties>'
+        f'<ReportItem port="0" svc_name="general" protocol="tcp" severity="0" '
+        f'pluginID="19506" pluginName="Nessus Scan Information" pluginFamily="Settings">'
+        f'<plugin_output>Scanner IP : 172.16.138.174\nScan duration : 453 sec</plugin_output>'
+        f'</ReportItem>'.encode("utf-8")
+    )
+    for item_index in range(items_per_host):
+        plugin_id = 10000 + item_index
+        severity = SEVERITIES[item_index % len(SEVERITIES)]
+        out.write(
+            f'<ReportItem port="{445 + item_index % 20}" svc_name="cifs" protocol="tcp" '
+            f'severity="{severity}" pluginID="{plugin_id}" pluginName="Synthetic plugin {plugin_id}" '
+            f'pluginFamily="Windows">'
+            f'<description>{DESCRIPTION}</description>'
+            f'<solution>Apply the vendor patch.</solution>'
+            f'<plugin_output>Detected on {ip} port {445 + item_index % 20}</plugin_output>'
+            f'<cvss_base_score>{item_index % 11}.0</cvss_base_score>'
+            f'<exploit_available>{"true" if item_index % 3 == 0 else "false"}</exploit_available>'
+            f'<exploit_framework_metasploit>false</exploit_framework_metasploit>'
+            f'</ReportItem>'.encode("utf-8")
+        )
+    if compliance:
+        # Compliance checks use elements of the cm namespace declared on <Report>
+        out.write(
+            f'<ReportItem port="0" svc_name="general" protocol="tcp" severity="1" '
+            f'pluginID="21156" pluginName="Windows Compliance Checks" pluginFamily="Policy Compliance">'
+            f'<cm:compliance-check-name>1.1 Password history</cm:compliance-check-name>'
+            f'<cm:compliance-result>{"PASSED" if host_index % 2 else "FAILED"}</cm:compliance-result>'
+            f'<plugin_output>Policy value: 24</plugin_output>'
+            f'</ReportItem>'.encode("utf-8")
+        )
+    out.write(b"</ReportHost>")
+
+
+def write_report(out: BinaryIO, hosts: int, items_per_host: int = 20, compliance: bool = False) -> None:
+    """Write a Nessus v2 report with the given number of hosts to a binary stream, with a compliance check per host if asked"""
+    out.write(
+        b'<?xml version="1.0" ?>\n<NessusClientData_v2>'
+        b'<Policy><policyName>Synthetic</policyName><Preferences><ServerPreferences>'
+        b'<preference><name>max_hosts</name><value>30</value></preference>'
+        b'</ServerPreferences></Preferences></Policy>'
+        b'<Report name="Synthetic scan" xmlns:cm="http://www.nessus.org/cm">'
+    )
+    for host_index in range(hosts):
+        _write_host(out, host_index, items_per_host, compliance)
+    out.write(b"</Report></NessusClientData_v2>\n")
+
+
+def write_report_file(path: str, hosts: int, items_per_host: int = 20, compliance: bool = False) -> None:
+    """Write a synthetic Nessus v2 report to disk"""
+    with open(path, "wb") as f:
+        write_report(f, hosts, items_per_host, compliance)
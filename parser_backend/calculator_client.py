@@ -0,0 +1,26 @@
+import os
+
+import httpx
+
+import logging
+from core.logging import setup_logger
+logger = setup_logger(__name__, level=logging.INFO)
+
+CALCULATOR_SERVICE_URL = os.getenv("CALCULATOR_SERVICE_URL", "http://calculator_backend:8002")  # service name in Docker Compose
+
+
+async def request_recalculation(file_id: int, tool_id: int) -> None:
+    """
+    Tell the calculator service that a file of a tool was processed, so it recalculates the KPIs the tool feeds.
+
+    The calculator debounces these calls per tool. A failure is only logged:
+    the file is processed either way, and the tool's next file triggers the
+    recalculation again.
+    """
+    try:
+        async with httpx.AsyncClient(base_url=CALCULATOR_SERVICE_URL, timeout=5.0) as client:
+            response = await client.post("/recalculate", json={"file_id": file_id, "tool_id": tool_id})
+        if response.status_code != 202:
+            logger.warning(f"KPI recalculation after file {file_id} was refused: {response.status_code}")
+    except httpx.HTTPError as e:
+        logger.warning(f"Could not request the KPI recalculation after file {file_id}: {str(e)}")
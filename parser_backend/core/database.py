@@ -0,0 +1,143 @@
+from sqlalchemy import create_engine, inspect, BigInteger, Boolean, Column, DateTime, Float, ForeignKey, Integer, String, UniqueConstraint, func
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
+from .config import settings
+
+SQLALCHEMY_DATABASE_URL = f"postgresql://{settings.DASHBOARD_POSTGRES_USER}:{settings.DASHBOARD_POSTGRES_PASSWORD}@{settings.DASHBOARD_POSTGRES_HOST}:{settings.DASHBOARD_POSTGRES_PORT}/{settings.DASHBOARD_POSTGRES_DB}"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base = declarative_base()
+
+# Database models used by the parse workers (simplified versions of what's in dashboard,
+# which owns the tables and creates them). verify_schema checks them against the database.
+class ParseJob(Base):
+    __tablename__ = "parse_jobs"
+
+    id = Column(Integer, primary_key=True)
+    file_id = Column(Integer, nullable=False)
+    status = Column(String, nullable=False)
+    priority = Column(Integer, nullable=False)
+    batch_id = Column(Integer, nullable=True)
+    attempts = Column(Integer, nullable=False)
+    max_attempts = Column(Integer, nullable=False)
+    available_at = Column(DateTime(timezone=True), nullable=False)
+    locked_by = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(String, nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+class UploadBatch(Base):
+    __tablename__ = "upload_batches"
+
+    id = Column(Integer, primary_key=True)
+    max_parallel = Column(Integer, nullable=False)
+
+class Tool(Base):
+    __tablename__ = "tools"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    type = Column(String, nullable=False)
+    configuration = Column(String, nullable=True)
+
+class File(Base):
+    __tablename__ = "files"
+
+    id = Column(Integer, primary_key=True)
+    filename = Column(String, nullable=False)
+    file_path = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    tool_id = Column(Integer, nullable=True)
+    findings_dropped = Column(Integer, nullable=True)
+    findings_rejected = Column(Integer, nullable=True)
+    hosts_processed = Column(Integer, nullable=True)
+    findings_processed = Column(Integer, nullable=True)
+
+class Plugin(Base):
+    __tablename__ = "plugins"
+    # Target of the catalog upserts (store.upsert_plugins)
+    __table_args__ = (UniqueConstraint("tool_id", "plugin_id", name="uq_plugins_tool_plugin"),)
+
+    id = Column(Integer, primary_key=True)
+    tool_id = Column(Integer, nullable=False)
+    plugin_id = Column(String, nullable=False)
+    name = Column(String, nullable=True)
+    family = Column(String, nullable=True)
+    description = Column(String, nullable=True)
+    solution = Column(String, nullable=True)
+    cvss_base_score = Column(Float, nullable=True)
+    exploitable = Column(Boolean, nullable=False)
+    metasploit_available = Column(Boolean, nullable=False)
+    metasploit_name = Column(String, nullable=True)
+    updated_at = Column(DateTime(timezone=True))
+
+class Log(Base):
+    __tablename__ = "logs"
+
+    id = Column(Integer, primary_key=True)
+    file_id = Column(Integer, ForeignKey("files.id"), nullable=False)
+    tool_id = Column(Integer, nullable=False)
+    status = Column(String, nullable=False)
+    message = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    raw_data = Column(String, nullable=True)
+    source_offset = Column(BigInteger, nullable=True)
+    source_length = Column(Integer, nullable=True)
+    host_offset = Column(BigInteger, nullable=True)
+    host_length = Column(Integer, nullable=True)
+    plugin_id = Column(String, nullable=True)
+    parsed_data = Column(String, nullable=True)
+    event_time = Column(DateTime(timezone=True), nullable=True)
+    action = Column(String, nullable=True)
+    attack_type = Column(String, nullable=True)
+    policy = Column(String, nullable=True)
+    bandwidth = Column(Float, nullable=True)
+    ip_source = Column(String, nullable=True)
+    ip_destination = Column(String, nullable=True)
+    severity = Column(String, nullable=True)
+    cvss_base_score = Column(Float, nullable=True)
+    vulnerability_name = Column(String, nullable=True)
+    malware_type = Column(String, nullable=True)
+    quarantine_status = Column(String, nullable=True)
+    log_type = Column(String, nullable=True)
+    app_name = Column(String, nullable=True)
+    country_code = Column(String, nullable=True)
+
+
+class SchemaMismatchError(RuntimeError):
+    """The dashboard's tables do not match the models above"""
+
+
+def verify_schema() -> None:
+    """
+    Check that every column and unique constraint of the models above exists
+    in the database, with a compatible type.
+
+    The dashboard owns these tables (backend/app/dashboard/models.py and its
+    migrations); this catches a model changed on one side only, or a
+    database not migrated yet, before any report is parsed.
+
+    Raises:
+        SchemaMismatchError: Listing every difference found
+    """
+    inspector = inspect(engine)
+    problems = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            problems.append(f"table {table.name} is missing")
+            continue
+        columns = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            found = columns.get(column.name)
+            if found is None:
+                problems.append(f"column {table.name}.{column.name} is missing")
+            elif found.python_type is not column.type.python_type or (
+                isinstance(column.type, BigInteger) and not isinstance(found, BigInteger)
+            ):
+                problems.append(f"column {table.name}.{column.name} is {found}, expected {column.type}")
+        constraints = {constraint["name"] for constraint in inspector.get_unique_constraints(table.name)}
+        for constraint in table.constraints:
+            if isinstance(constraint, UniqueConstraint) and constraint.name not in constraints:
+                problems.append(f"unique constraint {constraint.name} on {table.name} is missing")
+    if problems:
+        raise SchemaMismatchError("Dashboard database schema does not match the parser's models: " + "; ".join(problems))
@@ -0,0 +1,184 @@
+"""
+Parse job queue, kept in the dashboard database (parse_jobs table).
+
+The dashboard queues one job per upload; parser workers (worker.py) claim
+them with SELECT ... FOR UPDATE SKIP LOCKED, so any number of workers share
+the queue without handing the same job to two of them. A claimed job is
+leased: its worker refreshes heartbeat_at while it runs, and a running job
+whose heartbeat is older than PARSE_JOB_STALE_SECONDS (its worker crashed
+or was killed) is put back in the queue by the next worker polling it.
+
+Failed attempts are retried after an exponential backoff, up to the job's
+max_attempts. Jobs of a batch upload are only claimed while fewer than the
+batch's max_parallel are running; workers claiming at the same instant can
+each see the last free slot, so the limit may briefly be exceeded by one
+job per worker.
+"""
+import logging
+import os
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, aliased
+
+import store
+from core.database import ParseJob, UploadBatch
+from core.logging import setup_logger
+
+logger = setup_logger(__name__, level=logging.INFO)
+
+# How often a running job's heartbeat is refreshed
+PARSE_JOB_HEARTBEAT_SECONDS = float(os.getenv("PARSE_JOB_HEARTBEAT_SECONDS", 10))
+# A running job without a heartbeat for this long is considered abandoned
+PARSE_JOB_STALE_SECONDS = float(os.getenv("PARSE_JOB_STALE_SECONDS", 60))
+# Delay before the first retry of a failed job, doubled at each further attempt
+PARSE_JOB_RETRY_BASE_SECONDS = float(os.getenv("PARSE_JOB_RETRY_BASE_SECONDS", 10))
+PARSE_JOB_RETRY_MAX_SECONDS = float(os.getenv("PARSE_JOB_RETRY_MAX_SECONDS", 300))
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the next attempt of a job that failed its attempts-th one"""
+    return timedelta(seconds=min(PARSE_JOB_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), PARSE_JOB_RETRY_MAX_SECONDS))
+
+
+def claim(db: Session, worker_id: str) -> Optional[Row]:
+    """
+    Take the next queued job (highest priority, then oldest) for a worker,
+    skipping the jobs of batches running their max_parallel jobs already.
+
+    Returns:
+        The job's id, file_id, attempts and max_attempts, or None when no job is ready
+    """
+    candidate = aliased(ParseJob)
+    running = aliased(ParseJob)
+    batch_running = (
+        select(func.count())
+        .select_from(running)
+        .where(running.batch_id == candidate.batch_id, running.status == "running")
+        .correlate(candidate)
+        .scalar_subquery()
+    )
+    batch_max_parallel = (
+        select(UploadBatch.max_parallel)
+        .where(UploadBatch.id == candidate.batch_id)
+        .correlate(candidate)
+        .scalar_subquery()
+    )
+    next_job = (
+        select(candidate.id)
+        .where(
+            candidate.status == "queued",
+            candidate.available_at <= func.now(),
+            or_(candidate.batch_id.is_(None), batch_running < batch_max_parallel),
+        )
+        .order_by(candidate.priority.desc(), candidate.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    job = db.execute(
+        update(ParseJob)
+        .where(ParseJob.id == next_job)
+        .values(
+            status="running",
+            locked_by=worker_id,
+            attempts=ParseJob.attempts + 1,
+            heartbeat_at=func.now(),
+        )
+        .returning(ParseJob.id, ParseJob.file_id, ParseJob.attempts, ParseJob.max_attempts)
+    ).first()
+    db.commit()
+    return job
+
+
+def _leased(job_id: int, worker_id: str):
+    """Update of a job still running under this worker's lease"""
+    return update(ParseJob).where(
+        ParseJob.id == job_id, ParseJob.status == "running", ParseJob.locked_by == worker_id
+    )
+
+
+def heartbeat(db: Session, job_id: int, worker_id: str) -> bool:
+    """
+    Extend a worker's lease on a job.
+
+    Returns False when the lease is lost: the job was deleted with its file,
+    or requeued after missing its heartbeats. The worker must then stop it.
+    """
+    result = db.execute(_leased(job_id, worker_id).values(heartbeat_at=func.now()))
+    db.commit()
+    return result.rowcount == 1
+
+
+def complete(db: Session, job_id: int, worker_id: str) -> None:
+    db.execute(_leased(job_id, worker_id).values(
+        status="done", finished_at=func.now(), last_error=None
+    ))
+    db.commit()
+
+
+def fail(db: Session, job: Row, worker_id: str, error: str, retry: bool) -> bool:
+    """
+    Record a failed attempt: the job is queued again after its backoff
+    when retry is set and attempts remain, else it ends failed.
+
+    Returns:
+        True if the job will be retried
+    """
+    retried = retry and job.attempts < job.max_attempts
+    if retried:
+        values = dict(
+            status="queued", locked_by=None, heartbeat_at=None,
+            available_at=func.now() + retry_delay(job.attempts),
+        )
+    else:
+        values = dict(status="failed", finished_at=func.now())
+    db.execute(_leased(job.id, worker_id).values(last_error=error, **values))
+    db.commit()
+    return retried
+
+
+def release(db: Session, job_id: int, worker_id: str) -> None:
+    """Put back a job interrupted by the worker shutting down, without counting the attempt"""
+    db.execute(_leased(job_id, worker_id).values(
+        status="queued", locked_by=None, heartbeat_at=None, attempts=ParseJob.attempts - 1
+    ))
+    db.commit()
+
+
+def requeue_abandoned(db: Session) -> int:
+    """
+    Requeue running jobs whose worker stopped sending heartbeats.
+
+    A job abandoned on its last attempt is not retried: it is cancelled and
+    its file marked failed (a report that kills its worker each time would
+    otherwise keep every worker busy).
+
+    Returns:
+        The number of abandoned jobs found
+    """
+    abandoned = db.execute(
+        select(ParseJob.id, ParseJob.file_id, ParseJob.attempts, ParseJob.max_attempts, ParseJob.locked_by)
+        .where(
+            ParseJob.status == "running",
+            ParseJob.heartbeat_at < func.now() - timedelta(seconds=PARSE_JOB_STALE_SECONDS),
+        )
+        .with_for_update(skip_locked=True)
+    ).all()
+    exhausted = []
+    for job in abandoned:
+        logger.warning(f"Parse job {job.id} of file {job.file_id} was abandoned by worker {job.locked_by}")
+        values = dict(locked_by=None, heartbeat_at=None, last_error=f"Worker {job.locked_by} stopped responding")
+        if job.attempts < job.max_attempts:
+            values.update(status="queued", available_at=func.now() + retry_delay(job.attempts))
+        else:
+            values.update(status="cancelled", finished_at=func.now())
+            exhausted.append(job.file_id)
+        db.execute(update(ParseJob).where(ParseJob.id == job.id).values(**values))
+    db.commit()
+
+    for file_id in exhausted:
+        store.record_failure(db, file_id, "Parsing stopped unexpectedly on every attempt and was abandoned")
+    return len(abandoned)
@@ -1,182 +1,381 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import httpx
-from parsers.nessus import NessusParser
-from normalizer import Normalizer
+import backend_client
+import pipeline
+from parsers import registry, xml_backends
+from parsers.field_mapping import FieldMapping
+from parsers.filters import IngestFilter, load_configuration
+from parsers.report_source import open_report
+import asyncio
 import json
 import logging
+from contextlib import asynccontextmanager
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Security Parser Service", version="1.0.0")
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """Pick the fastest installed XML backend once and start the parse pool, before serving requests"""
+    xml_backends.select_backend()
+    pipeline.start()
+    await backend_client.start()
+    yield
+    await backend_client.stop()
+    pipeline.stop()
 
-DASHBOARD_SERVICE_URL = "http://backend:8000"  # service name in Docker Compose
+app = FastAPI(title="Security Parser Service", version="1.0.0", lifespan=lifespan)
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, AsyncIterator
 class ParsedFinding(BaseModel):
     raw_finding: Dict[str, Any]  # Original finding from the parser
     normalized_finding: Dict[str, Any]  # Processed by Normalizer
 
 class ParseResponse(BaseModel):
     findings: List[ParsedFinding]
+    # Plugin-level details keyed by plugin ID, referenced by the findings
+    plugins: Dict[str, Dict[str, Any]] = {}
+    # Report items left out by the tool's ingest filters
+    dropped: int = 0
 
 class ParseRequest(BaseModel):
     file_id: int
     tool_id: int
     user_id: int
-    auth_token: str
+    # Only used to look up what the caller did not send
+    auth_token: Optional[str] = None
+    # File and tool details, sent by the dashboard so that no lookup is needed
+    file_path: Optional[str] = None
+    filename: Optional[str] = None
+    tool_name: Optional[str] = None
+    tool_type: Optional[str] = None
+    # JSON configuration of the tool, holding its ingest filters and field mapping
+    tool_configuration: Optional[str] = None
+
+class PreviewResponse(BaseModel):
+    # False when the preview stopped before the end of the report
+    complete: bool
+    # None when the size of the decompressed report is unknown
+    estimated_total_findings: Optional[int] = None
+    sampled_findings: int
+    sampled_hosts: int
+    # Decompressed report bytes
+    bytes_read: int
+    total_bytes: Optional[int] = None
+    severity_histogram: Dict[str, int]
+    dropped: int = 0
+    samples: List[ParsedFinding]
+    plugins: Dict[str, Dict[str, Any]] = {}
+
+class FindingRequest(BaseModel):
+    tool_id: int
+    auth_token: Optional[str] = None
+    file_path: str
+    filename: str
+    tool_name: Optional[str] = None
+    tool_type: Optional[str] = None
+    # JSON configuration of the tool, holding its field mapping
+    tool_configuration: Optional[str] = None
+    # Byte ranges recorded with the finding when its report was parsed
+    source_offset: int
+    host_offset: int
+    host_length: int
+
+class FindingResponse(ParsedFinding):
+    # The ReportItem as it appears in the report
+    raw_xml: str
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "parser_backend"}
+    return {
+        "status": "healthy",
+        "service": "parser_backend",
+        "xml_backend": xml_backends.backend_status()
+    }
 
-@app.post("/parse", response_model=ParseResponse)
-async def parse_file(request: ParseRequest):
-    """Parse uploaded security report file"""
-    try:
-        logger.info(f"Starting to parse file_id: {request.file_id} with tool_id: {request.tool_id}")
+def parse_error_response(e: Exception, filename: str) -> HTTPException:
+    """Turn an error raised while parsing a report into the HTTP error returned to the dashboard"""
+    if isinstance(e, pipeline.ParseTimeoutError):
+        logger.error(f"Parsing {filename} timed out")
+        return HTTPException(status_code=504, detail=str(e))
+    
+    if isinstance(e, ValueError):
+        # Handle format validation errors with user-friendly messages
+        error_message = str(e)
+        logger.error(f"Format validation error: {error_message}")
         
-        # Get file info from dashboard service
-        async with httpx.AsyncClient() as client:
-            # Get file information
-            response = await client.get(
-                f"{DASHBOARD_SERVICE_URL}/api/dashboard/files/{request.file_id}",
-                headers={"Authorization": f"Bearer {request.auth_token}"},
-                timeout=30.0,
+        # Provide specific guidance based on the error
+        if "does not appear to be a valid Nessus v2 report" in error_message:
+            return HTTPException(
+                status_code=400, 
+                detail="The uploaded file is not a valid Nessus report. Please ensure you exported the report as '.nessus' format from Tenable Nessus."
             )
-            
-            if response.status_code != 200:
-                logger.error(f"Failed to get file info: {response.status_code}")
-                raise HTTPException(status_code=404, detail="File not found")
-            
-            file_info = response.json()
-            logger.info(f"Retrieved file info: {file_info['filename']}")
-            
-            # Get tool information to determine parser type
-            tool_response = await client.get(
-                f"{DASHBOARD_SERVICE_URL}/api/dashboard/tools/{request.tool_id}",
-                headers={"Authorization": f"Bearer {request.auth_token}"},
-                timeout=30.0
+        elif "does not have valid Nessus report structure" in error_message:
+            return HTTPException(
+                status_code=400, 
+                detail="The file structure is not valid for a Nessus report. Please check that the XML export completed successfully."
             )
-            
-            if tool_response.status_code != 200:
-                logger.error(f"Failed to get tool info: {tool_response.status_code}")
-                raise HTTPException(status_code=404, detail="Tool not found")
-            
-            tool_info = tool_response.json()
-            logger.info(f"Retrieved tool info: {tool_info['name']} - {tool_info['type']}")
-            
-            # Read file content
-            try:
-                with open(file_info["file_path"], "r", encoding='utf-8') as f:
-                    file_content = f.read()
-                logger.info(f"Successfully read file content ({len(file_content)} characters)")
-            except FileNotFoundError:
-                logger.error(f"File not found: {file_info['file_path']}")
-                raise HTTPException(status_code=404, detail="File not found on disk")
-            except Exception as e:
-                logger.error(f"Error reading file: {str(e)}")
-                raise HTTPException(status_code=500, detail=f"Error reading file: {str(e)}")
-            
-            # Initialize appropriate parser based on tool type
-            parser = None
-            if tool_info['type'].lower() == 'vulnerability scanner':
-                # For vulnerability scanners, we need to determine the specific type
-                tool_name_lower = tool_info['name'].lower()
-                if 'nessus' in tool_name_lower:
-                    parser = NessusParser()
-                else:
-                    logger.warning(f"Unsupported vulnerability scanner: {tool_info['name']}")
-                    raise HTTPException(
-                        status_code=400, 
-                        detail=f"Vulnerability scanner '{tool_info['name']}' is not supported yet. Currently supported: Nessus"
-                    )
+        elif "Invalid XML format" in error_message:
+            return HTTPException(
+                status_code=400, 
+                detail="The uploaded file contains invalid XML. Please re-export the report from Nessus."
+            )
+        else:
+            return HTTPException(status_code=400, detail=error_message)
+    
+    logger.error(f"Unexpected error parsing report: {str(e)}")
+    return HTTPException(
+        status_code=500, 
+        detail=f"An unexpected error occurred while parsing the report. Please check the file format and try again."
+    )
+
+async def ndjson_lines(first_message: Optional[tuple], messages: AsyncIterator[tuple], filename: str) -> AsyncIterator[str]:
+    """
+    Serialize streamed parse results as NDJSON, one object per line:
+    
+        {"type": "plugins", "plugins": {plugin_id: details}}   before the findings referencing them
+        {"type": "finding", "raw_finding": ..., "normalized_finding": ...}
+        {"type": "progress", "hosts": count}                    after the findings of each host
+        {"type": "done", "findings": count, "hosts": count, "dropped": count}  after the last finding
+        {"type": "error", "status": code, "detail": message}    if parsing fails midway
+    """
+    try:
+        message = first_message
+        while message is not None:
+            kind, payload = message
+            if kind == "plugins":
+                yield json.dumps({"type": "plugins", "plugins": payload}) + "\n"
+            elif kind == "done":
+                logger.info(f"Streamed {payload['findings']} findings from {filename}")
+                yield json.dumps({"type": "done", **payload}) + "\n"
             else:
-                logger.warning(f"No parser available for tool type: {tool_info['type']}")
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Tool type '{tool_info['type']}' is not supported yet. Currently supported: vulnerability_scanner (Nessus)"
+                # One write per parser chunk (ReportHost), one line per finding
+                hosts, findings = payload
+                yield "".join(json.dumps({"type": "finding", **parsed}) + "\n" for parsed in findings) + \
+                    json.dumps({"type": "progress", "hosts": hosts}) + "\n"
+            message = await anext(messages, None)
+    except Exception as e:
+        # The status line is already sent, so the error goes in the stream
+        error = parse_error_response(e, filename)
+        yield json.dumps({"type": "error", "status": error.status_code, "detail": error.detail}) + "\n"
+    finally:
+        # Stops the worker if the client went away
+        await messages.aclose()
+
+def select_parser(file_info: Dict[str, Any], tool_info: Dict[str, Any]):
+    """
+    Pick the parser, ingest filters and field mapping for a report.
+    
+    Returns:
+        (parser spec, ingest filter or None, field mapping or None)
+    
+    Raises:
+        HTTPException: If the report cannot be read, matches no parser or the filters or mapping are invalid
+    """
+    # Memory-map the report; it is parsed incrementally and never decoded as a whole
+    try:
+        report_source = open_report(file_info["file_path"])
+    except FileNotFoundError:
+        logger.error(f"File not found: {file_info['filename']}")
+        raise HTTPException(status_code=404, detail="File not found on disk")
+    except ValueError as e:
+        # Corrupted or unsupported compressed container
+        logger.error(f"Error reading file: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error reading file: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error reading file: {str(e)}")
+
+    # Pick the parser from the first bytes of the report, using the tool as a hint
+    with report_source:
+        parser_spec = registry.detect(report_source.prefix, tool_info['name'], tool_info['type'])
+
+    if parser_spec is None:
+        hinted_spec = registry.hinted_parser(tool_info['name'], tool_info['type'])
+        if hinted_spec is not None:
+            logger.warning(f"File does not match the {hinted_spec.name} format")
+            raise HTTPException(
+                status_code=400,
+                detail=f"The uploaded file is not a valid {hinted_spec.name} report. Please check that you selected the right tool and exported the report in its native format."
+            )
+        supported = ", ".join(spec.name for spec in registry.registered_parsers())
+        logger.warning(f"No parser available for tool: {tool_info['name']} ({tool_info['type']})")
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Tool '{tool_info['name']}' ({tool_info['type']}) is not supported yet. Currently supported: {supported}"
+        )
+
+    logger.info(f"Using {parser_spec.name} parser")
+
+    # Tools saved before the dashboard checked configurations may hold free text
+    try:
+        configuration = load_configuration(tool_info.get("configuration"))
+    except ValueError as e:
+        logger.warning(f"Invalid configuration for tool {tool_info['name']}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # The tool's ingest filters are applied while parsing
+    try:
+        ingest_filter = IngestFilter.from_configuration(configuration)
+    except ValueError as e:
+        logger.warning(f"Invalid ingest filters for tool {tool_info['name']}: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Invalid ingest filters in the tool configuration: {str(e)}")
+    
+    # Raw findings are mapped onto the normalized fields as the tool's configuration says
+    try:
+        field_mapping = FieldMapping.from_configuration(configuration)
+    except ValueError as e:
+        logger.warning(f"Invalid field mapping for tool {tool_info['name']}: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Invalid field mapping in the tool configuration: {str(e)}")
+    
+    return parser_spec, ingest_filter, field_mapping
+
+@app.post("/parse", response_model=ParseResponse)
+async def parse_file(request: ParseRequest, stream: bool = False):
+    """
+    Parse uploaded security report file.
+    
+    With ?stream=true the findings are sent as NDJSON while the report is
+    still being parsed (see ndjson_lines) instead of as one JSON document.
+    """
+    try:
+        logger.info(f"Starting to parse file_id: {request.file_id} with tool_id: {request.tool_id}")
+        
+        # The dashboard sends the file and tool details; older callers only send IDs
+        if request.file_path and request.filename:
+            file_info = {"file_path": request.file_path, "filename": request.filename}
+        else:
+            file_info = await backend_client.get_file_info(request.file_id, request.auth_token)
+        logger.info(f"Retrieved file info: {file_info['filename']}")
+        # Read from the uploads volume when it is mounted here, else pulled from the dashboard
+        file_info["file_path"] = backend_client.report_location(file_info["file_path"], request.auth_token)
+        
+        if request.tool_name and request.tool_type:
+            tool_info = {"name": request.tool_name, "type": request.tool_type, "configuration": request.tool_configuration}
+        else:
+            tool_info = await backend_client.get_tool_info(request.tool_id, request.auth_token)
+        logger.info(f"Retrieved tool info: {tool_info['name']} - {tool_info['type']}")
+        
+        parser_spec, ingest_filter, field_mapping = await asyncio.to_thread(select_parser, file_info, tool_info)
+        
+        # Parse and normalize in the process pool, so the event loop keeps serving other requests
+        try:
+            if stream:
+                messages = pipeline.stream(
+                    parser_spec.name, file_info["file_path"], file_info["filename"],
+                    ingest_filter=ingest_filter, field_mapping=field_mapping
                 )
-            
-            # Parse the report
-            try:
-                findings = parser.parse_report(file_content, file_info["filename"])
-                logger.info(f"Parser returned {len(findings)} findings")
-                
-                if not isinstance(findings, list):
-                    logger.error("Parser returned non-list result")
-                    raise HTTPException(status_code=500, detail="Invalid response from parser")
-                
-                # Handle empty results
-                if len(findings) == 0:
-                    logger.info("No findings found in the report")
-                    return {"findings": []}
-                
-                # Normalize findings
-                normalizer = Normalizer()
-                parsed_findings = []
-                normalization_errors = 0
-                
-                for i, finding in enumerate(findings):
-                    try:
-                        normalized = normalizer.normalize(finding)
-                        parsed_findings.append({
-                            "raw_finding": finding,      # Original data from parser
-                            "normalized_finding": normalized  # Processed data
-                        })
-                    except Exception as e:
-                        normalization_errors += 1
-                        logger.warning(f"Failed to normalize finding {i+1}: {str(e)}")
-                        # Continue processing other findings
-                        continue
-                
-                # Log normalization results
-                if normalization_errors > 0:
-                    logger.warning(f"Failed to normalize {normalization_errors} out of {len(findings)} findings")
-                
-                logger.info(f"Successfully normalized {len(parsed_findings)} findings")
-                return {"findings": parsed_findings}
-                
-            except ValueError as e:
-                # Handle format validation errors with user-friendly messages
-                error_message = str(e)
-                logger.error(f"Format validation error: {error_message}")
-                
-                # Provide specific guidance based on the error
-                if "does not appear to be a valid Nessus v2 report" in error_message:
-                    raise HTTPException(
-                        status_code=400, 
-                        detail="The uploaded file is not a valid Nessus report. Please ensure you exported the report as '.nessus' format from Tenable Nessus."
-                    )
-                elif "does not have valid Nessus report structure" in error_message:
-                    raise HTTPException(
-                        status_code=400, 
-                        detail="The file structure is not valid for a Nessus report. Please check that the XML export completed successfully."
-                    )
-                elif "Invalid XML format" in error_message:
-                    raise HTTPException(
-                        status_code=400, 
-                        detail="The uploaded file contains invalid XML. Please re-export the report from Nessus."
-                    )
-                else:
-                    raise HTTPException(status_code=400, detail=error_message)
-                    
-            except Exception as e:
-                logger.error(f"Unexpected error parsing report: {str(e)}")
-                raise HTTPException(
-                    status_code=500, 
-                    detail=f"An unexpected error occurred while parsing the report. Please check the file format and try again."
+                # Wait for the first results so that an invalid report still gets an error status
+                first_message = await anext(messages, None)
+                return StreamingResponse(
+                    ndjson_lines(first_message, messages, file_info["filename"]),
+                    media_type="application/x-ndjson"
                 )
             
+            result = await pipeline.run(
+                parser_spec.name, file_info["file_path"], file_info["filename"],
+                ingest_filter=ingest_filter, field_mapping=field_mapping
+            )
+            if len(result["findings"]) == 0:
+                logger.info("No findings found in the report")
+            return result
+            
+        except Exception as e:
+            raise parse_error_response(e, file_info["filename"])
+        
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Unexpected error in parse_file: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Service error: {str(e)}")
 
+@app.post("/preview", response_model=PreviewResponse)
+async def preview_file(
+    report: UploadFile = File(..., description="The report, or only its first bytes"),
+    tool_id: int = Form(...),
+    filename: str = Form(...),
+    # Size of the whole report, when only its first bytes are sent
+    report_size: Optional[int] = Form(None),
+    auth_token: Optional[str] = Form(None),
+    tool_name: Optional[str] = Form(None),
+    tool_type: Optional[str] = Form(None),
+    tool_configuration: Optional[str] = Form(None),
+    # Stop after this many findings (defaults to PREVIEW_MAX_FINDINGS)
+    max_findings: Optional[int] = Form(None)
+):
+    """
+    Parse the start of a report to show what an upload would ingest.
+    
+    Previews run on the bytes sent with the request, which are never
+    stored. Only the first findings are parsed and a few of them
+    normalized; the total is an estimate unless the preview read the whole
+    report.
+    """
+    try:
+        if max_findings is not None and max_findings <= 0:
+            raise HTTPException(status_code=400, detail="max_findings must be positive")
+        
+        file_info = {"file_path": report.file, "filename": filename}
+        if tool_name and tool_type:
+            tool_info = {"name": tool_name, "type": tool_type, "configuration": tool_configuration}
+        else:
+            tool_info = await backend_client.get_tool_info(tool_id, auth_token)
+        
+        parser_spec, ingest_filter, field_mapping = await asyncio.to_thread(select_parser, file_info, tool_info)
+        # Detecting the format read from the upload
+        report.file.seek(0)
+        
+        try:
+            return await pipeline.preview(
+                parser_spec.name, report.file, filename,
+                ingest_filter=ingest_filter, max_findings=max_findings, field_mapping=field_mapping,
+                report_size=report_size
+            )
+        except Exception as e:
+            raise parse_error_response(e, filename)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in preview_file: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Service error: {str(e)}")
+
+@app.post("/finding", response_model=FindingResponse)
+async def read_finding(request: FindingRequest):
+    """
+    Re-parse a single finding from its byte ranges in the stored report.
+    
+    Backs the raw view of a finding: the dashboard keeps only the ranges,
+    not a copy of the raw finding.
+    """
+    try:
+        file_info = {"file_path": request.file_path, "filename": request.filename}
+        # Read from the uploads volume when it is mounted here, else pulled from the dashboard
+        file_info["file_path"] = backend_client.report_location(file_info["file_path"], request.auth_token)
+        if request.tool_name and request.tool_type:
+            tool_info = {"name": request.tool_name, "type": request.tool_type, "configuration": request.tool_configuration}
+        else:
+            tool_info = await backend_client.get_tool_info(request.tool_id, request.auth_token)
+        
+        parser_spec, _, field_mapping = await asyncio.to_thread(select_parser, file_info, tool_info)
+        
+        try:
+            return await pipeline.finding(
+                parser_spec.name, file_info["file_path"], file_info["filename"],
+                request.source_offset, request.host_offset, request.host_length, field_mapping
+            )
+        except Exception as e:
+            raise parse_error_response(e, file_info["filename"])
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in read_finding: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Service error: {str(e)}")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
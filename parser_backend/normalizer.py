@@ -1,7 +1,124 @@
-from dataclasses import dataclass, asdict, field
-from typing import Optional, Dict, Any
+from dataclasses import dataclass, asdict, field, fields
+from typing import Optional, Dict, Any, Callable, Iterable, List, Tuple
 from datetime import datetime
+import copy
 import ipaddress
+import re
+
+
+# Formats tried in order when event_time is given as a string
+EVENT_TIME_FORMATS = (
+    "%Y-%m-%dT%H:%M:%S",       # ISO without timezone
+    "%Y-%m-%d %H:%M:%S",       # Common format
+    "%Y-%m-%dT%H:%M:%S.%f",    # ISO with microseconds
+    "%a %b %d %H:%M:%S %Y",    # e.g., Mon Jul 1 11:33:11 2025
+    "%b %d %Y %H:%M:%S",       # e.g., Jul 1 2025 11:33:11
+)
+
+
+# Format name for values only datetime.fromisoformat accepts
+ISO_FORMAT = "iso"
+
+_MONTHS = {name: number for number, name in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1
+)}
+_WEEKDAYS = {"mon", "tue", "wed", "thu", "fri", "sat", "sun"}
+
+# Hand-written parsers for the common shapes of each strptime format: a regex over
+# ASCII digits and English abbreviated names, and the strptime directive of each group.
+# Values of other shapes (full month names, two-digit fields out of range, ...) go
+# through strptime instead, so the fast paths never accept what strptime would reject.
+_FAST_PATHS = {
+    fmt: (re.compile(pattern, re.ASCII), tuple(directives.split()))
+    for fmt, pattern, directives in (
+        ("%Y-%m-%dT%H:%M:%S",
+         r"([0-9]{4})-([0-9]{1,2})-([0-9]{1,2})T([0-9]{1,2}):([0-9]{1,2}):([0-9]{1,2})", "Y m d H M S"),
+        ("%Y-%m-%d %H:%M:%S",
+         r"([0-9]{4})-([0-9]{1,2})-([0-9]{1,2})\s+([0-9]{1,2}):([0-9]{1,2}):([0-9]{1,2})", "Y m d H M S"),
+        ("%Y-%m-%dT%H:%M:%S.%f",
+         r"([0-9]{4})-([0-9]{1,2})-([0-9]{1,2})T([0-9]{1,2}):([0-9]{1,2}):([0-9]{1,2})\.([0-9]{1,6})",
+         "Y m d H M S f"),
+        ("%a %b %d %H:%M:%S %Y",
+         r"([A-Za-z]{3})\s+([A-Za-z]{3})\s+([0-9]{1,2})\s+([0-9]{1,2}):([0-9]{1,2}):([0-9]{1,2})\s+([0-9]{4})",
+         "a b d H M S Y"),
+        ("%b %d %Y %H:%M:%S",
+         r"([A-Za-z]{3})\s+([0-9]{1,2})\s+([0-9]{4})\s+([0-9]{1,2}):([0-9]{1,2}):([0-9]{1,2})", "b d Y H M S"),
+    )
+}
+
+
+def _fast_parse(fmt: str, value: str) -> Optional[datetime]:
+    """Parse a value of the given format without strptime, or None if it is not of the common shape"""
+    if fmt == ISO_FORMAT:
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    pattern, directives = _FAST_PATHS[fmt]
+    match = pattern.fullmatch(value)
+    if match is None:
+        return None
+    parts = dict(zip(directives, match.groups()))
+    if "a" in parts and parts["a"].lower() not in _WEEKDAYS:
+        return None
+    month = _MONTHS.get(parts["b"].lower()) if "b" in parts else int(parts["m"])
+    if month is None:
+        return None
+    try:
+        return datetime(
+            int(parts["Y"]), month, int(parts["d"]), int(parts["H"]), int(parts["M"]), int(parts["S"]),
+            int(parts["f"].ljust(6, "0")) if "f" in parts else 0,
+        )
+    except ValueError:
+        # Out of range: left for the full chain to reject
+        return None
+
+
+def _match_event_time(value: str) -> Tuple[datetime, str]:
+    """Parse an event time, returning the first format of EVENT_TIME_FORMATS (or ISO_FORMAT) that matched"""
+    for fmt in EVENT_TIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt), fmt
+        except (ValueError, TypeError):
+            continue
+    # Last resort: try fromisoformat for full ISO strings
+    try:
+        return datetime.fromisoformat(value), ISO_FORMAT
+    except Exception:
+        raise ValueError(f"Invalid event_time format: {value}")
+
+
+def _parse_event_time(value: str) -> datetime:
+    return _match_event_time(value)[0]
+
+
+class EventTimeParser:
+    """
+    Event time parser that learns the timestamp format of a source.
+
+    The first value goes through the full chain of formats, and the format
+    that matched is kept. Later values are parsed with that format's fast
+    path; only those it cannot handle go through the full chain again,
+    which also relearns the format. Results are the same as the chain's,
+    since no value matches two of the formats.
+
+    Use one per report (or per tool), as the formats of other sources differ.
+    """
+
+    def __init__(self):
+        self.format: Optional[str] = None
+
+    def parse(self, value: str) -> datetime:
+        if self.format is not None:
+            parsed = _fast_parse(self.format, value)
+            if parsed is not None:
+                return parsed
+        parsed, self.format = _match_event_time(value)
+        return parsed
+
+    def check(self, value: Any) -> Any:
+        """Normalize an event_time field value: strings are parsed, other values kept"""
+        return self.parse(value) if isinstance(value, str) else value
 
 
 class SeverityLevel:
@@ -41,24 +158,7 @@ class Normalizer:
 
     def _normalize_event_time(self):
         if isinstance(self.event_time, str):
-            for fmt in (
-                "%Y-%m-%dT%H:%M:%S",       # ISO without timezone
-                "%Y-%m-%d %H:%M:%S",       # Common format
-                "%Y-%m-%dT%H:%M:%S.%f",    # ISO with microseconds
-                "%a %b %d %H:%M:%S %Y",    # e.g., Mon Jul 1 11:33:11 2025
-                "%b %d %Y %H:%M:%S",       # e.g., Jul 1 2025 11:33:11
-            ):
-                try:
-                    self.event_time = datetime.strptime(self.event_time, fmt)
-                    return
-                except (ValueError, TypeError):
-                    continue
-            # Last resort: try fromisoformat for full ISO strings
-            try:
-                self.event_time = datetime.fromisoformat(self.event_time)
-            except Exception:
-                raise ValueError(f"Invalid event_time format: {self.event_time}")
-
+            self.event_time = _parse_event_time(self.event_time)
 
     def _validate_severity(self):
         if self.severity is not None and self.severity not in SeverityLevel.VALID_LEVELS:
@@ -93,28 +193,147 @@ class Normalizer:
                 result[key] = value
         return result
 
-    def normalize(self, data: Dict[str, Any]) -> 'Normalizer':
+    def normalize(self, data: Dict[str, Any],
+                  extract: Optional[Callable[[Dict[str, Any]], Tuple[Any, ...]]] = None) -> 'Normalizer':
         """Normalize input data into a Normalizer instance."""
-        # take the data and create a Normalizer instance, and validate it then return it as a dict
-        normalized_data = {
-            "event_time": data.get("event_time"),
-            "action": data.get("action"),
-            "attack_type": data.get("attack_type"),
-            "policy": data.get("policy"),
-            "bandwidth": data.get("bandwidth"),
-            "ip_source": data.get("ip_source"),
-            "ip_destination": data.get("ip_destination"),
-            "severity": data.get("severity"),
-            "cvss_base_score": data.get("cvss_base_score"),
-            "vulnerability_name": data.get("vulnerability_name"),
-            "malware_type": data.get("malware_type"),
-            "quarantine_status": data.get("quarantine_status"),
-            "log_type": data.get("log_type"),
-            "app_name": data.get("app_name"),
-            "country_code": data.get("country_code")
-        }
+        # Read the fields (through the tool's compiled field mapping, if any), create a
+        # Normalizer instance, and validate it then return it as a dict
+        normalized_data = dict(zip(FIELDS, (extract or _read_fields)(data)))
         normalizer = Normalizer(**normalized_data)
         # Validate the instance to ensure all fields are correct
         normalizer.__post_init__()
         # Convert to dict and return
-        return normalizer.to_dict()
\ No newline at end of file
+        return normalizer.to_dict()
+
+    def normalize_many(self, findings: Iterable[Dict[str, Any]],
+                       errors: Optional[List[Tuple[int, Exception]]] = None,
+                       event_times: Optional["EventTimeParser"] = None,
+                       extract: Optional[Callable[[Dict[str, Any]], Tuple[Any, ...]]] = None
+                       ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Normalize a batch of findings; same output as calling normalize on each of them.
+
+        Findings that fail validation come out as None, and (index, error) is
+        appended to errors when a list is given, so one bad finding does not
+        abort the batch. Validation results of event times, severities and IP
+        addresses are shared across the batch, since the findings of a report
+        mostly repeat a handful of hosts and timestamps. Pass the same
+        event_times parser for every batch of a report so its timestamp
+        format is only detected once. extract reads the fields of a finding,
+        see normalize.
+        """
+        if event_times is None:
+            event_times = EventTimeParser()
+        validators = [("event_time", _memoized(event_times.check))] + [
+            (name, _memoized(check) if memoize else check) for name, check, memoize in _VALIDATORS
+        ]
+        results: List[Optional[Dict[str, Any]]] = []
+        for index, data in enumerate(findings):
+            record = NormalizedRecord()
+            try:
+                values = map(data.get, FIELDS) if extract is None else extract(data)
+                for key, value in zip(FIELDS, values):
+                    setattr(record, key, value)
+                for key, check in validators:
+                    value = getattr(record, key)
+                    if value is not None:
+                        setattr(record, key, check(value))
+            except Exception as e:
+                if errors is not None:
+                    errors.append((index, e))
+                results.append(None)
+                continue
+            results.append(record.to_dict())
+        return results
+
+
+# Normalized fields, in output order
+FIELDS = tuple(f.name for f in fields(Normalizer))
+
+def _read_fields(data: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Values of FIELDS in a finding that is already keyed by them (no field mapping)"""
+    return tuple(map(data.get, FIELDS))
+
+
+# Values that are never copied when building the output dict (asdict copies everything else)
+_ATOMIC_TYPES = (str, int, float, bool, datetime)
+
+
+class NormalizedRecord:
+    """A validated finding, as built by Normalizer.normalize_many"""
+    __slots__ = FIELDS
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Same output as Normalizer.to_dict"""
+        result: Dict[str, Any] = {}
+        for key in FIELDS:
+            value = getattr(self, key)
+            if value is None:
+                continue
+            if isinstance(value, datetime):
+                result[key] = value.isoformat()
+            elif isinstance(value, _ATOMIC_TYPES):
+                result[key] = value
+            else:
+                result[key] = copy.deepcopy(value)
+        return result
+
+
+def _check_severity(value: Any) -> Any:
+    if value not in SeverityLevel.VALID_LEVELS:
+        raise ValueError(f"Invalid severity: {value}. Must be one of {SeverityLevel.VALID_LEVELS}")
+    return value
+
+
+def _check_bandwidth(value: Any) -> Any:
+    if value < 0:
+        raise ValueError("Bandwidth must be a non-negative integer")
+    return value
+
+
+def _check_cvss_score(value: Any) -> Any:
+    if not (0.0 <= value <= 10.0):
+        raise ValueError("CVSS base score must be between 0.0 and 10.0")
+    return value
+
+
+def _ip_checker(attr: str) -> Callable[[Any], Any]:
+    def check(value: Any) -> Any:
+        try:
+            ipaddress.ip_address(value)
+        except ValueError:
+            raise ValueError(f"Invalid IP address for {attr}: {value}")
+        return value
+    return check
+
+
+# Per-field validators, in the order Normalizer.__post_init__ runs them (after event_time,
+# which is parsed first), so a finding failing several checks reports the same error.
+# None values are never validated. Memoized validators remember the values that passed
+# for the rest of the batch.
+_VALIDATORS: Tuple[Tuple[str, Callable[[Any], Any], bool], ...] = (
+    ("severity", _check_severity, True),
+    ("bandwidth", _check_bandwidth, False),
+    ("cvss_base_score", _check_cvss_score, False),
+    ("ip_source", _ip_checker("ip_source"), True),
+    ("ip_destination", _ip_checker("ip_destination"), True),
+)
+
+
+def _memoized(check: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """Cache the results of a validator for the values that pass it"""
+    passed: Dict[Tuple[type, Any], Any] = {}
+
+    def memoized_check(value: Any) -> Any:
+        # Keyed by type too, since e.g. 1 and 1.0 compare equal but may not validate alike
+        key = (type(value), value)
+        try:
+            return passed[key]
+        except KeyError:
+            result = passed[key] = check(value)
+            return result
+        except TypeError:
+            # Unhashable values are validated every time
+            return check(value)
+
+    return memoized_check
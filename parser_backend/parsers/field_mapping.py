@@ -0,0 +1,179 @@
+import functools
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Mapping, Optional, Sequence, Tuple, Union
+
+from normalizer import FIELDS
+from parsers.filters import load_configuration
+
+# Key of the field mapping in a tool's JSON configuration
+CONFIGURATION_KEY = "field_mapping"
+
+# Coercions a rule can apply, by the name used in the configuration
+COERCIONS: Dict[str, Callable[[Any], Any]] = {
+    "str": str,
+    "int": lambda value: int(value.strip()) if isinstance(value, str) else int(value),
+    "float": lambda value: float(value.strip()) if isinstance(value, str) else float(value),
+}
+
+# What the generated extractors can hold as constants
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+# Extracts the values of FIELDS, in order, from a raw finding
+Extractor = Callable[[Mapping[str, Any]], Tuple[Any, ...]]
+
+
+@dataclass(frozen=True)
+class FieldRule:
+    """How one normalized field is read from a raw finding"""
+    target: str
+    # Keys leading to the value in the raw finding, or None for a field that is never set
+    source: Optional[Tuple[str, ...]]
+    # Value map applied first, keyed by the raw value as a string; other values are kept
+    value_map: Tuple[Tuple[str, Any], ...] = ()
+    # Used when the raw finding has no value (after mapping)
+    default: Any = None
+    coerce: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class FieldMapping:
+    """
+    Per-tool mapping of raw findings onto the normalized fields.
+
+    Configured in the tool's JSON configuration; fields it does not list are
+    read from the raw key of the same name:
+
+        {"field_mapping": {
+            "ip_destination": "target_ip",                 # raw key, or a dotted path
+            "cvss_base_score": {"source": "cvss.base", "type": "float"},
+            "severity": {"source": "risk", "map": {"0": "Info", "4": "Critical"}, "default": "Info"},
+            "country_code": null                           # never set
+        }}
+
+    The mapping is compiled once into a generated extractor function (see
+    extractor), so findings are mapped without interpreting the rules again.
+    The mapping is plain data and can be handed to pool workers, which
+    compile it themselves.
+    """
+    rules: Tuple[FieldRule, ...]
+
+    @classmethod
+    def from_configuration(cls, configuration: Union[str, Mapping[str, Any], None]) -> Optional["FieldMapping"]:
+        """
+        Build the mapping from a tool configuration (JSON text or parsed).
+
+        Returns:
+            The mapping, or None when the configuration defines no field mapping
+
+        Raises:
+            ValueError: If the field mapping is malformed
+        """
+        configuration = load_configuration(configuration)
+        if configuration is None:
+            return None
+
+        fields = configuration.get(CONFIGURATION_KEY)
+        if not fields:
+            return None
+        if not isinstance(fields, Mapping):
+            raise ValueError(f"'{CONFIGURATION_KEY}' must be an object")
+
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown normalized field(s): {', '.join(sorted(unknown))}")
+
+        return cls(rules=tuple(
+            cls._rule(target, fields[target]) if target in fields else FieldRule(target, (target,))
+            for target in FIELDS
+        ))
+
+    @staticmethod
+    def _rule(target: str, spec: Any) -> FieldRule:
+        if spec is None:
+            return FieldRule(target, None)
+        if isinstance(spec, str):
+            spec = {"source": spec}
+        if not isinstance(spec, Mapping):
+            raise ValueError(f"Mapping of {target} must be a raw key, an object or null")
+
+        unknown = set(spec) - {"source", "type", "map", "default"}
+        if unknown:
+            raise ValueError(f"Unknown option(s) for {target}: {', '.join(sorted(unknown))}")
+
+        source = spec.get("source", target)
+        if not isinstance(source, str) or not source or "" in source.split("."):
+            raise ValueError(f"source of {target} must be a raw key or a dotted path")
+
+        coerce = spec.get("type")
+        if coerce is not None and coerce not in COERCIONS:
+            raise ValueError(f"type of {target} must be one of {', '.join(COERCIONS)}, got {coerce!r}")
+
+        value_map = spec.get("map") or {}
+        if not isinstance(value_map, Mapping) or not all(isinstance(v, _SCALAR_TYPES) for v in value_map.values()):
+            raise ValueError(f"map of {target} must be an object of plain values")
+
+        default = spec.get("default")
+        if not isinstance(default, _SCALAR_TYPES):
+            raise ValueError(f"default of {target} must be a plain value")
+
+        return FieldRule(
+            target=target,
+            source=tuple(source.split(".")),
+            value_map=tuple((str(key), value) for key, value in value_map.items()),
+            default=default,
+            coerce=coerce,
+        )
+
+    def extractor(self) -> Extractor:
+        """The compiled extractor of this mapping"""
+        return _compile(self)
+
+    def apply(self, finding: Mapping[str, Any]) -> Dict[str, Any]:
+        """Mapped fields of one raw finding, as Normalizer.normalize reads them"""
+        return dict(zip(FIELDS, self.extractor()(finding)))
+
+
+def _dig(value: Any, path: Sequence[str]) -> Any:
+    """Follow the rest of a dotted path through nested objects"""
+    for key in path:
+        if not isinstance(value, Mapping):
+            return None
+        value = value.get(key)
+    return value
+
+
+@functools.lru_cache(maxsize=64)
+def _compile(mapping: FieldMapping) -> Extractor:
+    """
+    Generate the extractor of a mapping.
+
+    Each rule becomes a few straight-line statements; value maps, defaults and
+    coercions are bound as constants of the generated function.
+    """
+    namespace: Dict[str, Any] = {"_dig": _dig}
+    lines = ["def extract(finding):", "    get = finding.get"]
+    for index, rule in enumerate(mapping.rules):
+        value = f"f{index}"
+        if rule.source is None:
+            lines.append(f"    {value} = None")
+            continue
+
+        lines.append(f"    {value} = get({rule.source[0]!r})")
+        if len(rule.source) > 1:
+            lines.append(f"    {value} = _dig({value}, {rule.source[1:]!r})")
+        if rule.value_map:
+            namespace[f"_map{index}"] = dict(rule.value_map)
+            lines.append(f"    if {value} is not None:")
+            lines.append(f"        {value} = _map{index}.get({value} if {value}.__class__ is str else str({value}), {value})")
+        if rule.default is not None:
+            namespace[f"_default{index}"] = rule.default
+            lines.append(f"    if {value} is None:")
+            lines.append(f"        {value} = _default{index}")
+        if rule.coerce is not None:
+            namespace[f"_coerce{index}"] = COERCIONS[rule.coerce]
+            lines.append(f"    if {value} is not None:")
+            lines.append(f"        {value} = _coerce{index}({value})")
+    lines.append(f"    return ({', '.join(f'f{index}' for index in range(len(mapping.rules)))},)")
+
+    exec(compile("\n".join(lines), f"<field mapping {id(mapping):x}>", "exec"), namespace)
+    return namespace["extract"]
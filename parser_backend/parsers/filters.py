@@ -0,0 +1,114 @@
+import json
+from dataclasses import dataclass
+from typing import Any, FrozenSet, Mapping, Optional, Union
+
+# Key of the ingest filters in a tool's JSON configuration
+CONFIGURATION_KEY = "ingest_filters"
+
+SEVERITY_LEVELS = {"info": 0, "low": 1, "medium": 2, "high": 3, "critical": 4}
+
+
+def load_configuration(configuration: Union[str, Mapping[str, Any], None]) -> Optional[Mapping[str, Any]]:
+    """
+    Parse a tool's JSON configuration.
+
+    Returns:
+        The configuration object, or None when there is none (or it is not an object)
+
+    Raises:
+        ValueError: If the configuration is not valid JSON
+    """
+    if not configuration:
+        return None
+    if isinstance(configuration, str):
+        try:
+            configuration = json.loads(configuration)
+        except json.JSONDecodeError:
+            raise ValueError("Tool configuration must be valid JSON")
+    if not isinstance(configuration, Mapping):
+        return None
+    return configuration
+
+
+@dataclass(frozen=True)
+class IngestFilter:
+    """
+    Per-tool rules deciding which report items are ingested.
+
+    Rules only look at item attributes (severity, pluginID, pluginFamily), so
+    they are checked before anything else is extracted from an item. They are
+    configured in the tool's JSON configuration:
+
+        {"ingest_filters": {
+            "min_severity": "low",           # or 0-4
+            "plugin_allow": ["19506"],       # only these plugins, if given
+            "plugin_deny": ["10114"],
+            "exclude_families": ["General"]
+        }}
+    """
+    min_severity: int = 0
+    plugin_allow: FrozenSet[str] = frozenset()
+    plugin_deny: FrozenSet[str] = frozenset()
+    exclude_families: FrozenSet[str] = frozenset()
+
+    @classmethod
+    def from_configuration(cls, configuration: Union[str, Mapping[str, Any], None]) -> Optional["IngestFilter"]:
+        """
+        Build the filter from a tool configuration (JSON text or parsed).
+
+        Returns:
+            The filter, or None when the configuration defines no ingest filters
+
+        Raises:
+            ValueError: If the ingest filters are malformed
+        """
+        configuration = load_configuration(configuration)
+        if configuration is None:
+            return None
+
+        rules = configuration.get(CONFIGURATION_KEY)
+        if not rules:
+            return None
+        if not isinstance(rules, Mapping):
+            raise ValueError(f"'{CONFIGURATION_KEY}' must be an object")
+
+        unknown = set(rules) - {"min_severity", "plugin_allow", "plugin_deny", "exclude_families"}
+        if unknown:
+            raise ValueError(f"Unknown ingest filter(s): {', '.join(sorted(unknown))}")
+
+        return cls(
+            min_severity=cls._severity(rules.get("min_severity", 0)),
+            plugin_allow=cls._string_set(rules, "plugin_allow"),
+            plugin_deny=cls._string_set(rules, "plugin_deny"),
+            exclude_families=frozenset(family.lower() for family in cls._string_set(rules, "exclude_families")),
+        )
+
+    @staticmethod
+    def _severity(value: Any) -> int:
+        if isinstance(value, str) and value.lower() in SEVERITY_LEVELS:
+            return SEVERITY_LEVELS[value.lower()]
+        if isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= 4:
+            return value
+        raise ValueError(f"min_severity must be 0-4 or one of {', '.join(SEVERITY_LEVELS)}, got {value!r}")
+
+    @staticmethod
+    def _string_set(rules: Mapping[str, Any], key: str) -> FrozenSet[str]:
+        values = rules.get(key) or []
+        if not isinstance(values, list):
+            raise ValueError(f"{key} must be a list")
+        return frozenset(str(value) for value in values)
+
+    def accepts(self, attributes: Mapping[str, str]) -> bool:
+        """Check a report item from its raw attributes"""
+        plugin_id = attributes.get("pluginID", "")
+        if self.plugin_allow and plugin_id not in self.plugin_allow:
+            return False
+        if plugin_id in self.plugin_deny:
+            return False
+        if self.min_severity:
+            severity = attributes.get("severity", "0")
+            if not severity.isdigit() or int(severity) < self.min_severity:
+                return False
+        if self.exclude_families and (attributes.get("pluginFamily") or "").lower() in self.exclude_families:
+            return False
+        return True
@@ -1,8 +1,19 @@
 import xml.etree.ElementTree as ET
+import io
+import os
 import re
-from typing import Dict, List, Optional, Any, Generator
+import mmap
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Any, Generator, BinaryIO, Tuple, Union
 from dataclasses import dataclass, asdict
 
+from parsers.filters import IngestFilter
+from parsers.provenance import ByteRange, ElementLocator
+from parsers.registry import SNIFF_BYTES, UTF16_BOMS, normalize_prefix
+from parsers.report_source import ReportInput, open_report
+from parsers.xml_backends import READ_BLOCK_BYTES, XMLBackend, XMLParseError, UnexpectedRootError, get_backend
+
 import logging
 from core.logging import setup_logger
 logger = setup_logger(__name__, level=logging.INFO)
@@ -23,12 +34,15 @@ class NessusFinding:
     cvss_base_score: float = 0.0
     exploitable: bool = False
     metasploit_available: bool = False
-    metasploit_name: Optional[str] = None
-    details: Optional[str] = None
-    solution: Optional[str] = None
+    plugin_output: Optional[str] = None
     port: Optional[int] = None
     protocol: Optional[str] = None
     service: Optional[str] = None
+    # Byte ranges of the ReportItem and its ReportHost in the decompressed report
+    source_offset: Optional[int] = None
+    source_length: Optional[int] = None
+    host_offset: Optional[int] = None
+    host_length: Optional[int] = None
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary, excluding None values"""
@@ -52,48 +66,59 @@ class NessusParser:
     # Plugin IDs to skip (informational plugins)
     SKIP_PLUGIN_IDS = {"19506", "10287", "11936"}  # Common scan info plugins
     
-    def __init__(self, max_findings: Optional[int] = None):
+    # Read for the scan metadata of its host, so it is never left out of the parsed tree
+    SCAN_INFO_PLUGIN_NAME = "Nessus Scan Information"
+    
+    # Target size of the ReportHost chunks handed to each worker in parallel mode
+    PARALLEL_CHUNK_BYTES = 8 * 1024 * 1024
+    
+    def __init__(self, 
+                 max_findings: Optional[int] = None, 
+                 xml_backend: Optional[str] = None,
+                 ingest_filter: Optional[IngestFilter] = None,
+                 record_offsets: bool = False):
         """
         Initialize parser.
         
         Args:
             max_findings: Maximum number of findings to return (for large reports)
+            xml_backend: Name of the streaming XML backend (defaults to the one selected at startup)
+            ingest_filter: Tool rules for the report items to ingest; items it rejects are dropped and counted
+            record_offsets: Record in each finding the byte ranges of its ReportItem and ReportHost,
+                so that read_finding can re-parse it from the stored report later
         """
         self.max_findings = max_findings
+        self.xml_backend: XMLBackend = get_backend(xml_backend)
+        self.ingest_filter = ingest_filter
+        self.record_offsets = record_offsets
         self.findings_count = 0
+        # Report items rejected by the ingest filter
+        self.dropped_count = 0
+        # Plugin-level text and scores keyed by plugin ID, filled once per plugin
+        self.plugin_catalog: Dict[str, Dict[str, Any]] = {}
+        # Whether _skip_element left each report item out, in document order, while recording offsets
+        self._skipped_items: deque = deque()
     
-    def check_nessus_v2_format(self, xml_content: str) -> bool:
+    def check_nessus_v2_format(self, xml_content: Union[str, bytes]) -> bool:
         """
         Check if the XML content is in Nessus v2 format.
         
+        Only the first few KB are inspected: the NessusClientData_v2 root
+        element is always at the top of a Nessus v2 export, so the check runs
+        in constant time regardless of the report size.
+        
         Args:
             xml_content: The XML content to check
             
         Returns:
             bool: True if the content appears to be a Nessus v2 report
         """
-        # Check for Nessus v2 specific markers
-        nessus_markers = [
-            "<NessusClientData_v2",
-            "<Report",
-            "<ReportHost",
-            "<ReportItem",
-            "pluginID=",
-            "pluginName="
-        ]
+        if isinstance(xml_content, bytes):
+            is_nessus = b"<NessusClientData_v2" in normalize_prefix(xml_content[:SNIFF_BYTES])
+        else:
+            is_nessus = "<NessusClientData_v2" in xml_content[:SNIFF_BYTES]
         
-        # Content should contain multiple Nessus-specific markers
-        marker_count = sum(1 for marker in nessus_markers if marker in xml_content)
-        
-        # Additional checks for common Nessus elements
-        has_policy = "<Policy>" in xml_content or "policy" in xml_content.lower()
-        has_preferences = "<Preferences>" in xml_content or "preference" in xml_content.lower()
-        has_plugin_output = "plugin_output" in xml_content
-        
-        # Must have at least 3 markers and some Nessus-specific content
-        is_nessus = marker_count >= 3 and (has_policy or has_preferences or has_plugin_output)
-        
-        logger.info(f"Nessus format check: {marker_count} markers found, is_nessus: {is_nessus}")
+        logger.info(f"Nessus format check: is_nessus: {is_nessus}")
         return is_nessus
     
     def validate_xml_structure(self, root: ET.Element) -> bool:
@@ -131,12 +156,13 @@ class NessusParser:
         logger.info(f"Valid Nessus structure: {len(report_hosts)} hosts, {len(report_items)} items")
         return True
         
-    def parse_report(self, file_content: str, filename: str) -> List[Dict[str, Any]]:
+    def parse_report(self, file_content: Union[str, bytes], filename: str) -> List[Dict[str, Any]]:
         """
         Parse a Nessus XML report and return findings.
         
         Args:
-            file_content: The content of the Nessus XML file
+            file_content: The content of the Nessus XML file, as text or as raw bytes
+                (bytes are decoded according to the XML declaration)
             filename: The name of the file being parsed
             
         Returns:
@@ -185,6 +211,334 @@ class NessusParser:
             logger.error(f"Unexpected error parsing {filename}: {str(e)}")
             raise ValueError(f"Error parsing Nessus file '{filename}': {str(e)}")
     
+    def parse_report_stream(self, report: ReportInput, filename: str) -> Generator[List[Dict[str, Any]], None, None]:
+        """
+        Incrementally parse a Nessus XML report.
+        
+        The report can be a path (memory-mapped), a binary buffer or an open
+        binary stream. It is never decoded as a whole: the XML backend decodes
+        the bytes according to the document's own encoding declaration.
+        
+        Only one ReportHost subtree is held in memory at a time: each host is
+        turned into findings as soon as its closing tag is read, then released
+        by the XML backend. Peak memory therefore depends on the
+        largest single host rather than on the size of the report.
+        Plugin-level details are collected once per plugin in plugin_catalog.
+        
+        Args:
+            report: Path, binary buffer or binary stream positioned at the start of the report
+            filename: The name of the file being parsed
+            
+        Yields:
+            List of findings dictionaries for each ReportHost, in document order
+            
+        Raises:
+            ValueError: If the file is not a valid Nessus v2 report
+        """
+        try:
+            with open_report(report) as source:
+                stream = source.stream
+                if self.record_offsets and source.prefix[:2] not in UTF16_BOMS:
+                    stream = ElementLocator(stream, ("ReportHost", "ReportItem"))
+                yield from self._parse_hosts(stream, filename)
+        except UnexpectedRootError:
+            raise ValueError(
+                f"File '{filename}' does not appear to be a valid Nessus v2 report. "
+                "Please ensure you're uploading a Nessus XML export file."
+            )
+        except XMLParseError as e:
+            logger.error(f"XML parsing failed for {filename}: {str(e)}")
+            raise ValueError(f"Invalid XML format in '{filename}': {str(e)}")
+    
+    def _parse_hosts(self, report_stream: BinaryIO, filename: str) -> Generator[List[Dict[str, Any]], None, None]:
+        """Generate the findings of each ReportHost streamed by the XML backend"""
+        hosts_count = 0
+        items_count = 0
+        locator = report_stream if isinstance(report_stream, ElementLocator) else None
+        
+        for report_host in self.xml_backend.iter_subtrees(
+            report_stream, "ReportHost", "NessusClientData_v2", skip=self._skip_element
+        ):
+            hosts_count += 1
+            report_items = report_host.findall(".//ReportItem")
+            items_count += len(report_items)
+            host_range, item_ranges = self._locate_host(locator, report_items)
+            
+            # The structure check that validate_xml_structure does up front
+            # can only be done on the first host when streaming
+            if hosts_count == 1 and report_items and not any(
+                item.get("pluginID") and item.get("pluginName")
+                for item in report_items[:5]
+            ):
+                logger.warning("No plugin attributes found in ReportItems - not a valid Nessus report")
+                raise ValueError(
+                    f"File '{filename}' does not have valid Nessus report structure. "
+                    "Please check that this is a properly exported Nessus XML file."
+                )
+            
+            host_findings = list(self._parse_host(report_host, report_items, host_range, item_ranges))
+            if host_findings:
+                yield host_findings
+            
+            if self.max_findings and self.findings_count >= self.max_findings:
+                return
+        
+        if hosts_count == 0 or items_count + self.dropped_count == 0:
+            logger.warning(f"No ReportHost/ReportItem elements found in {filename} - not a valid Nessus report")
+            raise ValueError(
+                f"File '{filename}' does not have valid Nessus report structure. "
+                "Please check that this is a properly exported Nessus XML file."
+            )
+        
+        logger.info(f"Streamed {self.findings_count} findings from {hosts_count} hosts in {filename}")
+        if self.dropped_count:
+            logger.info(f"Ingest filters dropped {self.dropped_count} report items from {filename}")
+    
+    def parse_report_parallel(self, 
+                              file_path: str, 
+                              filename: str, 
+                              workers: Optional[int] = None,
+                              chunk_bytes: Optional[int] = None) -> Generator[List[Dict[str, Any]], None, None]:
+        """
+        Parse a Nessus XML report on several cores.
+        
+        The file is memory-mapped and split on ReportHost boundaries into
+        chunks of roughly chunk_bytes. Each chunk is parsed in a worker
+        process with the same host and finding extraction as the other
+        modes. Results are yielded in document order and max_findings is
+        applied to the merged stream. If the parse is aborted (an error, a
+        time limit, or the consumer closing the generator), it returns
+        without waiting for the chunks still being parsed.
+        
+        Args:
+            file_path: Path of the report on disk
+            filename: The name of the file being parsed
+            workers: Number of worker processes (defaults to the CPU count)
+            chunk_bytes: Target size of each chunk in bytes
+            
+        Yields:
+            List of findings dictionaries for each chunk, in document order
+            
+        Raises:
+            ValueError: If the file is not a valid Nessus v2 report
+        """
+        chunk_bytes = chunk_bytes or self.PARALLEL_CHUNK_BYTES
+        
+        with open(file_path, "rb") as f:
+            try:
+                report = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                report = None
+            
+            if report is not None and report[:2] in UTF16_BOMS:
+                # Hosts cannot be located with byte searches in UTF-16 documents
+                report.close()
+                logger.info(f"{filename} is UTF-16 encoded, parsing it as a single stream")
+                yield from self.parse_report_stream(file_path, filename)
+                return
+            
+            if report is None or b"<NessusClientData_v2" not in report[:SNIFF_BYTES]:
+                raise ValueError(
+                    f"File '{filename}' does not appear to be a valid Nessus v2 report. "
+                    "Please ensure you're uploading a Nessus XML export file."
+                )
+            
+            with report:
+                header, ranges = self._split_host_ranges(report, chunk_bytes)
+        
+        if not ranges:
+            logger.warning(f"No ReportHost elements found in {filename} - not a valid Nessus report")
+            raise ValueError(
+                f"File '{filename}' does not have valid Nessus report structure. "
+                "Please check that this is a properly exported Nessus XML file."
+            )
+        
+        workers = workers or os.cpu_count() or 1
+        logger.info(f"Parsing {filename} in {len(ranges)} chunks on {workers} workers")
+        tasks = [
+            (file_path, start, end, header, self.xml_backend.name, self.ingest_filter, self.record_offsets) 
+            for start, end in ranges
+        ]
+        
+        pool = ProcessPoolExecutor(max_workers=workers)
+        finished = False
+        # Keep a bounded number of chunks in flight so results don't pile up
+        pending = deque()
+        next_task = 0
+        
+        try:
+            while next_task < len(tasks) or pending:
+                while next_task < len(tasks) and len(pending) < 2 * workers:
+                    pending.append(pool.submit(_parse_host_chunk, tasks[next_task]))
+                    next_task += 1
+                
+                try:
+                    chunk_findings, chunk_catalog, chunk_dropped = pending.popleft().result()
+                except XMLParseError as e:
+                    logger.error(f"XML parsing failed for {filename}: {str(e)}")
+                    raise ValueError(f"Invalid XML format in '{filename}': {str(e)}")
+                
+                if self.max_findings:
+                    chunk_findings = chunk_findings[:self.max_findings - self.findings_count]
+                
+                for plugin_id, plugin in chunk_catalog.items():
+                    self.plugin_catalog.setdefault(plugin_id, plugin)
+                
+                self.findings_count += len(chunk_findings)
+                self.dropped_count += chunk_dropped
+                if chunk_findings:
+                    yield chunk_findings
+                
+                if self.max_findings and self.findings_count >= self.max_findings:
+                    logger.warning(f"Reached maximum findings limit: {self.max_findings}")
+                    return
+            finished = True
+        finally:
+            # Chunks already running finish in their processes, without holding up an aborted parse
+            pool.shutdown(wait=finished, cancel_futures=True)
+        
+        logger.info(f"Parsed {self.findings_count} findings from {filename} in parallel")
+        if self.dropped_count:
+            logger.info(f"Ingest filters dropped {self.dropped_count} report items from {filename}")
+    
+    def read_finding(self, 
+                     report: ReportInput, 
+                     filename: str, 
+                     source_offset: int, 
+                     host_offset: int, 
+                     host_length: int) -> Dict[str, Any]:
+        """
+        Re-parse one finding from the byte ranges recorded with record_offsets.
+        
+        Only the finding's ReportHost is read from the report (see
+        ReportSource.read_range) and parsed like any other host, so the
+        finding comes out exactly as it did when the report was ingested.
+        The report is opened twice (once for the tags the host is re-wrapped
+        in), so it must be a path, a buffer or a remote report, not a stream.
+        
+        Returns:
+            {"raw_xml": the ReportItem as it appears in the report, "raw_finding": finding dictionary}
+            
+        Raises:
+            ValueError: If the ranges do not hold the finding
+        """
+        header = self._read_header(report)
+        with open_report(report) as source:
+            host_bytes = source.read_range(host_offset, host_length)
+        
+        if not host_bytes.startswith(b"<ReportHost") or not host_offset <= source_offset < host_offset + len(host_bytes):
+            raise ValueError(f"No report host at offset {host_offset} of '{filename}'")
+        
+        # Re-wrap the host like a parallel-mode chunk, counting offsets in the report
+        document = ElementLocator(
+            io.BytesIO(header + host_bytes + b"</Report></NessusClientData_v2>"),
+            ("ReportHost", "ReportItem"),
+            base=host_offset - len(header)
+        )
+        self.record_offsets = True
+        try:
+            for report_host in self.xml_backend.iter_subtrees(document, "ReportHost", "NessusClientData_v2"):
+                report_items = report_host.findall(".//ReportItem")
+                host_range, item_ranges = self._locate_host(document, report_items)
+                for finding in self._parse_host(report_host, report_items, host_range, item_ranges):
+                    if finding.get("source_offset") == source_offset:
+                        raw_xml = host_bytes[source_offset - host_offset:][:finding["source_length"]]
+                        return {"raw_xml": self._decode(raw_xml, header), "raw_finding": finding}
+        except XMLParseError as e:
+            raise ValueError(f"Invalid XML format in '{filename}' at offset {host_offset}: {str(e)}")
+        
+        raise ValueError(f"No finding at offset {source_offset} of '{filename}'")
+    
+    @staticmethod
+    def _read_header(report: ReportInput) -> bytes:
+        """Header to re-wrap hosts of a report in (see _wrapper_header), read from its start"""
+        head = b""
+        with open_report(report) as source:
+            while b"<ReportHost" not in head[-(READ_BLOCK_BYTES + len(b"<ReportHost")):]:
+                block = source.stream.read(READ_BLOCK_BYTES)
+                if not block:
+                    break
+                head += block
+        return _wrapper_header(head.split(b"<ReportHost", 1)[0])
+    
+    @staticmethod
+    def _decode(content: bytes, declaration: bytes) -> str:
+        """Decode part of a report according to its XML declaration"""
+        encoding = re.search(rb"encoding\s*=\s*[\"']([A-Za-z0-9._-]+)", declaration)
+        try:
+            return content.decode(encoding.group(1).decode("ascii") if encoding else "utf-8", errors="replace")
+        except LookupError:
+            return content.decode("utf-8", errors="replace")
+    
+    def _locate_host(self, 
+                     locator: Optional[ElementLocator], 
+                     report_items: List[ET.Element]) -> Tuple[Optional[ByteRange], Optional[List[ByteRange]]]:
+        """
+        Byte ranges of the host just parsed and of its report items, from the locator.
+        
+        If they do not line up with the parsed tree (which a well-formed
+        Nessus export never causes), offsets are not recorded for the rest
+        of the report rather than recorded wrong.
+        """
+        if locator is None or not self.record_offsets:
+            self._skipped_items.clear()
+            return None, None
+        
+        host_range = locator.next_range("ReportHost")
+        item_ranges = []
+        for _ in report_items:
+            # Items the backend left out of the tree were located all the same; drop their ranges
+            while self._skipped_items and self._skipped_items.popleft():
+                locator.next_range("ReportItem")
+            item_ranges.append(locator.next_range("ReportItem"))
+        if host_range is None or any(
+            item_range is None or not host_range[0] < item_range[0] < host_range[0] + host_range[1]
+            for item_range in item_ranges
+        ):
+            logger.warning("Report item offsets do not match the parsed report; not recording them")
+            self.record_offsets = False
+            return None, None
+        return host_range, item_ranges
+    
+    def _split_host_ranges(self, report: mmap.mmap, chunk_bytes: int) -> Tuple[bytes, List[Tuple[int, int]]]:
+        """
+        Find byte ranges of consecutive ReportHost elements.
+        
+        Markup characters inside text are always escaped in Nessus exports, so
+        the raw ReportHost tags can be located with plain byte searches
+        without parsing the XML.
+        
+        Returns:
+            The header to re-wrap the chunks in (see _wrapper_header) and a
+            list of (start, end) byte ranges
+        """
+        ranges = []
+        chunk_start = None
+        position = report.find(b"<ReportHost")
+        header = _wrapper_header(report[:position if position != -1 else SNIFF_BYTES])
+        while position != -1:
+            host_end = report.find(b"</ReportHost>", position)
+            if host_end == -1:
+                # Unterminated host; let the XML parser report the error
+                host_end = len(report)
+            else:
+                host_end += len(b"</ReportHost>")
+            
+            if chunk_start is None:
+                chunk_start = position
+            if host_end - chunk_start >= chunk_bytes:
+                ranges.append((chunk_start, host_end))
+                chunk_start = None
+            
+            position = report.find(b"<ReportHost", host_end)
+            last_end = host_end
+        
+        if chunk_start is not None:
+            ranges.append((chunk_start, last_end))
+        
+        return header, ranges
+    
     def _parse_findings(self, root: ET.Element) -> Generator[Dict[str, Any], None, None]:
         """Generate findings from the XML root element"""
         report_hosts = root.findall(".//ReportHost")
@@ -194,30 +548,71 @@ class NessusParser:
             return
         
         for report_host in report_hosts:
-            # Extract host information
-            host_info = self._extract_host_info(report_host)
+            yield from self._parse_host(report_host)
+            if self.max_findings and self.findings_count >= self.max_findings:
+                return
+    
+    def _parse_host(self, 
+                    report_host: ET.Element, 
+                    report_items: Optional[List[ET.Element]] = None,
+                    host_range: Optional[ByteRange] = None,
+                    item_ranges: Optional[List[ByteRange]] = None) -> Generator[Dict[str, Any], None, None]:
+        """Generate findings from a single ReportHost element, with their byte ranges if they were located"""
+        # Extract host information
+        host_info = self._extract_host_info(report_host)
+        
+        # Extract scan metadata
+        scan_info = self._extract_scan_info(report_host)
+        
+        # Process report items
+        if report_items is None:
+            report_items = report_host.findall(".//ReportItem")
+        
+        for index, report_item in enumerate(report_items):
+            # Check if we've reached the max findings limit
+            if self.max_findings and self.findings_count >= self.max_findings:
+                logger.warning(f"Reached maximum findings limit: {self.max_findings}")
+                return
             
-            # Extract scan metadata
-            scan_info = self._extract_scan_info(report_host)
+            # Skip informational plugins
+            plugin_id = report_item.get("pluginID", "")
+            if plugin_id in self.SKIP_PLUGIN_IDS:
+                continue
             
-            # Process report items
-            report_items = report_host.findall(".//ReportItem")
+            # Tool ingest filters, on the raw attributes before any text is extracted
+            if self.ingest_filter is not None and not self.ingest_filter.accepts(report_item.attrib):
+                self.dropped_count += 1
+                continue
             
-            for report_item in report_items:
-                # Check if we've reached the max findings limit
-                if self.max_findings and self.findings_count >= self.max_findings:
-                    logger.warning(f"Reached maximum findings limit: {self.max_findings}")
-                    return
-                
-                # Skip informational plugins
-                plugin_id = report_item.get("pluginID", "")
-                if plugin_id in self.SKIP_PLUGIN_IDS:
-                    continue
-                
-                finding = self._create_finding(report_item, host_info, scan_info)
-                if finding:
-                    self.findings_count += 1
-                    yield finding.to_dict()
+            finding = self._create_finding(report_item, host_info, scan_info)
+            if finding:
+                if item_ranges is not None:
+                    finding.source_offset, finding.source_length = item_ranges[index]
+                    finding.host_offset, finding.host_length = host_range
+                self.findings_count += 1
+                yield finding.to_dict()
+    
+    def _skip_element(self, tag: str, attributes: Dict[str, str]) -> bool:
+        """
+        Leave report items the ingest filter rejects out of the parsed tree.
+        
+        Only backends that build the tree themselves use this; _parse_host
+        filters again for the others, so dropped items are counted here or there.
+        While offsets are recorded, every decision on a report item is kept
+        for _locate_host, which has to pass over the ranges of skipped items.
+        """
+        if self.ingest_filter is None or tag != "ReportItem":
+            return False
+        skipped = (
+            attributes.get("pluginID", "") not in self.SKIP_PLUGIN_IDS
+            and attributes.get("pluginName") != self.SCAN_INFO_PLUGIN_NAME
+            and not self.ingest_filter.accepts(attributes)
+        )
+        if self.record_offsets:
+            self._skipped_items.append(skipped)
+        if skipped:
+            self.dropped_count += 1
+        return skipped
     
     def _extract_host_info(self, report_host: ET.Element) -> Dict[str, Optional[str]]:
         """Extract host information from ReportHost element"""
@@ -276,64 +671,74 @@ class NessusParser:
         
         return scan_info
     
+    def _catalog_plugin(self, report_item: ET.Element, plugin_id: str) -> Dict[str, Any]:
+        """Return the catalog entry for a plugin, extracting it on first sight"""
+        plugin = self.plugin_catalog.get(plugin_id)
+        if plugin is not None:
+            return plugin
+        
+        # Extract CVSS score
+        cvss_base_score = 0.0
+        cvss_text = report_item.findtext("cvss_base_score", "0.0")
+        try:
+            cvss_base_score = float(cvss_text)
+        except ValueError:
+            logger.warning(f"Invalid CVSS score: {cvss_text}")
+        
+        # Check exploitation availability
+        metasploit_available = report_item.findtext("exploit_framework_metasploit", "false").lower() == "true"
+        
+        plugin = {
+            "plugin_id": plugin_id,
+            "name": report_item.get("pluginName", "Unknown"),
+            "family": report_item.get("pluginFamily"),
+            "description": report_item.findtext("description", "").strip() or None,
+            "solution": report_item.findtext("solution", "").strip() or None,
+            "cvss_base_score": cvss_base_score,
+            "exploitable": report_item.findtext("exploit_available", "false").lower() == "true",
+            "metasploit_available": metasploit_available,
+            "metasploit_name": report_item.findtext("metasploit_name") if metasploit_available else None,
+        }
+        self.plugin_catalog[plugin_id] = plugin
+        return plugin
+    
     def _create_finding(self, 
                        report_item: ET.Element, 
                        host_info: Dict[str, Optional[str]], 
                        scan_info: Dict[str, Optional[str]]) -> Optional[NessusFinding]:
-        """Create a finding from a ReportItem element"""
+        """
+        Create a finding from a ReportItem element.
+        
+        Plugin-level text (description, solution, ...) goes to the plugin
+        catalog once per plugin; the finding only carries the host-specific
+        plugin output and references the catalog by plugin_id.
+        """
         try:
             # Extract basic information
             severity_num = report_item.get("severity", "0")
             severity = self.SEVERITY_MAP.get(severity_num, "Info")
             
             # Extract vulnerability details
-            vulnerability_name = report_item.get("pluginName", "Unknown")
             plugin_id = report_item.get("pluginID", "")
             port = report_item.get("port", "0")
             protocol = report_item.get("protocol", "")
             service = report_item.get("svc_name", "")
+            plugin = self._catalog_plugin(report_item, plugin_id)
             
-            # Extract description and solution
-            description = report_item.findtext("description", "").strip()
+            # Host-specific output
             plugin_output = report_item.findtext("plugin_output", "").strip()
-            solution = report_item.findtext("solution", "").strip()
-            
-            # Build details field
-            details_parts = []
-            if description:
-                details_parts.append(f"Description: {description}")
-            if plugin_output:
-                details_parts.append(f"Plugin Output: {plugin_output}")
-            details = "\n\n".join(details_parts) if details_parts else None
-            
-            # Extract CVSS score
-            cvss_base_score = 0.0
-            cvss_text = report_item.findtext("cvss_base_score", "0.0")
-            try:
-                cvss_base_score = float(cvss_text)
-            except ValueError:
-                logger.warning(f"Invalid CVSS score: {cvss_text}")
-            
-            # Check exploitation availability
-            exploit_available = report_item.findtext("exploit_available", "false").lower() == "true"
-            metasploit_available = report_item.findtext("exploit_framework_metasploit", "false").lower() == "true"
-            metasploit_name = None
-            if metasploit_available:
-                metasploit_name = report_item.findtext("metasploit_name")
             
             # Create finding object
             finding = NessusFinding(
                 **host_info,
                 **scan_info,
-                vulnerability_name=vulnerability_name,
+                vulnerability_name=plugin["name"],
                 plugin_id=plugin_id,
                 severity=severity,
-                cvss_base_score=cvss_base_score,
-                exploitable=exploit_available,
-                metasploit_available=metasploit_available,
-                metasploit_name=metasploit_name,
-                details=details,
-                solution=solution,
+                cvss_base_score=plugin["cvss_base_score"],
+                exploitable=plugin["exploitable"],
+                metasploit_available=plugin["metasploit_available"],
+                plugin_output=plugin_output if plugin_output else None,
                 port=int(port) if port.isdigit() else None,
                 protocol=protocol if protocol else None,
                 service=service if service else None
@@ -343,4 +748,53 @@ class NessusParser:
             
         except Exception as e:
             logger.error(f"Error creating finding: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+# Start tags of the document root and of the Report element, quoted attribute values included
+_ROOT_START_TAG = re.compile(rb"""<NessusClientData_v2(?=[\s/>])(?:[^>"']|"[^"]*"|'[^']*')*>""")
+_REPORT_START_TAG = re.compile(rb"""<Report(?=[\s/>])(?:[^>"']|"[^"]*"|'[^']*')*>""")
+
+
+def _wrapper_header(head: bytes) -> bytes:
+    """
+    XML declaration and root and Report start tags of a report, from its bytes before the first ReportHost.
+    
+    Hosts taken out of the report are re-wrapped in these original tags, so the
+    namespaces they declare (e.g. cm: in compliance checks) stay declared.
+    """
+    declaration = re.match(rb"<\?xml[^>]*\?>", head)
+    root = _ROOT_START_TAG.search(head)
+    report = _REPORT_START_TAG.search(head, root.end()) if root else None
+    return (
+        (declaration.group(0) if declaration else b"")
+        + (root.group(0) if root else b"<NessusClientData_v2>")
+        + (report.group(0) if report else b"<Report>")
+    )
+
+
+def _parse_host_chunk(
+    task: Tuple[str, int, int, bytes, str, Optional[IngestFilter], bool]
+) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]], int]:
+    """Parse a byte range of consecutive ReportHost elements (process pool worker)"""
+    file_path, start, end, header, xml_backend, ingest_filter, record_offsets = task
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        chunk = f.read(end - start)
+    
+    # Re-wrap the hosts so the chunk is a well-formed document in the original encoding
+    document: BinaryIO = io.BytesIO(header + chunk + b"</Report></NessusClientData_v2>")
+    if record_offsets:
+        # Offsets are counted in the report, not in the re-wrapped chunk
+        document = ElementLocator(document, ("ReportHost", "ReportItem"), base=start - len(header))
+    
+    parser = NessusParser(xml_backend=xml_backend, ingest_filter=ingest_filter, record_offsets=record_offsets)
+    findings = []
+    for report_host in parser.xml_backend.iter_subtrees(
+        document, "ReportHost", "NessusClientData_v2", skip=parser._skip_element
+    ):
+        report_items = report_host.findall(".//ReportItem")
+        host_range, item_ranges = parser._locate_host(
+            document if record_offsets else None, report_items
+        )
+        findings.extend(parser._parse_host(report_host, report_items, host_range, item_ranges))
+    return findings, parser.plugin_catalog, parser.dropped_count
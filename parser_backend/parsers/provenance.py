@@ -0,0 +1,113 @@
+import re
+from collections import deque
+from typing import BinaryIO, Deque, Dict, Iterable, Optional, Tuple
+
+# (offset, length) of an element in the decompressed report
+ByteRange = Tuple[int, int]
+
+# End of a start tag, skipping over quoted attribute values (which may contain '>')
+_START_TAG_END = re.compile(rb"""(?:[^>"']|"[^"]*"|'[^']*')*?(/?)>""")
+_TAG_DELIMITERS = b" \t\r\n/>"
+
+
+class _TagScanner:
+    """
+    Finds the byte ranges of the elements with one tag in a stream fed block by block.
+
+    The elements must not nest within each other and their tags must not
+    appear in text, which holds for Nessus exports: markup characters are
+    always escaped there (see NessusParser._split_host_ranges).
+    """
+
+    def __init__(self, tag: str, base: int):
+        self._open = b"<" + tag.encode("ascii")
+        self._close = b"</" + tag.encode("ascii")
+        self.ranges: Deque[ByteRange] = deque()
+        self._buffer = b""
+        # Report offset of the first buffered byte
+        self._buffer_start = base
+        # Start of the element being scanned, and whether its start tag was read
+        self._element_start: Optional[int] = None
+        self._in_content = False
+
+    def feed(self, data: bytes) -> None:
+        buffer = self._buffer + data
+        position = 0
+        while True:
+            if self._element_start is None:
+                found = buffer.find(self._open, position)
+                if found == -1:
+                    # Keep what could be the beginning of a split start tag
+                    position = max(position, len(buffer) - len(self._open))
+                    break
+                delimiter = found + len(self._open)
+                if delimiter >= len(buffer):
+                    position = found
+                    break
+                if buffer[delimiter] not in _TAG_DELIMITERS:
+                    # A longer tag name, e.g. <ReportItems>
+                    position = found + 1
+                    continue
+                self._element_start = self._buffer_start + found
+                self._in_content = False
+                position = delimiter
+            elif not self._in_content:
+                match = _START_TAG_END.match(buffer, position)
+                if match is None:
+                    break
+                position = match.end()
+                if match.group(1):
+                    self._end_element(self._buffer_start + position)
+                else:
+                    self._in_content = True
+            else:
+                found = buffer.find(self._close, position)
+                if found == -1:
+                    position = max(position, len(buffer) - len(self._close))
+                    break
+                end = buffer.find(b">", found)
+                if end == -1:
+                    position = found
+                    break
+                position = end + 1
+                self._end_element(self._buffer_start + position)
+
+        self._buffer = buffer[position:]
+        self._buffer_start += position
+
+    def _end_element(self, end: int) -> None:
+        self.ranges.append((self._element_start, end - self._element_start))
+        self._element_start = None
+
+
+class ElementLocator:
+    """
+    Binary stream wrapper recording where elements sit in the report.
+
+    Whatever reads the stream (any XML backend), the byte ranges of the
+    elements with the given tags are queued in document order, so the
+    caller can pop them as the parsed elements come out. Offsets are
+    counted from base, so a stream that starts mid-report still yields
+    report offsets.
+
+    Only ASCII-compatible encodings can be scanned this way; callers skip
+    the locator for UTF-16 reports.
+    """
+
+    def __init__(self, stream: BinaryIO, tags: Iterable[str], base: int = 0):
+        self._stream = stream
+        self._scanners: Dict[str, _TagScanner] = {tag: _TagScanner(tag, base) for tag in tags}
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        for scanner in self._scanners.values():
+            scanner.feed(data)
+        return data
+
+    def peek(self, size: int) -> bytes:
+        return self._stream.peek(size) if hasattr(self._stream, "peek") else b""
+
+    def next_range(self, tag: str) -> Optional[ByteRange]:
+        """Byte range of the next element with this tag, or None if none was read yet"""
+        ranges = self._scanners[tag].ranges
+        return ranges.popleft() if ranges else None
@@ -0,0 +1,134 @@
+import importlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import logging
+from core.logging import setup_logger
+logger = setup_logger(__name__, level=logging.INFO)
+
+# Number of leading bytes inspected to detect a report format
+SNIFF_BYTES = 4096
+
+UTF16_BOMS = (b"\xff\xfe", b"\xfe\xff")
+
+
+@dataclass
+class ParserSpec:
+    """Registry entry describing a parser without importing it"""
+    name: str
+    module: str
+    class_name: str
+    # Byte markers that must all appear in the sniffed prefix
+    signatures: Tuple[bytes, ...]
+    # Lowercased tool types and tool name fragments this parser is meant for
+    tool_types: Tuple[str, ...] = ()
+    name_hints: Tuple[str, ...] = ()
+    _parser_class: Optional[type] = field(default=None, repr=False, compare=False)
+
+    def matches(self, prefix: bytes) -> bool:
+        """Check whether a report prefix carries this format's signatures"""
+        return all(signature in prefix for signature in self.signatures)
+
+    def is_hinted_by(self, tool_name: Optional[str], tool_type: Optional[str]) -> bool:
+        """Check whether the tool metadata points at this parser"""
+        tool_name_lower = (tool_name or "").lower()
+        tool_type_lower = (tool_type or "").lower()
+        if self.tool_types and tool_type_lower not in self.tool_types:
+            return False
+        return any(hint in tool_name_lower for hint in self.name_hints)
+
+    def load(self) -> type:
+        """Import the parser module on first use and return the parser class"""
+        if self._parser_class is None:
+            module = importlib.import_module(self.module)
+            self._parser_class = getattr(module, self.class_name)
+            logger.info(f"Loaded parser '{self.name}' from {self.module}")
+        return self._parser_class
+
+    def create(self, **kwargs: Any) -> Any:
+        """Instantiate the parser"""
+        return self.load()(**kwargs)
+
+
+_REGISTRY: Dict[str, ParserSpec] = {}
+
+
+def register(spec: ParserSpec) -> None:
+    """Add a parser to the registry. The parser module is not imported."""
+    _REGISTRY[spec.name] = spec
+
+
+def registered_parsers() -> List[ParserSpec]:
+    """Return all registered parser specs"""
+    return list(_REGISTRY.values())
+
+
+def get_parser(name: str) -> ParserSpec:
+    """Return the registered parser with this name"""
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Unknown parser: {name}")
+
+
+def hinted_parser(tool_name: Optional[str], tool_type: Optional[str]) -> Optional[ParserSpec]:
+    """Return the parser the tool metadata points at, if any"""
+    for spec in _REGISTRY.values():
+        if spec.is_hinted_by(tool_name, tool_type):
+            return spec
+    return None
+
+
+def normalize_prefix(prefix: bytes) -> bytes:
+    """Re-encode UTF-16 prefixes so that ASCII signatures can be matched"""
+    if prefix[:2] in UTF16_BOMS:
+        # Drop a trailing half code unit before decoding
+        usable = prefix[:len(prefix) - (len(prefix) % 2)]
+        return usable.decode("utf-16", errors="ignore").encode("utf-8")
+    return prefix
+
+
+def detect(prefix: bytes,
+           tool_name: Optional[str] = None,
+           tool_type: Optional[str] = None) -> Optional[ParserSpec]:
+    """
+    Pick a parser by sniffing the first bytes of a report.
+
+    Only the first SNIFF_BYTES bytes are inspected, so detection cost does not
+    depend on the report size. The tool metadata is used as a hint: the hinted
+    parser is tried first, but the content decides.
+
+    Args:
+        prefix: Leading bytes of the report
+        tool_name: Name of the tool selected for the upload
+        tool_type: Type of the tool selected for the upload
+
+    Returns:
+        The matching ParserSpec, or None if no registered format matches
+    """
+    prefix = normalize_prefix(prefix[:SNIFF_BYTES])
+    hinted = hinted_parser(tool_name, tool_type)
+
+    if hinted is not None and hinted.matches(prefix):
+        return hinted
+
+    for spec in _REGISTRY.values():
+        if spec is not hinted and spec.matches(prefix):
+            if hinted is not None:
+                logger.warning(
+                    f"Tool '{tool_name}' suggests the {hinted.name} parser, "
+                    f"but the content looks like a {spec.name} report"
+                )
+            return spec
+
+    return None
+
+
+register(ParserSpec(
+    name="Nessus",
+    module="parsers.nessus",
+    class_name="NessusParser",
+    signatures=(b"<NessusClientData_v2",),
+    tool_types=("vulnerability scanner",),
+    name_hints=("nessus", "tenable"),
+))
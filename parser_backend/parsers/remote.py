@@ -0,0 +1,162 @@
+import io
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional
+
+import httpx
+
+# Size of the chunks pulled from a response body
+READ_CHUNK_BYTES = 256 * 1024
+
+
+@dataclass(frozen=True)
+class RemoteReport:
+    """
+    A stored report served over HTTP, e.g. by the dashboard's report endpoint.
+
+    The server must answer GET with the stored bytes and honour Range
+    requests, which seeking relies on. Being plain data, a RemoteReport can
+    be handed to pool workers, which open their own connections.
+    """
+    url: str
+    # Kept out of the repr, since it holds credentials
+    headers: Dict[str, str] = field(default_factory=dict, repr=False)
+    timeout: float = 60.0
+
+    def open(self) -> "HTTPReportStream":
+        return HTTPReportStream(self)
+
+    def fetch_sidecar(self, suffix: str) -> Optional[Any]:
+        """JSON document stored next to the report (url + suffix), or None if there is none"""
+        try:
+            response = httpx.get(self.url + suffix, headers=self.headers, timeout=self.timeout)
+        except httpx.HTTPError:
+            return None
+        if response.status_code != 200:
+            return None
+        try:
+            return response.json()
+        except json.JSONDecodeError:
+            return None
+
+
+class HTTPReportStream(io.RawIOBase):
+    """
+    Seekable, read-only binary stream over a RemoteReport.
+
+    The body is read as it arrives and never written to disk. Seeking
+    drops the current response; the next read asks for the rest of the
+    report from the new position with a Range request.
+    """
+
+    def __init__(self, report: RemoteReport):
+        self._report = report
+        # Content-Encoding would change the bytes the offsets refer to
+        self._client = httpx.Client(
+            headers={**report.headers, "Accept-Encoding": "identity"}, timeout=report.timeout
+        )
+        self._position = 0
+        self._response: Optional[httpx.Response] = None
+        self._chunks: Optional[Iterator[bytes]] = None
+        self._pending = memoryview(b"")
+        self.size: Optional[int] = None
+        try:
+            self._request(0)
+        except BaseException:
+            self._client.close()
+            raise
+
+    def _request(self, position: int) -> None:
+        self._drop_response()
+        request = self._client.build_request(
+            "GET", self._report.url, headers={"Range": f"bytes={position}-"} if position else {}
+        )
+        try:
+            response = self._client.send(request, stream=True)
+        except httpx.HTTPError as e:
+            raise OSError(f"Cannot fetch report from {self._report.url}: {str(e)}") from e
+
+        if response.status_code == 404:
+            response.close()
+            raise FileNotFoundError(f"Report not found at {self._report.url}")
+        if response.status_code in (401, 403):
+            response.close()
+            raise PermissionError(f"Not allowed to fetch report from {self._report.url} (check INTERNAL_SERVICE_TOKEN)")
+        if response.status_code == 416:
+            # Past the end of the report
+            response.close()
+            self._chunks = iter(())
+            return
+        if response.status_code not in (200, 206):
+            response.close()
+            raise OSError(f"Cannot fetch report from {self._report.url}: HTTP {response.status_code}")
+
+        if position == 0 and response.headers.get("content-length", "").isdigit():
+            self.size = int(response.headers["content-length"])
+        self._response = response
+        self._chunks = response.iter_bytes(READ_CHUNK_BYTES)
+        if position and response.status_code == 200:
+            # The server ignored the Range header and sent the whole report
+            self._discard(position)
+
+    def _discard(self, size: int) -> None:
+        while size > 0:
+            chunk = next(self._chunks, b"")
+            if not chunk:
+                break
+            if len(chunk) > size:
+                self._pending = memoryview(chunk)[size:]
+            size -= len(chunk)
+
+    def _drop_response(self) -> None:
+        if self._response is not None:
+            self._response.close()
+        self._response = None
+        self._chunks = None
+        self._pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._chunks is None:
+            self._request(self._position)
+        while not self._pending:
+            try:
+                chunk = next(self._chunks, b"")
+            except httpx.HTTPError as e:
+                raise OSError(f"Report download from {self._report.url} failed: {str(e)}") from e
+            if not chunk:
+                return 0
+            self._pending = memoryview(chunk)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        self._position += size
+        return size
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            if self.size is None:
+                raise OSError("Report size is unknown")
+            offset += self.size
+        if offset < 0:
+            raise OSError("Negative seek position")
+        if offset != self._position:
+            self._drop_response()
+            self._position = offset
+        return self._position
+
+    def close(self) -> None:
+        if not self.closed:
+            self._drop_response()
+            self._client.close()
+        super().close()
@@ -0,0 +1,380 @@
+import bisect
+import gzip
+import io
+import json
+import mmap
+import os
+import zipfile
+import zlib
+from typing import Any, BinaryIO, Dict, Optional, Tuple, Union
+
+from parsers.registry import SNIFF_BYTES
+from parsers.remote import RemoteReport
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# A report can be given as a path on disk, an in-memory binary buffer, an open binary stream
+# or a report served over HTTP
+ReportInput = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO, RemoteReport]
+
+# Magic bytes of the compressed containers a report can arrive in
+COMPRESSION_MAGIC = {
+    "gzip": b"\x1f\x8b",
+    "zstd": b"\x28\xb5\x2f\xfd",
+    "zip": b"PK\x03\x04",
+}
+
+# Sidecar of a gzip report stored as independently compressed blocks (written by
+# the dashboard's storage): {"size": decompressed size, "blocks": [[offset, compressed offset], ...]}
+GZIP_INDEX_SUFFIX = ".idx"
+
+# Size of the reads used to skip to a byte range of a compressed report
+SKIP_BLOCK_BYTES = 1024 * 1024
+
+# Size of the reads used to measure the compression ratio of a report
+RATIO_READ_BYTES = 16 * 1024
+
+
+class CorruptArchiveError(ValueError):
+    """The compressed container of a report cannot be decompressed"""
+
+
+# What the decompressors raise on truncated or corrupted input
+_DECOMPRESSION_ERRORS = (EOFError, OSError, zlib.error, zipfile.BadZipFile) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+)
+
+
+class _ReplayStream(io.RawIOBase):
+    """
+    Read-only stream over a decompressor that first replays the leading bytes
+    already consumed for format detection
+    """
+
+    def __init__(self, head: bytes, stream: BinaryIO, compression: str):
+        self._head = head
+        self._stream = stream
+        self._compression = compression
+
+    def readable(self) -> bool:
+        return True
+
+    def peek(self, size: int) -> bytes:
+        """Leading bytes without consuming them, so the stream can be sniffed again"""
+        if len(self._head) < size:
+            try:
+                self._head += _read_exactly(self._stream, size - len(self._head))
+            except _DECOMPRESSION_ERRORS as e:
+                raise CorruptArchiveError(f"Corrupted {self._compression} report: {str(e)}") from e
+        return self._head[:size]
+
+    def read(self, size: int = -1) -> bytes:
+        if not self._head:
+            try:
+                return self._stream.read(size)
+            except _DECOMPRESSION_ERRORS as e:
+                raise CorruptArchiveError(f"Corrupted {self._compression} report: {str(e)}") from e
+        if size is None or size < 0:
+            data, self._head = self._head + self._stream.read(), b""
+            return data
+        data, self._head = self._head[:size], self._head[size:]
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _read_exactly(stream: BinaryIO, size: int) -> bytes:
+    """Read size bytes, or up to the end of the stream; decompressors may return short reads"""
+    parts = []
+    while size > 0:
+        data = stream.read(size)
+        if not data:
+            break
+        parts.append(data)
+        size -= len(data)
+    return b"".join(parts)
+
+
+def _skip(stream: BinaryIO, size: int) -> None:
+    """Read and drop size bytes of a stream that cannot seek"""
+    while size > 0:
+        data = stream.read(min(size, SKIP_BLOCK_BYTES))
+        if not data:
+            break
+        size -= len(data)
+
+
+def _load_gzip_index(path: str) -> Optional[Dict[str, Any]]:
+    """Block index stored next to a gzip report, if it has one"""
+    try:
+        with open(path + GZIP_INDEX_SUFFIX, "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(index, dict) or not index.get("blocks"):
+        return None
+    return index
+
+
+def _detect_compression(magic: bytes) -> Optional[str]:
+    """Name of the compressed container a report starts with, or None for a plain report"""
+    for compression, signature in COMPRESSION_MAGIC.items():
+        if magic.startswith(signature):
+            return compression
+    return None
+
+
+def _peek_stream(stream: BinaryIO, size: int) -> bytes:
+    """Leading bytes of a stream; the stream is left where it was"""
+    if hasattr(stream, "peek"):
+        return stream.peek(size)[:size]
+    start = stream.tell()
+    data = stream.read(size)
+    stream.seek(start)
+    return data
+
+
+def _gzip_content_size(stream: BinaryIO) -> Optional[int]:
+    """Decompressed size from the gzip trailer (exact for single-member files under 4 GiB)"""
+    if not (hasattr(stream, "seekable") and stream.seekable()):
+        return None
+    start = stream.tell()
+    try:
+        stream.seek(-4, os.SEEK_END)
+        return int.from_bytes(stream.read(4), "little")
+    except OSError:
+        return None
+    finally:
+        stream.seek(start)
+
+
+def _decompressor_object(compression: str) -> Any:
+    """Incremental decompressor of one gzip member or zstd frame"""
+    if compression == "gzip":
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    return zstandard.ZstdDecompressor().decompressobj()
+
+
+def _decompressing_stream(compression: str, stream: BinaryIO) -> Tuple[BinaryIO, Optional[int]]:
+    """
+    Wrap a compressed stream so that reading it yields the decompressed report.
+
+    Returns:
+        (decompressed stream, decompressed size if the container records it)
+    """
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=stream, mode="rb"), _gzip_content_size(stream)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("Zstandard-compressed reports require the 'zstandard' package")
+        try:
+            # The frame header is at most 18 bytes
+            content_size = zstandard.frame_content_size(_peek_stream(stream, 18))
+        except zstandard.ZstdError:
+            content_size = -1
+        # The stream is closed by its owner (see ReportSource.close)
+        reader = zstandard.ZstdDecompressor().stream_reader(stream, read_across_frames=True, closefd=False)
+        return reader, content_size if content_size >= 0 else None
+    if compression == "zip":
+        # zipfile needs a seekable container, which paths and buffers are
+        archive = zipfile.ZipFile(stream)
+        members = [member for member in archive.infolist() if not member.is_dir()]
+        if len(members) != 1:
+            raise CorruptArchiveError(f"Zip archives must contain exactly one report, found {len(members)} files")
+        return archive.open(members[0]), members[0].file_size
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+class ReportSource:
+    """
+    Binary, read-only view of a report.
+
+    Uncompressed files on disk are memory-mapped, so the parser pulls bytes
+    straight from the page cache and no decoded copy of the document is ever
+    built: the XML parser decodes the bytes itself according to the
+    document's declaration. In-memory buffers are wrapped without copying
+    them and open streams are used as they are (and left open). Remote
+    reports are read from the HTTP response as it arrives, without a local
+    copy.
+
+    gzip, zstd and zip containers are recognised by their magic bytes and
+    decompressed on the fly as the parser reads, so the report is never
+    decompressed as a whole, in memory or on disk.
+    """
+
+    def __init__(self, report: ReportInput):
+        self.path: Optional[str] = None
+        # Size of the stored (possibly compressed) report
+        self.size: Optional[int] = None
+        self.compression: Optional[str] = None
+        # Size of the decompressed report, when known without decompressing it
+        self.content_size: Optional[int] = None
+        self._file: Optional[BinaryIO] = None
+        self._mapping: Optional[mmap.mmap] = None
+        self._decompressor: Optional[BinaryIO] = None
+        self._remote: Optional[RemoteReport] = None
+        self._owns_stream = True
+        # Where the report starts in a stream given open
+        self._raw_start = 0
+
+        if isinstance(report, (str, os.PathLike)):
+            self.path = os.fspath(report)
+            self._file = open(self.path, "rb")
+            self.size = os.fstat(self._file.fileno()).st_size
+            stream: BinaryIO = self._file
+            # Compressed files are read sequentially by the decompressor; empty files cannot be mapped
+            if self.size > 0 and _detect_compression(self._file.peek(4)) is None:
+                self._mapping = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                stream = self._mapping
+        elif isinstance(report, RemoteReport):
+            self._remote = report
+            remote_stream = report.open()
+            self.size = remote_stream.size
+            self._file = io.BufferedReader(remote_stream, buffer_size=SKIP_BLOCK_BYTES)
+            stream = self._file
+        elif isinstance(report, (bytes, bytearray, memoryview)):
+            self.size = len(report)
+            stream = io.BytesIO(report)
+        else:
+            stream = report
+            self._owns_stream = False
+            # Seekable streams (e.g. spooled uploads) are measured from where they are
+            if hasattr(stream, "seekable") and stream.seekable():
+                self._raw_start = stream.tell()
+                self.size = stream.seek(0, os.SEEK_END) - self._raw_start
+                stream.seek(self._raw_start)
+        self._raw = stream
+
+        self.compression = _detect_compression(self._peek(stream, 4))
+        if self.compression is not None:
+            try:
+                self._decompressor, self.content_size = _decompressing_stream(self.compression, stream)
+                if self.compression == "gzip":
+                    # The trailer only holds the size of the last block of a block-compressed report
+                    index = self._gzip_index()
+                    if index is not None:
+                        self.content_size = index.get("size", self.content_size)
+                # Decompressed streams cannot seek back cheaply, so the prefix is replayed
+                self.prefix = _read_exactly(self._decompressor, SNIFF_BYTES)
+            except _DECOMPRESSION_ERRORS as e:
+                self.close()
+                raise CorruptArchiveError(f"Corrupted {self.compression} report: {str(e)}") from e
+            self.stream: BinaryIO = _ReplayStream(self.prefix, self._decompressor, self.compression)
+        else:
+            self.stream = stream
+            self.prefix = self._peek(stream, SNIFF_BYTES)
+            self.content_size = self.size
+
+    def _peek(self, stream: BinaryIO, size: int) -> bytes:
+        """Leading bytes of a stream; the stream is left at its start"""
+        if stream is self._mapping:
+            return self._mapping[:size]
+        return _peek_stream(stream, size)
+
+    def _gzip_index(self) -> Optional[Dict[str, Any]]:
+        """Block index stored next to a gzip report, if it has one"""
+        if self.path is not None:
+            return _load_gzip_index(self.path)
+        if self._remote is not None:
+            index = self._remote.fetch_sidecar(GZIP_INDEX_SUFFIX)
+            return index if isinstance(index, dict) and index.get("blocks") else None
+        return None
+
+    def compression_ratio(self, sample_bytes: int) -> Optional[float]:
+        """
+        Decompressed bytes per stored byte, over about the first sample_bytes of the report.
+
+        The stored report is decompressed again from its start, in reads of
+        RATIO_READ_BYTES, so the ratio does not depend on how far the
+        decompressor reading the report ran ahead. Rewinds the stored report:
+        only call it once the report was read. None for zip archives and
+        streams that cannot seek.
+        """
+        if self.compression is None:
+            return 1.0
+        if self.compression == "zip" or not (hasattr(self._raw, "seekable") and self._raw.seekable()):
+            return None
+        self._raw.seek(self._raw_start)
+        decompressor = _decompressor_object(self.compression)
+        consumed = produced = 0
+        pending = b""
+        try:
+            while produced < sample_bytes:
+                data = pending or self._raw.read(RATIO_READ_BYTES)
+                if not data:
+                    break
+                if not pending:
+                    consumed += len(data)
+                produced += len(decompressor.decompress(data))
+                pending = b""
+                if decompressor.eof:
+                    # Concatenated gzip members or zstd frames
+                    pending = decompressor.unused_data
+                    decompressor = _decompressor_object(self.compression)
+        except _DECOMPRESSION_ERRORS:
+            pass
+        return produced / consumed if consumed else None
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        """
+        Read a byte range of the decompressed report, on a source nothing was read from yet.
+
+        Plain reports are sliced from the memory map. gzip reports stored with
+        a block index are decompressed from the block holding the range on;
+        other compressed reports are decompressed up to the range.
+        """
+        if self._mapping is not None:
+            return self._mapping[offset:offset + length]
+
+        try:
+            if self.compression == "gzip":
+                index = self._gzip_index()
+                if index is not None:
+                    blocks = index["blocks"]
+                    block = max(bisect.bisect_right([start for start, _ in blocks], offset) - 1, 0)
+                    block_start, compressed_start = blocks[block]
+                    self._raw.seek(compressed_start)
+                    # Every block is a complete gzip member, so decompression can start there
+                    with gzip.GzipFile(fileobj=self._raw, mode="rb") as blocks_from:
+                        _skip(blocks_from, offset - block_start)
+                        return _read_exactly(blocks_from, length)
+
+            if self.compression is None and hasattr(self.stream, "seek"):
+                self.stream.seek(offset)
+            else:
+                _skip(self.stream, offset)
+            return _read_exactly(self.stream, length)
+        except _DECOMPRESSION_ERRORS as e:
+            if self.compression is None:
+                raise
+            raise CorruptArchiveError(f"Corrupted {self.compression} report: {str(e)}") from e
+
+    def close(self) -> None:
+        if self._decompressor is not None:
+            self._decompressor.close()
+            self._decompressor = None
+        if self._mapping is not None:
+            self._mapping.close()
+            self._mapping = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        elif self._owns_stream:
+            self._raw.close()
+
+    def __enter__(self) -> "ReportSource":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_report(report: ReportInput) -> ReportSource:
+    """Open a report given as a path, a binary buffer or a binary stream"""
+    return ReportSource(report)
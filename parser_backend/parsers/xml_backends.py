@@ -0,0 +1,354 @@
+import abc
+import codecs
+import io
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+from pyexpat import ExpatError, ParserCreate
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional
+
+import logging
+from core.logging import setup_logger
+logger = setup_logger(__name__, level=logging.INFO)
+
+# Size of the blocks read from the report and pushed to the XML parser
+READ_BLOCK_BYTES = 64 * 1024
+
+# Called with the tag and attributes of an element; True leaves the element out
+SkipPredicate = Callable[[str, Dict[str, str]], bool]
+
+
+class XMLParseError(Exception):
+    """The document is not well-formed XML (whatever backend detected it)"""
+
+
+class UnexpectedRootError(Exception):
+    """The document root element is not the one the caller expects"""
+
+    def __init__(self, root_tag: str):
+        super().__init__(f"Unexpected root element: {root_tag}")
+        self.root_tag = root_tag
+
+
+class XMLBackend(abc.ABC):
+    """
+    Streaming XML backend.
+
+    A backend reads a document from a binary stream and yields every element
+    with a given tag once it is complete, as an ElementTree-compatible element.
+    Each yielded subtree is released when the consumer asks for the next one,
+    so only one subtree is alive at a time.
+
+    skip is a hint: it is called with the tag and attributes of the elements
+    inside the subtrees, and a backend that builds elements itself leaves out
+    those it returns True for, with their content. Other backends ignore it,
+    so callers still have to filter the elements they get.
+    """
+    name = "base"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return True
+
+    @abc.abstractmethod
+    def iter_subtrees(self, source: BinaryIO, tag: str, expected_root: str,
+                      skip: Optional[SkipPredicate] = None) -> Iterator[Any]:
+        """Yield every element with this tag, in document order"""
+
+
+class StdlibBackend(XMLBackend):
+    """xml.etree.ElementTree.iterparse (C accelerated TreeBuilder)"""
+    name = "stdlib"
+
+    def iter_subtrees(self, source: BinaryIO, tag: str, expected_root: str,
+                      skip: Optional[SkipPredicate] = None) -> Iterator[ET.Element]:
+        # Open elements from the document root down to the current one
+        stack: List[ET.Element] = []
+        try:
+            for event, elem in ET.iterparse(source, events=("start", "end")):
+                if event == "start":
+                    if not stack and elem.tag != expected_root:
+                        raise UnexpectedRootError(elem.tag)
+                    stack.append(elem)
+                    continue
+
+                stack.pop()
+                if elem.tag != tag:
+                    continue
+
+                yield elem
+
+                # Release the finished subtree so the tree never grows past one of them
+                elem.clear()
+                if stack:
+                    stack[-1].remove(elem)
+        except ET.ParseError as e:
+            raise XMLParseError(str(e)) from e
+
+
+class LxmlBackend(XMLBackend):
+    """lxml.etree.iterparse (libxml2)"""
+    name = "lxml"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        try:
+            import lxml.etree  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def iter_subtrees(self, source: BinaryIO, tag: str, expected_root: str,
+                      skip: Optional[SkipPredicate] = None) -> Iterator[Any]:
+        from lxml import etree
+
+        # libxml2 only reports the events we ask for, so no Python callback runs
+        # for the elements inside the subtrees
+        context = etree.iterparse(
+            source,
+            events=("start", "end"),
+            tag=(expected_root, tag),
+            huge_tree=True,
+            resolve_entities=False,
+            no_network=True,
+        )
+        root_seen = False
+        try:
+            for event, elem in context:
+                if not root_seen:
+                    root_seen = True
+                    if elem.tag != expected_root:
+                        raise UnexpectedRootError(elem.tag)
+                    continue
+                if event != "end" or elem.tag != tag:
+                    continue
+
+                yield elem
+
+                # Release the subtree and any siblings already processed
+                elem.clear(keep_tail=True)
+                parent = elem.getparent()
+                if parent is not None:
+                    while elem.getprevious() is not None:
+                        del parent[0]
+        except etree.XMLSyntaxError as e:
+            raise XMLParseError(str(e)) from e
+
+        if not root_seen:
+            # With a tag filter, lxml reports nothing at all for a foreign document
+            raise UnexpectedRootError("")
+
+
+class ExpatBackend(XMLBackend):
+    """
+    Raw pyexpat push-parser.
+
+    Elements are only built inside the requested subtrees, straight from the
+    SAX callbacks; everything else in the document (policy, preferences) is
+    skipped without allocating anything.
+    """
+    name = "expat"
+
+    # Encodings expat decodes by itself; others are transcoded to UTF-8 before parsing
+    NATIVE_ENCODINGS = {"utf-8", "utf8", "utf-16", "utf16", "iso-8859-1", "latin-1", "latin1", "us-ascii", "ascii"}
+
+    def iter_subtrees(self, source: BinaryIO, tag: str, expected_root: str,
+                      skip: Optional[SkipPredicate] = None) -> Iterator[ET.Element]:
+        block = source.read(READ_BLOCK_BYTES)
+        declared = re.match(rb"<\?xml[^>]*?encoding\s*=\s*[\"']([A-Za-z0-9._-]+)[\"']", block)
+        decoder = None
+        if declared and declared.group(1).decode("ascii").lower() not in self.NATIVE_ENCODINGS:
+            try:
+                decoder = codecs.getincrementaldecoder(declared.group(1).decode("ascii"))()
+            except LookupError:
+                raise XMLParseError(f"unknown encoding: {declared.group(1).decode('ascii')}")
+            parser = ParserCreate("utf-8", namespace_separator="}")
+        else:
+            parser = ParserCreate(namespace_separator="}")
+        parser.buffer_text = True
+        parser.buffer_size = READ_BLOCK_BYTES
+
+        completed: List[ET.Element] = []
+        # Elements of the subtree being built, outermost first
+        stack: List[ET.Element] = []
+        text_parts: List[str] = []
+        # Element and attribute ("text" or "tail") the buffered character data belongs to
+        text_owner: List[Any] = [None, None]
+        # depth: document depth; skipped: depth inside an element left out by skip
+        state = {"depth": 0, "skipped": 0}
+
+        def qualify(name: str) -> str:
+            return "{" + name if "}" in name else name
+
+        def flush_text() -> None:
+            if text_parts:
+                if text_owner[0] is not None:
+                    setattr(text_owner[0], text_owner[1], "".join(text_parts))
+                text_parts.clear()
+
+        def start_element(name: str, attrs: Dict[str, str]) -> None:
+            state["depth"] += 1
+            if state["depth"] == 1 and qualify(name) != expected_root:
+                raise UnexpectedRootError(qualify(name))
+            if not stack and qualify(name) != tag:
+                return
+            if state["skipped"]:
+                state["skipped"] += 1
+                return
+            if stack and skip is not None and skip(qualify(name), attrs):
+                # Leave the element out; its content and tail text are dropped with it
+                flush_text()
+                text_owner[0] = None
+                state["skipped"] = 1
+                return
+
+            flush_text()
+            if any("}" in key for key in attrs):
+                attrs = {qualify(key): value for key, value in attrs.items()}
+            elem = ET.Element(qualify(name), attrs)
+            if stack:
+                stack[-1].append(elem)
+            stack.append(elem)
+            text_owner[0], text_owner[1] = elem, "text"
+
+        def end_element(name: str) -> None:
+            state["depth"] -= 1
+            if state["skipped"]:
+                state["skipped"] -= 1
+                return
+            if not stack:
+                return
+
+            flush_text()
+            elem = stack.pop()
+            if stack:
+                text_owner[0], text_owner[1] = elem, "tail"
+            else:
+                text_owner[0] = None
+                completed.append(elem)
+
+        def character_data(data: str) -> None:
+            if stack and not state["skipped"]:
+                text_parts.append(data)
+
+        parser.StartElementHandler = start_element
+        parser.EndElementHandler = end_element
+        parser.CharacterDataHandler = character_data
+
+        try:
+            while True:
+                if decoder is not None:
+                    parser.Parse(decoder.decode(block, not block).encode("utf-8"), not block)
+                else:
+                    parser.Parse(block, not block)
+                # Hand over completed subtrees; they are dropped before the next block
+                while completed:
+                    yield completed.pop(0)
+                if not block:
+                    break
+                block = source.read(READ_BLOCK_BYTES)
+        except ExpatError as e:
+            raise XMLParseError(str(e)) from e
+
+
+BACKENDS = {backend.name: backend for backend in (LxmlBackend, ExpatBackend, StdlibBackend)}
+
+_selected: Optional[XMLBackend] = None
+_timings: Dict[str, float] = {}
+
+
+def available_backends() -> List[str]:
+    """Names of the backends that can run in this environment"""
+    return [name for name, backend in BACKENDS.items() if backend.is_available()]
+
+
+def get_backend(name: Optional[str] = None) -> XMLBackend:
+    """Return the named backend, or the one selected at startup"""
+    if name is None:
+        return _selected or select_backend()
+    if name not in BACKENDS or not BACKENDS[name].is_available():
+        raise ValueError(f"XML backend '{name}' is not available. Available: {', '.join(available_backends())}")
+    return BACKENDS[name]()
+
+
+def _calibration_document(hosts: int = 150, items_per_host: int = 12) -> bytes:
+    """Small Nessus-shaped document used to time the backends at startup"""
+    parts = ['<?xml version="1.0" ?>\n<NessusClientData_v2><Policy><Preferences>']
+    parts.extend(f"<preference><name>p{i}</name><value>{i}</value></preference>" for i in range(200))
+    parts.append('</Preferences></Policy><Report name="calibration">')
+    for host in range(hosts):
+        parts.append(f'<ReportHost name="10.0.0.{host % 256}"><HostProperties>')
+        parts.append('<tag name="HOST_START">Mon Jul  1 11:33:11 2013</tag>')
+        parts.append(f'<tag name="host-ip">10.0.0.{host % 256}</tag></HostProperties>')
+        for item in range(items_per_host):
+            parts.append(
+                f'<ReportItem port="445" protocol="tcp" svc_name="cifs" severity="{item % 5}" '
+                f'pluginID="{10000 + item}" pluginName="Plugin {item}" pluginFamily="Windows">'
+                f"<description>{'Description text. ' * 20}</description>"
+                f"<solution>Apply the vendor patch.</solution>"
+                f"<plugin_output>Output for host {host}</plugin_output>"
+                f"<cvss_base_score>5.0</cvss_base_score></ReportItem>"
+            )
+        parts.append("</ReportHost>")
+    parts.append("</Report></NessusClientData_v2>")
+    return "".join(parts).encode("utf-8")
+
+
+def time_backend(backend: XMLBackend, document: bytes, rounds: int = 3) -> float:
+    """Best wall-clock time to walk every ReportItem of a document with a backend"""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for host in backend.iter_subtrees(io.BytesIO(document), "ReportHost", "NessusClientData_v2"):
+            for item in host.iter("ReportItem"):
+                item.get("pluginID")
+                item.findtext("plugin_output")
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def select_backend() -> XMLBackend:
+    """
+    Pick the XML backend for this process.
+
+    NESSUS_XML_BACKEND forces a backend; otherwise every installed backend is
+    timed on a small calibration document and the fastest one is kept.
+    """
+    global _selected
+
+    forced = os.getenv("NESSUS_XML_BACKEND")
+    if forced:
+        _selected = get_backend(forced)
+        logger.info(f"XML backend forced to '{_selected.name}'")
+        return _selected
+
+    document = _calibration_document()
+    _timings.clear()
+    for name in available_backends():
+        try:
+            _timings[name] = time_backend(BACKENDS[name](), document)
+        except Exception as e:
+            logger.warning(f"XML backend '{name}' failed calibration: {str(e)}")
+
+    fastest = min(_timings, key=_timings.get) if _timings else StdlibBackend.name
+    _selected = BACKENDS[fastest]()
+    timings = ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in _timings.items())
+    logger.info(f"Selected XML backend '{fastest}' ({timings})")
+    return _selected
+
+
+def use_backend(name: str) -> XMLBackend:
+    """Make the named backend this process's default, e.g. in workers of a process that already calibrated"""
+    global _selected
+    _selected = get_backend(name)
+    return _selected
+
+
+def backend_status() -> Dict[str, Any]:
+    """Selected backend and calibration timings, for the health endpoint"""
+    return {
+        "selected": _selected.name if _selected else None,
+        "available": available_backends(),
+        "calibration_ms": {name: round(seconds * 1000, 2) for name, seconds in _timings.items()},
+    }
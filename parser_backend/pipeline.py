@@ -0,0 +1,562 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from normalizer import EventTimeParser, Normalizer
+from parsers import registry, xml_backends
+from parsers.field_mapping import FieldMapping
+from parsers.filters import IngestFilter
+from parsers.report_source import ReportInput, ReportSource, open_report
+
+import logging
+from core.logging import setup_logger
+logger = setup_logger(__name__, level=logging.INFO)
+
+# Reports parsed at the same time, each in its own process
+PARSE_POOL_WORKERS = int(os.getenv("PARSE_POOL_WORKERS", os.cpu_count() or 1))
+# A parse still running after this long is aborted (the dashboard gives up on /parse after 300s)
+PARSE_TIMEOUT_SECONDS = float(os.getenv("PARSE_TIMEOUT_SECONDS", 240))
+
+# Reports at least this large are split by host and parsed on several cores
+PARALLEL_PARSE_MIN_BYTES = int(os.getenv("PARALLEL_PARSE_MIN_BYTES", 64 * 1024 * 1024))
+# Processes the parallel parses of all jobs may use together. Jobs run in the
+# parse pool and start their own chunk processes, so each job gets its share
+# of them (parsing is not split when the share is a single process)
+PARALLEL_PARSE_WORKERS = int(os.getenv("PARALLEL_PARSE_WORKERS", os.cpu_count() or 1))
+PARALLEL_WORKERS_PER_JOB = max(PARALLEL_PARSE_WORKERS // PARSE_POOL_WORKERS, 1)
+
+# Normalized chunks (one per ReportHost) buffered between a streaming worker and its response
+STREAM_BUFFER_CHUNKS = int(os.getenv("STREAM_BUFFER_CHUNKS", 8))
+# How often blocked channel operations check whether the other side went away
+CHANNEL_POLL_SECONDS = 0.5
+
+# Previews stop after this many findings, this much decompressed report or this long
+PREVIEW_MAX_FINDINGS = int(os.getenv("PREVIEW_MAX_FINDINGS", 500))
+PREVIEW_MAX_BYTES = int(os.getenv("PREVIEW_MAX_BYTES", 16 * 1024 * 1024))
+PREVIEW_TIMEOUT_SECONDS = float(os.getenv("PREVIEW_TIMEOUT_SECONDS", 2))
+PREVIEW_SAMPLE_SIZE = 20
+# Previews and finding re-reads parsed at the same time, on threads of this process
+PREVIEW_CONCURRENCY = int(os.getenv("PREVIEW_CONCURRENCY", 2))
+
+# Extra time given to a worker to report its own timeout before the job is abandoned
+TIMEOUT_GRACE_SECONDS = 5.0
+
+
+class ParseTimeoutError(Exception):
+    """A parse job ran past its time limit"""
+
+
+class _JobTimeout(BaseException):
+    """
+    Raised by the alarm inside a worker. Not an Exception, so that the broad
+    error handling in parsers and normalization cannot swallow it.
+    """
+
+
+def _raise_timeout(signum, frame):
+    raise _JobTimeout()
+
+
+def _init_worker(xml_backend_name: Optional[str]) -> None:
+    """Reuse the XML backend picked by the service instead of calibrating again in every worker"""
+    if xml_backend_name:
+        xml_backends.use_backend(xml_backend_name)
+    signal.signal(signal.SIGALRM, _raise_timeout)
+
+
+def _normalized_chunks(parser: Any, file_path: ReportInput, filename: str,
+                       field_mapping: Optional[FieldMapping] = None) -> Iterator[List[Dict[str, Any]]]:
+    """Parse a report and yield its normalized findings, one parser chunk (ReportHost) at a time"""
+    normalizer = Normalizer()
+    # Compiled once per report (and cached per worker)
+    extract = field_mapping.extractor() if field_mapping is not None else None
+    # Timestamps of a report share one format, detected on the first finding
+    event_times = EventTimeParser()
+    findings_count = 0
+    normalization_errors = 0
+
+    # Parse the report, one ReportHost at a time, or split across cores when large
+    with open_report(file_path) as report_source:
+        # Splitting by ReportHost needs random access to a local file, so compressed and remote reports are streamed
+        use_parallel = (
+            PARALLEL_WORKERS_PER_JOB > 1
+            and report_source.path is not None
+            and report_source.compression is None
+            and hasattr(parser, "parse_report_parallel")
+            and report_source.size >= PARALLEL_PARSE_MIN_BYTES
+        )
+        if use_parallel:
+            chunks = parser.parse_report_parallel(file_path, filename, workers=PARALLEL_WORKERS_PER_JOB)
+        else:
+            chunks = parser.parse_report_stream(report_source.stream, filename)
+
+        for chunk in chunks:
+            errors: List[Tuple[int, Exception]] = []
+            normalized = normalizer.normalize_many(chunk, errors, event_times, extract)
+            for index, e in errors:
+                # Failed findings come out as None, the others are kept
+                logger.warning(f"Failed to normalize finding {findings_count + index + 1}: {str(e)}")
+            normalization_errors += len(errors)
+            findings_count += len(chunk)
+            yield [
+                {
+                    "raw_finding": finding,              # Original data from parser
+                    "normalized_finding": normalized_finding  # Processed data
+                }
+                for finding, normalized_finding in zip(chunk, normalized)
+                if normalized_finding is not None
+            ]
+
+    logger.info(f"Parser returned {findings_count} findings")
+    # Log normalization results
+    if normalization_errors > 0:
+        logger.warning(f"Failed to normalize {normalization_errors} out of {findings_count} findings")
+
+
+def _create_parser(parser_name: str, ingest_filter: Optional[IngestFilter], **options: Any) -> Any:
+    if ingest_filter is not None:
+        options["ingest_filter"] = ingest_filter
+    return registry.get_parser(parser_name).create(**options)
+
+
+def parse_and_normalize(parser_name: str, file_path: ReportInput, filename: str, timeout: float,
+                        ingest_filter: Optional[IngestFilter] = None,
+                        field_mapping: Optional[FieldMapping] = None) -> Dict[str, Any]:
+    """
+    Parse a report and normalize its findings.
+
+    Runs in a worker process of the parse pool. The job arms an alarm for its
+    own time limit, so an aborted job leaves the worker usable for the next one.
+
+    Returns:
+        {"findings": [{raw_finding, normalized_finding}, ...], "plugins": {...},
+         "dropped": items rejected by the ingest filter}
+
+    Raises:
+        ValueError: If the report is not valid for the parser
+        ParseTimeoutError: If the job ran past its time limit
+    """
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        parser = _create_parser(parser_name, ingest_filter, record_offsets=True)
+        parsed_findings = [
+            parsed
+            for chunk in _normalized_chunks(parser, file_path, filename, field_mapping)
+            for parsed in chunk
+        ]
+        logger.info(f"Successfully normalized {len(parsed_findings)} findings")
+        return {
+            "findings": parsed_findings,
+            "plugins": getattr(parser, "plugin_catalog", {}),
+            "dropped": getattr(parser, "dropped_count", 0),
+        }
+    except _JobTimeout:
+        raise ParseTimeoutError("Parsing took too long and was aborted") from None
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class _Cancelled(Exception):
+    """The consumer of a streamed parse went away"""
+
+
+def _send(channel: Any, cancelled: Any, message: Tuple[str, Any]) -> None:
+    """Put a message on the bounded channel, waiting while it is full unless the consumer is gone"""
+    while True:
+        if cancelled.is_set():
+            raise _Cancelled()
+        try:
+            channel.put(message, timeout=CHANNEL_POLL_SECONDS)
+            return
+        except queue.Full:
+            continue
+
+
+def stream_parse_and_normalize(parser_name: str, file_path: ReportInput, filename: str, timeout: float,
+                               channel: Any, cancelled: Any, ingest_filter: Optional[IngestFilter] = None,
+                               field_mapping: Optional[FieldMapping] = None) -> None:
+    """
+    Parse a report and send its normalized findings over a bounded channel as they are produced.
+
+    Messages are ("plugins", {plugin_id: details}) for plugins not sent yet,
+    sent before the findings referencing them, then ("findings", (hosts, [...]))
+    per parser chunk, hosts being the number of chunks (ReportHosts) parsed so
+    far, and finally ("done", {"findings": count, "hosts": count, "dropped": count}) or
+    ("error", (kind, message)) where kind is "timeout", "invalid" (the
+    report is not valid for the parser) or "failed". When the channel is full
+    the job waits, so a slow consumer throttles the parse.
+    """
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        parser = _create_parser(parser_name, ingest_filter, record_offsets=True)
+        plugin_catalog = getattr(parser, "plugin_catalog", {})
+        sent_plugins = set()
+        findings_count = 0
+        hosts_count = 0
+
+        for parsed_findings in _normalized_chunks(parser, file_path, filename, field_mapping):
+            hosts_count += 1
+            new_plugins = {
+                plugin_id: plugin for plugin_id, plugin in plugin_catalog.items() if plugin_id not in sent_plugins
+            }
+            if new_plugins:
+                _send(channel, cancelled, ("plugins", new_plugins))
+                sent_plugins.update(new_plugins)
+            if parsed_findings:
+                _send(channel, cancelled, ("findings", (hosts_count, parsed_findings)))
+                findings_count += len(parsed_findings)
+
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        logger.info(f"Successfully normalized {findings_count} findings")
+        _send(channel, cancelled, ("done", {
+            "findings": findings_count,
+            "hosts": hosts_count,
+            "dropped": getattr(parser, "dropped_count", 0),
+        }))
+    except _Cancelled:
+        logger.info(f"Streaming {filename} was cancelled by the consumer")
+    except (_JobTimeout, Exception) as e:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        if isinstance(e, _JobTimeout):
+            kind, e = "timeout", ParseTimeoutError("Parsing took too long and was aborted")
+        elif isinstance(e, ValueError):
+            kind = "invalid"
+        else:
+            kind = "failed"
+        try:
+            _send(channel, cancelled, ("error", (kind, str(e))))
+        except _Cancelled:
+            pass
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+# Owns the bounded channels shared with streaming workers
+_manager: Optional[Any] = None
+# One slot per worker; jobs wait for a slot before they are handed to the pool
+_slots = asyncio.Semaphore(PARSE_POOL_WORKERS)
+# Previews and finding re-reads wait for one of these; their time budget starts once they have it
+_preview_slots = asyncio.Semaphore(PREVIEW_CONCURRENCY)
+
+
+def _new_pool() -> ProcessPoolExecutor:
+    # Workers are spawned, not forked, so they do not inherit the service's threads and event loop
+    return ProcessPoolExecutor(
+        max_workers=PARSE_POOL_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(xml_backends.backend_status()["selected"],),
+    )
+
+
+def start() -> None:
+    """Start the parse pool; workers use the XML backend selected in this process"""
+    global _pool, _manager
+    _pool = _new_pool()
+    _manager = multiprocessing.get_context("spawn").Manager()
+    logger.info(f"Started parse pool with {PARSE_POOL_WORKERS} workers")
+
+
+def stop() -> None:
+    global _pool, _manager
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+    if _manager is not None:
+        _manager.shutdown()
+        _manager = None
+
+
+async def run(parser_name: str, file_path: ReportInput, filename: str,
+              timeout: Optional[float] = None, ingest_filter: Optional[IngestFilter] = None,
+              field_mapping: Optional[FieldMapping] = None) -> Dict[str, Any]:
+    """
+    Parse and normalize a report in the pool without blocking the event loop.
+
+    Jobs beyond the pool size wait here for a free worker, so the time limit
+    only covers the job itself, not the time spent waiting.
+    """
+    if _pool is None:
+        raise RuntimeError("Parse pool is not started")
+
+    timeout = timeout or PARSE_TIMEOUT_SECONDS
+    async with _slots:
+        loop = asyncio.get_running_loop()
+        pool = _pool
+        try:
+            future = loop.run_in_executor(
+                pool, parse_and_normalize, parser_name, file_path, filename, timeout, ingest_filter, field_mapping
+            )
+            # The worker enforces the limit itself; this only covers a worker that stopped responding
+            return await asyncio.wait_for(future, timeout + TIMEOUT_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            raise ParseTimeoutError("Parsing took too long and was aborted")
+        except BrokenProcessPool:
+            _restart_broken_pool(pool)
+
+
+async def stream(parser_name: str, file_path: ReportInput, filename: str,
+                 timeout: Optional[float] = None,
+                 ingest_filter: Optional[IngestFilter] = None,
+                 field_mapping: Optional[FieldMapping] = None) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Parse and normalize a report in the pool, yielding results while the worker is still parsing.
+
+    Yields ("plugins", {...}) and ("findings", (hosts, [...])) messages, then a last
+    ("done", {...}) one, see stream_parse_and_normalize. The channel from the worker holds at most
+    STREAM_BUFFER_CHUNKS chunks: a consumer that stops reading pauses the
+    parse, and closing this generator cancels it.
+
+    Raises:
+        ValueError: If the report is not valid for the parser
+        ParseTimeoutError: If the job ran past its time limit
+    """
+    if _pool is None or _manager is None:
+        raise RuntimeError("Parse pool is not started")
+
+    timeout = timeout or PARSE_TIMEOUT_SECONDS
+    async with _slots:
+        loop = asyncio.get_running_loop()
+        channel = _manager.Queue(maxsize=STREAM_BUFFER_CHUNKS)
+        cancelled = _manager.Event()
+        pool = _pool
+        try:
+            future = loop.run_in_executor(
+                pool, stream_parse_and_normalize, parser_name, file_path, filename, timeout, channel, cancelled,
+                ingest_filter, field_mapping
+            )
+            # The worker enforces the limit itself; this only covers a worker that stopped responding
+            deadline = loop.time() + timeout + TIMEOUT_GRACE_SECONDS
+            while True:
+                try:
+                    kind, payload = await loop.run_in_executor(None, channel.get, True, CHANNEL_POLL_SECONDS)
+                except queue.Empty:
+                    if future.done():
+                        # The job ended without a final message: the worker died
+                        future.result()
+                        raise RuntimeError("The parser worker stopped unexpectedly")
+                    if loop.time() > deadline:
+                        raise ParseTimeoutError("Parsing took too long and was aborted")
+                    continue
+
+                if kind == "done":
+                    yield kind, payload
+                    return
+                if kind == "error":
+                    error_kind, message = payload
+                    if error_kind == "timeout":
+                        raise ParseTimeoutError(message)
+                    if error_kind == "invalid":
+                        raise ValueError(message)
+                    raise RuntimeError(message)
+                yield kind, payload
+        except BrokenProcessPool:
+            _restart_broken_pool(pool)
+        finally:
+            cancelled.set()
+
+
+def _restart_broken_pool(broken_pool: ProcessPoolExecutor) -> None:
+    """
+    A worker died (e.g. killed for memory); replace the pool so later jobs can run.
+
+    Every job that was on the broken pool gets here, so it is only replaced
+    by the first of them: the others would shut down its replacement.
+    """
+    global _pool
+    if _pool is broken_pool:
+        logger.error("Parse pool is broken, restarting it")
+        broken_pool.shutdown(wait=False, cancel_futures=True)
+        _pool = _new_pool()
+    raise RuntimeError("The parser worker stopped unexpectedly")
+
+
+class _PreviewBudgetExceeded(Exception):
+    pass
+
+
+class _PreviewBudget:
+    """Binary stream that ends a preview once it has read too much or taken too long"""
+
+    def __init__(self, stream: BinaryIO, max_bytes: int, deadline: float):
+        self._stream = stream
+        self._max_bytes = max_bytes
+        self._deadline = deadline
+        # Decompressed report bytes handed to the parser so far
+        self.position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if self.position >= self._max_bytes or time.monotonic() > self._deadline:
+            raise _PreviewBudgetExceeded()
+        if size is None or size < 0:
+            size = self._max_bytes - self.position
+        data = self._stream.read(size)
+        self.position += len(data)
+        return data
+
+    def peek(self, size: int) -> bytes:
+        # Format sniffing only, not counted
+        return self._stream.peek(size) if hasattr(self._stream, "peek") else b""
+
+
+def _truncated_content_size(report_source: ReportSource, report_size: int) -> Optional[int]:
+    """
+    Decompressed size of a report of report_size bytes of which only the start was given.
+
+    Compressed reports are assumed to keep the compression ratio of their start.
+    """
+    ratio = report_source.compression_ratio(PREVIEW_MAX_BYTES)
+    return round(report_size * ratio) if ratio is not None else None
+
+
+def preview_report(parser_name: str, file_path: ReportInput, filename: str,
+                   ingest_filter: Optional[IngestFilter] = None,
+                   max_findings: Optional[int] = None,
+                   sample_size: int = PREVIEW_SAMPLE_SIZE,
+                   field_mapping: Optional[FieldMapping] = None,
+                   report_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Parse the start of a report and estimate what a full ingest would produce.
+
+    Parsing stops after max_findings findings, PREVIEW_MAX_BYTES bytes or
+    PREVIEW_TIMEOUT_SECONDS. The total is extrapolated from the findings per
+    report byte between the first and the last parsed host, so the report
+    header does not skew it. It is exact when the whole report was read, and
+    None when the report size is unknown (e.g. zstd without a content size).
+
+    report_size is the size of the whole report when file_path only holds
+    its first bytes: the preview then ends where they do (what follows the
+    last whole host cannot be parsed), and the total is extrapolated to it.
+
+    Returns:
+        {"complete", "estimated_total_findings", "sampled_findings", "sampled_hosts",
+         "bytes_read", "total_bytes", "severity_histogram", "dropped", "samples", "plugins"}
+    """
+    max_findings = max_findings or PREVIEW_MAX_FINDINGS
+    parser = _create_parser(parser_name, ingest_filter, max_findings=max_findings)
+    deadline = time.monotonic() + PREVIEW_TIMEOUT_SECONDS
+
+    findings: List[Dict[str, Any]] = []
+    hosts = 0
+    # (findings, report bytes read) after the first and the last parsed host
+    first_point = last_point = None
+    complete = True
+
+    with open_report(file_path) as report_source:
+        truncated = report_size is not None and report_source.size is not None and report_source.size < report_size
+        stream = _PreviewBudget(report_source.stream, PREVIEW_MAX_BYTES, deadline)
+        try:
+            for chunk in parser.parse_report_stream(stream, filename):
+                hosts += 1
+                findings.extend(chunk)
+                last_point = (len(findings), stream.position)
+                first_point = first_point or last_point
+        except _PreviewBudgetExceeded:
+            complete = False
+        except Exception:
+            # The cut through the last host of a truncated report; without a single host, the report is invalid
+            if not truncated or hosts == 0:
+                raise
+        if truncated:
+            complete = False
+            total_bytes = _truncated_content_size(report_source, report_size)
+        else:
+            total_bytes = report_source.content_size
+
+    if len(findings) >= max_findings:
+        complete = False
+
+    if complete:
+        estimated_total = len(findings)
+    elif total_bytes is None or last_point is None:
+        estimated_total = None
+    elif last_point[1] > first_point[1]:
+        rate = (last_point[0] - first_point[0]) / (last_point[1] - first_point[1])
+        estimated_total = round(max(last_point[0] + rate * (total_bytes - last_point[1]), len(findings)))
+    else:
+        # The parser read every host in one go
+        estimated_total = round(len(findings) * total_bytes / max(stream.position, 1))
+
+    normalizer = Normalizer()
+    extract = field_mapping.extractor() if field_mapping is not None else None
+    samples = []
+    for finding in findings[:sample_size]:
+        try:
+            samples.append({"raw_finding": finding, "normalized_finding": normalizer.normalize(finding, extract)})
+        except Exception as e:
+            logger.warning(f"Failed to normalize preview finding: {str(e)}")
+
+    sampled_plugins = {finding.get("plugin_id") for finding in findings[:sample_size]}
+    plugin_catalog = getattr(parser, "plugin_catalog", {})
+
+    return {
+        "complete": complete,
+        "estimated_total_findings": estimated_total,
+        "sampled_findings": len(findings),
+        "sampled_hosts": hosts,
+        "bytes_read": stream.position,
+        "total_bytes": total_bytes,
+        "severity_histogram": dict(Counter(finding.get("severity", "Info") for finding in findings)),
+        "dropped": getattr(parser, "dropped_count", 0),
+        "samples": samples,
+        "plugins": {
+            plugin_id: plugin for plugin_id, plugin in plugin_catalog.items() if plugin_id in sampled_plugins
+        },
+    }
+
+
+async def preview(parser_name: str, file_path: ReportInput, filename: str,
+                  ingest_filter: Optional[IngestFilter] = None,
+                  max_findings: Optional[int] = None,
+                  field_mapping: Optional[FieldMapping] = None,
+                  report_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Preview a report without waiting for the parse pool.
+
+    A preview is bounded by its own budget, so it runs on a thread rather
+    than queueing behind full parses. Parsing holds the GIL, so at most
+    PREVIEW_CONCURRENCY previews and finding re-reads run at once.
+    """
+    async with _preview_slots:
+        return await asyncio.to_thread(
+            preview_report, parser_name, file_path, filename, ingest_filter, max_findings, PREVIEW_SAMPLE_SIZE,
+            field_mapping, report_size
+        )
+
+
+def read_finding(parser_name: str, file_path: ReportInput, filename: str,
+                 source_offset: int, host_offset: int, host_length: int,
+                 field_mapping: Optional[FieldMapping] = None) -> Dict[str, Any]:
+    """
+    Re-parse and normalize one finding from the byte ranges recorded when its report was parsed.
+
+    Returns:
+        {"raw_xml", "raw_finding", "normalized_finding"}
+
+    Raises:
+        ValueError: If the parser cannot re-read findings or the ranges do not hold one
+    """
+    parser = _create_parser(parser_name, None)
+    if not hasattr(parser, "read_finding"):
+        raise ValueError(f"{parser_name} findings cannot be re-read from their report")
+    found = parser.read_finding(file_path, filename, source_offset, host_offset, host_length)
+    extract = field_mapping.extractor() if field_mapping is not None else None
+    return {**found, "normalized_finding": Normalizer().normalize(found["raw_finding"], extract)}
+
+
+async def finding(parser_name: str, file_path: ReportInput, filename: str,
+                  source_offset: int, host_offset: int, host_length: int,
+                  field_mapping: Optional[FieldMapping] = None) -> Dict[str, Any]:
+    """Re-read one finding on a thread; it only reads its host, so it does not wait for the parse pool (see preview)"""
+    async with _preview_slots:
+        return await asyncio.to_thread(
+            read_finding, parser_name, file_path, filename, source_offset, host_offset, host_length, field_mapping
+        )
@@ -0,0 +1,258 @@
+import io
+import json
+import logging
+import operator
+import os
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy import func, insert as sql_insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from core.database import File, Log, Plugin
+
+logger = logging.getLogger(__name__)
+
+# Findings written (and committed, with the progress of the file) per chunk
+INSERT_CHUNK_ROWS = int(os.getenv("INSERT_CHUNK_ROWS", 5000))
+
+# Columns of the logs rows built by log_row, in COPY order: every column of the Log model
+# (checked against the database by verify_schema) but the ones the database fills in
+LOG_COLUMNS = tuple(column.name for column in Log.__table__.columns if column.name not in ("id", "created_at"))
+
+# Reads the LOG_COLUMNS values of a row
+_column_values = operator.itemgetter(*LOG_COLUMNS)
+
+
+def log_row(file_id: int, tool_id: int, filename: str, parsed_finding: dict) -> dict:
+    """Build the logs row for one {raw_finding, normalized_finding} pair from the parser"""
+    raw_data = parsed_finding["raw_finding"]
+    normalized_data = parsed_finding["normalized_finding"]
+
+    # Convert datetime if present (from normalized data)
+    event_time = None
+    if normalized_data.get("event_time"):
+        try:
+            event_time = datetime.fromisoformat(normalized_data["event_time"])
+        except ValueError:
+            logger.warning(f"Invalid event_time format: {normalized_data['event_time']}")
+
+    # Findings located in the report are re-parsed from it on demand (see get_log_raw in the dashboard)
+    located = raw_data.get("source_offset") is not None
+
+    return {
+        "file_id": file_id,
+        "tool_id": tool_id,
+        "status": "success",
+        "message": f"Parsed {filename} with tool ID {tool_id}",
+        "raw_data": None if located else json.dumps(raw_data),            # Store host-specific part of the finding
+        "parsed_data": None if located else json.dumps(normalized_data),  # Store normalized data
+        "source_offset": raw_data.get("source_offset"),
+        "source_length": raw_data.get("source_length"),
+        "host_offset": raw_data.get("host_offset"),
+        "host_length": raw_data.get("host_length"),
+        "plugin_id": raw_data.get("plugin_id"),
+        "event_time": event_time,
+        # Map normalized fields to database columns
+        "action": normalized_data.get("action"),
+        "attack_type": normalized_data.get("attack_type"),
+        "policy": normalized_data.get("policy"),
+        "bandwidth": normalized_data.get("bandwidth"),
+        "ip_source": normalized_data.get("ip_source"),
+        "ip_destination": normalized_data.get("ip_destination"),
+        "severity": normalized_data.get("severity"),
+        "cvss_base_score": normalized_data.get("cvss_base_score"),
+        "vulnerability_name": normalized_data.get("vulnerability_name"),
+        "malware_type": normalized_data.get("malware_type"),
+        "quarantine_status": normalized_data.get("quarantine_status"),
+        "log_type": normalized_data.get("log_type"),
+        "app_name": normalized_data.get("app_name"),
+        "country_code": normalized_data.get("country_code"),
+    }
+
+
+def _copy_escape(value: str) -> str:
+    """Escape the characters with a meaning in COPY's text format (checked first: they are rare)"""
+    if "\\" in value:
+        value = value.replace("\\", "\\\\")
+    if "\t" in value:
+        value = value.replace("\t", "\\t")
+    if "\n" in value:
+        value = value.replace("\n", "\\n")
+    if "\r" in value:
+        value = value.replace("\r", "\\r")
+    return value
+
+
+def copy_text(rows: Iterable[dict]) -> str:
+    """Rows in COPY's text format, one line per row"""
+    # Other values (numbers, datetimes) are written as str() renders them, which Postgres reads back
+    return "".join([
+        "\t".join([
+            "\\N" if value is None else _copy_escape(value) if value.__class__ is str else str(value)
+            for value in _column_values(row)
+        ]) + "\n"
+        for row in rows
+    ])
+
+
+class LogWriter:
+    """
+    Bulk insertion of the logs rows of one parse.
+
+    Each chunk handed to write is sent with COPY FROM STDIN when the session
+    runs on psycopg2 and use_copy is set (one executemany otherwise), inside a
+    savepoint, and committed on its own. A chunk the database rejects is
+    rolled back to its savepoint and written again in halves, down to the
+    rows at fault: a bad row is skipped and counted in rejected instead of
+    failing the file.
+
+    Chunks are committed as they are written: a parse that fails later must
+    delete the rows already written (see delete_file_logs).
+    """
+
+    def __init__(self, db: Session, use_copy: bool = True):
+        self.db = db
+        self.written = 0
+        self.rejected = 0
+        dialect = db.get_bind().dialect
+        self._copy = use_copy and dialect.name == "postgresql" and dialect.driver == "psycopg2"
+        self._dbapi_error = dialect.loaded_dbapi.Error
+        self._copy_statement = (
+            f"COPY {Log.__tablename__} ({', '.join(LOG_COLUMNS)}) FROM STDIN"
+        )
+
+    def write(self, rows: List[dict]) -> None:
+        """Insert a chunk of rows and commit it"""
+        if rows:
+            self._write(rows)
+        self.db.commit()
+
+    def _write(self, rows: List[dict]) -> None:
+        """Insert rows in a savepoint, halving a rejected chunk down to the rows at fault"""
+        try:
+            with self.db.begin_nested():
+                self._insert(rows)
+            self.written += len(rows)
+        except DBAPIError as e:
+            if len(rows) == 1:
+                self.rejected += 1
+                logger.warning(f"Skipped a logs row the database rejected: {e.orig}")
+                return
+            middle = len(rows) // 2
+            self._write(rows[:middle])
+            self._write(rows[middle:])
+
+    def _insert(self, rows: List[dict]) -> None:
+        if not self._copy:
+            self.db.execute(sql_insert(Log), rows)
+            return
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(self._copy_statement, io.StringIO(copy_text(rows)))
+        except self._dbapi_error as e:
+            # Raised by the driver directly, not through SQLAlchemy
+            raise DBAPIError.instance(self._copy_statement, None, e, self._dbapi_error) from e
+        finally:
+            cursor.close()
+
+
+def delete_file_logs(db: Session, file_id: int) -> None:
+    """Delete the logs rows written for a file, in the caller's transaction"""
+    db.query(Log).filter(Log.file_id == file_id).delete(synchronize_session=False)
+
+
+def upsert_plugins(db: Session, tool_id: int, plugins: dict) -> None:
+    """Store one catalog row per plugin, refreshing rows already known for the tool, and commit"""
+    if not plugins:
+        return
+
+    rows = [
+        {
+            "tool_id": tool_id,
+            "plugin_id": plugin_id,
+            "name": plugin.get("name"),
+            "family": plugin.get("family"),
+            "description": plugin.get("description"),
+            "solution": plugin.get("solution"),
+            "cvss_base_score": plugin.get("cvss_base_score"),
+            "exploitable": bool(plugin.get("exploitable")),
+            "metasploit_available": bool(plugin.get("metasploit_available")),
+            "metasploit_name": plugin.get("metasploit_name"),
+        }
+        for plugin_id, plugin in plugins.items()
+    ]
+    # Batched to stay well below the Postgres bind parameter limit
+    for batch_start in range(0, len(rows), 1000):
+        statement = pg_insert(Plugin).values(rows[batch_start:batch_start + 1000])
+        updated_columns = {
+            column: statement.excluded[column]
+            for column in ("name", "family", "description", "solution", "cvss_base_score",
+                           "exploitable", "metasploit_available", "metasploit_name")
+        }
+        updated_columns["updated_at"] = func.now()
+        statement = statement.on_conflict_do_update(constraint="uq_plugins_tool_plugin", set_=updated_columns)
+        db.execute(statement)
+    db.commit()
+
+
+class FileDeletedError(Exception):
+    """The file being processed was deleted meanwhile"""
+
+
+def start_file(db: Session, file_id: int) -> None:
+    """Clear what an earlier attempt stored for the file, before it is parsed again"""
+    updated = db.query(File).filter(File.id == file_id).update(
+        {"hosts_processed": 0, "findings_processed": 0}, synchronize_session=False
+    )
+    if not updated:
+        raise FileDeletedError(f"File {file_id} was deleted before it was processed")
+    delete_file_logs(db, file_id)
+    db.commit()
+
+
+def write_findings(db: Session, writer: LogWriter, file_id: int, rows: List[dict], hosts: int, findings: int) -> None:
+    """
+    Write a chunk of findings and the progress of the file, committed together.
+
+    The progress update locks the file row first: a file being deleted
+    (which locks it too) is seen as gone here instead of racing the delete.
+    """
+    updated = db.query(File).filter(File.id == file_id).update(
+        {"hosts_processed": hosts, "findings_processed": findings}, synchronize_session=False
+    )
+    if not updated:
+        raise FileDeletedError(f"File {file_id} was deleted while it was processed")
+    writer.write(rows)
+
+
+def mark_processed(db: Session, file_id: int, dropped: int, rejected: int) -> None:
+    """Mark a file processed once all its findings are written"""
+    db.query(File).filter(File.id == file_id).update(
+        {"status": "processed", "findings_dropped": dropped, "findings_rejected": rejected},
+        synchronize_session=False
+    )
+    db.commit()
+
+
+def record_failure(db: Session, file_id: int, message: str, raw_data: Optional[str] = None) -> None:
+    """Drop what was stored for a failed parse, mark the file failed and log the error"""
+    db.rollback()
+    db_file = db.query(File).filter(File.id == file_id).with_for_update().first()
+    if db_file is None:
+        db.rollback()
+        return
+    # Chunks of findings are committed as they are written
+    delete_file_logs(db, file_id)
+    db_file.status = "failed"
+    if db_file.tool_id is not None:
+        db.add(Log(
+            file_id=file_id,
+            tool_id=db_file.tool_id,
+            status="failed",
+            message=message,
+            raw_data=raw_data
+        ))
+    db.commit()
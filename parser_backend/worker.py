@@ -0,0 +1,266 @@
+import asyncio
+import contextlib
+import os
+import signal
+import socket
+from typing import Optional, Set
+
+from fastapi import HTTPException
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import SQLAlchemyError
+
+import backend_client
+import calculator_client
+import jobs
+import pipeline
+import store
+from core.database import File, SessionLocal, Tool, verify_schema
+from main import parse_error_response, select_parser
+from parsers import xml_backends
+
+import logging
+from core.logging import setup_logger
+logger = setup_logger(__name__, level=logging.INFO)
+
+# Written in locked_by, so an abandoned job tells which worker had it
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+# Jobs run at the same time by this worker (each report is parsed in the pool)
+PARSE_WORKER_CONCURRENCY = int(os.getenv("PARSE_WORKER_CONCURRENCY", pipeline.PARSE_POOL_WORKERS))
+# Delay between two looks at the queue when it is empty
+PARSE_WORKER_POLL_SECONDS = float(os.getenv("PARSE_WORKER_POLL_SECONDS", 1))
+
+
+class JobLostError(Exception):
+    """The worker's lease on its job ended (the file was deleted, or the job requeued)"""
+
+
+def _with_session(function, *args):
+    db = SessionLocal()
+    try:
+        return function(db, *args)
+    finally:
+        db.close()
+
+
+async def in_session(function, *args):
+    """Run a blocking database function with its own session, on a thread"""
+    return await asyncio.to_thread(_with_session, function, *args)
+
+
+async def chain_write(previous: Optional[asyncio.Future], write, *args) -> asyncio.Future:
+    """
+    Start a blocking database write on a thread once the previous one is done.
+
+    The job's session is only ever used by one write at a time, while the
+    event loop keeps reading the parser's results.
+    """
+    if previous is not None:
+        await previous
+    return asyncio.ensure_future(asyncio.to_thread(write, *args))
+
+
+async def keep_leased(job_id: int, lost: asyncio.Event) -> None:
+    """Refresh the job's heartbeat until cancelled, setting lost if the lease ends"""
+    while True:
+        await asyncio.sleep(jobs.PARSE_JOB_HEARTBEAT_SECONDS)
+        try:
+            if not await in_session(jobs.heartbeat, job_id, WORKER_ID):
+                lost.set()
+                return
+        except Exception as e:
+            # The job stays leased until PARSE_JOB_STALE_SECONDS: try again
+            logger.warning(f"Heartbeat of parse job {job_id} failed: {str(e)}")
+
+
+def load_job(db, file_id: int):
+    """The file and tool of a job, read in one go"""
+    db_file = db.query(File).filter(File.id == file_id).first()
+    if db_file is None:
+        return None, None
+    tool = db.query(Tool).filter(Tool.id == db_file.tool_id).first()
+    return (
+        {"file_path": db_file.file_path, "filename": db_file.filename, "tool_id": db_file.tool_id},
+        tool and {"name": tool.name, "type": tool.type, "configuration": tool.configuration},
+    )
+
+
+async def parse_job(db, job: Row, lost: asyncio.Event) -> int:
+    """
+    Parse the report of a job and write its findings.
+
+    The parse is streamed: findings are written in chunks while the parser
+    is still producing them, each chunk committed with the hosts and
+    findings processed so far. The file stays pending until it ends
+    processed (here) or failed (see run_job).
+
+    Returns:
+        The file's tool_id
+
+    Raises:
+        HTTPException: If the report cannot be parsed (see main.parse_error_response)
+        store.FileDeletedError: If the file was deleted meanwhile
+        JobLostError: If the job's lease ended
+    """
+    file_info, tool_info = await asyncio.to_thread(load_job, db, job.file_id)
+    if file_info is None:
+        raise store.FileDeletedError(f"File {job.file_id} was deleted before it was processed")
+    if tool_info is None:
+        raise HTTPException(status_code=400, detail="Tool not found")
+    file_id, tool_id, filename = job.file_id, file_info["tool_id"], file_info["filename"]
+    logger.info(f"Parse job {job.id} (attempt {job.attempts}): {filename} with {tool_info['name']}")
+
+    # Findings committed by an earlier attempt are written again
+    await asyncio.to_thread(store.start_file, db, file_id)
+    # Read from the uploads volume when it is mounted here, else pulled from the dashboard
+    file_info["file_path"] = backend_client.report_location(file_info["file_path"])
+    parser_spec, ingest_filter, field_mapping = await asyncio.to_thread(select_parser, file_info, tool_info)
+
+    writer = store.LogWriter(db)
+    # At most one database write runs while the next chunk is read from the pool;
+    # reading stops while it is pending, which pauses the parse through the channel
+    pending_write = None
+    batch = []
+    hosts = 0
+    findings = 0
+    dropped = 0
+    messages = pipeline.stream(
+        parser_spec.name, file_info["file_path"], filename,
+        ingest_filter=ingest_filter, field_mapping=field_mapping
+    )
+    try:
+        async with contextlib.aclosing(messages):
+            async for kind, payload in messages:
+                if lost.is_set():
+                    raise JobLostError(f"Parse job {job.id} of file {file_id} is no longer leased to this worker")
+                if kind == "findings":
+                    hosts, parsed_findings = payload
+                    batch.extend(store.log_row(file_id, tool_id, filename, parsed) for parsed in parsed_findings)
+                    if len(batch) >= store.INSERT_CHUNK_ROWS:
+                        findings += len(batch)
+                        pending_write = await chain_write(
+                            pending_write, store.write_findings, db, writer, file_id, batch, hosts, findings
+                        )
+                        batch = []
+                elif kind == "plugins":
+                    # Plugin text is stored once per plugin; findings reference it by plugin_id
+                    pending_write = await chain_write(pending_write, store.upsert_plugins, db, tool_id, payload)
+                elif kind == "done":
+                    hosts = payload.get("hosts", hosts)
+                    dropped = payload.get("dropped", 0)
+
+        findings += len(batch)
+        pending_write = await chain_write(
+            pending_write, store.write_findings, db, writer, file_id, batch, hosts, findings
+        )
+        pending_write = await chain_write(pending_write, store.mark_processed, db, file_id, dropped, writer.rejected)
+        await pending_write
+    except BaseException as e:
+        if pending_write is not None:
+            # Let the write finish before the caller reuses the session
+            await asyncio.wait([pending_write])
+        if not isinstance(e, Exception) or isinstance(e, (HTTPException, SQLAlchemyError, store.FileDeletedError, JobLostError)):
+            raise
+        # Raised by the parse itself
+        raise parse_error_response(e, filename)
+
+    logger.info(
+        f"Successfully processed {writer.written} findings from {filename}, "
+        f"{dropped} report items dropped by the tool's ingest filters, "
+        f"{writer.rejected} rejected by the database"
+    )
+    return tool_id
+
+
+async def run_job(job: Row) -> None:
+    """
+    Run a claimed job to its end, keeping its lease alive meanwhile.
+
+    Once the file is processed, the calculator service is asked to
+    recalculate the KPIs its tool feeds.
+
+    Reports the parser rejects (HTTP 4xx) or that time out fail the file
+    right away; other errors (database, dashboard or worker trouble) are
+    retried with backoff, and fail the file once the job has no attempts left.
+    """
+    db = SessionLocal()
+    lost = asyncio.Event()
+    heartbeat = asyncio.create_task(keep_leased(job.id, lost))
+    try:
+        try:
+            tool_id = await parse_job(db, job, lost)
+            await asyncio.to_thread(jobs.complete, db, job.id, WORKER_ID)
+            await calculator_client.request_recalculation(job.file_id, tool_id)
+            return
+        except asyncio.CancelledError:
+            # The worker is shutting down: another one takes the job over
+            await asyncio.to_thread(db.rollback)
+            await asyncio.to_thread(jobs.release, db, job.id, WORKER_ID)
+            logger.info(f"Released parse job {job.id}")
+            raise
+        except (store.FileDeletedError, JobLostError) as e:
+            logger.info(str(e))
+            await asyncio.to_thread(db.rollback)
+            return
+        except HTTPException as e:
+            detail = str(e.detail)
+            retry = e.status_code >= 500 and e.status_code != 504
+        except Exception as e:
+            logger.exception(f"Parse job {job.id} failed")
+            detail = f"Error processing file: {str(e)}"
+            retry = True
+
+        await asyncio.to_thread(db.rollback)
+        if await asyncio.to_thread(jobs.fail, db, job, WORKER_ID, detail, retry):
+            logger.warning(f"Parse job {job.id} failed, will be retried: {detail}")
+        else:
+            logger.error(f"Parse job {job.id} failed: {detail}")
+            await asyncio.to_thread(store.record_failure, db, job.file_id, detail)
+    finally:
+        heartbeat.cancel()
+        await asyncio.to_thread(db.close)
+
+
+async def main() -> None:
+    """Claim and run queued parse jobs until SIGTERM or SIGINT"""
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stopping.set)
+
+    # Refuse to write into tables that do not match the models
+    await asyncio.to_thread(verify_schema)
+    xml_backends.select_backend()
+    pipeline.start()
+    logger.info(f"Parser worker {WORKER_ID} started, running up to {PARSE_WORKER_CONCURRENCY} jobs")
+
+    running: Set[asyncio.Task] = set()
+    try:
+        while not stopping.is_set():
+            try:
+                await in_session(jobs.requeue_abandoned)
+                while len(running) < PARSE_WORKER_CONCURRENCY and not stopping.is_set():
+                    job = await in_session(jobs.claim, WORKER_ID)
+                    if job is None:
+                        break
+                    task = asyncio.create_task(run_job(job))
+                    running.add(task)
+                    task.add_done_callback(running.discard)
+            except Exception as e:
+                # Database unavailable: keep polling until it is back
+                logger.error(f"Could not poll the parse job queue: {str(e)}")
+
+            # Wake up when a job ends, on shutdown, or to poll the queue again
+            stop_wait = asyncio.create_task(stopping.wait())
+            await asyncio.wait({stop_wait, *running}, timeout=PARSE_WORKER_POLL_SECONDS,
+                               return_when=asyncio.FIRST_COMPLETED)
+            stop_wait.cancel()
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        pipeline.stop()
+        logger.info(f"Parser worker {WORKER_ID} stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())